@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+from reviews.models import User
+
+USER_STATE_KEY = 'auth:user-state:{}'
+USER_STATE_FIELDS = ('role', 'is_staff', 'is_active')
+
+
+def get_state_cache():
+    return caches[settings.JWT_USER_STATE_CACHE_ALIAS]
+
+
+def remember_user_state(user, is_active=None):
+    """Сразу обновляет роль и статус пользователя после их изменения.
+
+    Кеш этого процесса обновляется немедленно, остальные процессы
+    прочитают новое состояние из БД, когда истечёт их запись.
+    """
+    get_state_cache().set(
+        USER_STATE_KEY.format(user.pk),
+        {
+            'role': user.role,
+            'is_staff': user.is_staff,
+            'is_active': user.is_active if is_active is None else is_active,
+        },
+        settings.JWT_USER_STATE_TIMEOUT
+    )
+
+
+def get_user_state(user_id):
+    """Роль и статус пользователя: из кеша или одним запросом к БД.
+
+    Запись живёт JWT_USER_STATE_TIMEOUT секунд, поэтому изменения из
+    других процессов и через QuerySet.update() применяются не позже
+    чем через это время. Удалённый пользователь считается неактивным.
+    """
+    cache = get_state_cache()
+    key = USER_STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(
+            *USER_STATE_FIELDS
+        ).first() or {'is_active': False}
+        cache.set(key, state, settings.JWT_USER_STATE_TIMEOUT)
+    return state
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью пользователя в claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = datetime_to_epoch(token.current_time)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_staff'] = user.is_staff
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь из токена и кешированного состояния без модели User."""
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.state = state
+
+    @cached_property
+    def role(self):
+        return self.state['role']
+
+    @cached_property
+    def is_staff(self):
+        return self.state['is_staff']
+
+    @property
+    def get_admin(self):
+        return self.role == User.ADMIN
+
+    @property
+    def get_moderator(self):
+        return self.role == User.MODERATOR
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки модели пользователя.
+
+    Роль и статус берутся из короткоживущего кеша get_user_state(),
+    при тёплом кеше запрос не обращается к БД. Токены без claim
+    ``role`` (выпущенные до RoleAccessToken) проверяются как обычно,
+    с загрузкой пользователя.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+        state = get_user_state(validated_token[api_settings.USER_ID_CLAIM])
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive'
+            )
+        return RoleTokenUser(validated_token, state)
@@ -0,0 +1,209 @@
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from reviews.models import Category, Genre, GenreTitle, Title, TitleFacet
+
+from .cache import invalidate_catalog
+from .serializers import TitleBulkSerializer, TitleBulkUpdateSerializer
+
+BATCH_SIZE = 1000
+TITLE_FIELDS = ('name', 'year', 'category_id', 'description')
+
+
+def _batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_create(model, objects):
+    # Django 2.2 не ограничивает явный batch_size лимитами СУБД,
+    # поэтому пачки нарезаются здесь, а внутри — по лимиту бэкенда.
+    for batch in _batches(objects):
+        model.objects.bulk_create(batch)
+
+
+def _values(items, field, types=str):
+    """Значения поля из ещё не проверенных элементов запроса."""
+    values = set()
+    for item in items if isinstance(items, list) else ():
+        value = item.get(field) if isinstance(item, dict) else None
+        for element in value if isinstance(value, list) else (value,):
+            if isinstance(element, types):
+                values.add(element)
+    return values
+
+
+def validate_items(serializer_class, items, context, **kwargs):
+    """Проверяет список целиком, ошибки возвращаются по каждому элементу."""
+    if isinstance(items, list) and len(items) > settings.API_BULK_MAX_ITEMS:
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+            f'Не больше {settings.API_BULK_MAX_ITEMS} объектов за запрос.'
+        ]})
+    serializer = serializer_class(
+        data=items, many=True, allow_empty=False, context=context, **kwargs
+    )
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _catalog_context(items):
+    return {
+        'genres': Genre.objects.in_bulk(_values(items, 'genre'),
+                                        field_name='slug'),
+        'categories': Category.objects.in_bulk(_values(items, 'category'),
+                                               field_name='slug'),
+    }
+
+
+def _last_pk():
+    if connection.features.can_return_ids_from_bulk_insert:
+        return None
+    return Title.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def _set_pks(titles, last_pk):
+    """Находит ключи вставленных строк по значениям их полей.
+
+    SQLite не возвращает ключи из bulk_create: строки ищутся среди
+    добавленных после last_pk, поэтому чужие вставки в ту же таблицу
+    не сдвигают ключи, как при сопоставлении по порядку.
+    """
+    if last_pk is None:
+        return
+    pks = defaultdict(deque)
+    rows = Title.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+        'pk', *TITLE_FIELDS
+    )
+    for pk, *values in rows.iterator():
+        pks[tuple(values)].append(pk)
+    for title in titles:
+        key = tuple(getattr(title, field) for field in TITLE_FIELDS)
+        title.pk = pks[key].popleft()
+
+
+def _genre_links(title_genres):
+    links = [
+        GenreTitle(title_id=title_id, genre_id=genre.pk)
+        for title_id, genres in title_genres.items() for genre in genres
+    ]
+    _bulk_create(GenreTitle, links)
+    return Counter((TitleFacet.GENRE, link.genre_id) for link in links)
+
+
+def create_titles(items):
+    """Создаёт произведения и их жанры пачками в одной транзакции.
+
+    bulk_create не вызывает сигналы, поэтому счётчики фасетов
+    и кеш каталога обновляются здесь.
+    """
+    validated = validate_items(
+        TitleBulkSerializer, items, _catalog_context(items)
+    )
+    titles = []
+    genres = []
+    for data in validated:
+        data = dict(data)
+        genres.append(data.pop('genre'))
+        titles.append(Title(**data))
+    deltas = Counter()
+    for title in titles:
+        deltas.update(TitleFacet.objects.title_facets(
+            title.category_id, title.year
+        ))
+    deltas[TitleFacet.TOTAL, 0] = len(titles)
+    with transaction.atomic():
+        last_pk = _last_pk()
+        _bulk_create(Title, titles)
+        _set_pks(titles, last_pk)
+        deltas.update(_genre_links({
+            title.pk: title_genres
+            for title, title_genres in zip(titles, genres)
+        }))
+        TitleFacet.objects.apply_counts(deltas)
+    invalidate_catalog()
+    return titles
+
+
+def _replace_genres(title_genres, deltas):
+    for title_ids in _batches(list(title_genres)):
+        links = GenreTitle.objects.filter(title_id__in=title_ids)
+        deltas.subtract(Counter(
+            (TitleFacet.GENRE, genre_id)
+            for genre_id in links.values_list('genre_id', flat=True)
+        ))
+        # Без сигналов post_delete на каждую связь: счётчики жанров
+        # сдвигаются одним запросом ниже, кеш сбрасывается один раз.
+        GenreTitle.objects.delete_for_titles(title_ids)
+    deltas.update(_genre_links(title_genres))
+
+
+def update_titles(items):
+    """Частично изменяет произведения по id в одной транзакции."""
+    context = _catalog_context(items)
+    context['titles'] = Title.objects.only(
+        'pk', 'category', 'year'
+    ).in_bulk(_values(items, 'id', int))
+    validated = validate_items(
+        TitleBulkUpdateSerializer, items, context, partial=True
+    )
+    titles = {}
+    title_genres = {}
+    fields = set()
+    deltas = Counter()
+    for data in validated:
+        data = dict(data)
+        title = context['titles'][data.pop('id')]
+        old = TitleFacet.objects.title_facets(title.category_id, title.year)
+        if 'genre' in data:
+            title_genres[title.pk] = data.pop('genre')
+        for field, value in data.items():
+            setattr(title, field, value)
+        fields.update(data)
+        new = TitleFacet.objects.title_facets(title.category_id, title.year)
+        deltas.update(new - old)
+        deltas.subtract(old - new)
+        titles[title.pk] = title
+    with transaction.atomic():
+        if fields:
+            Title.objects.bulk_update(
+                titles.values(), fields, batch_size=BATCH_SIZE
+            )
+        if title_genres:
+            _replace_genres(title_genres, deltas)
+        TitleFacet.objects.apply_counts(
+            {facet: delta for facet, delta in deltas.items() if delta}
+        )
+    invalidate_catalog()
+    return list(titles.values())
+
+
+def create_slugged(model, serializer_class, items):
+    """Создаёт жанры или категории одним bulk_create."""
+    slugs = set(model.objects.in_bulk(_values(items, 'slug'),
+                                      field_name='slug'))
+    validated = validate_items(serializer_class, items, {'slugs': slugs})
+    objects = [model(**data) for data in validated]
+    with transaction.atomic():
+        _bulk_create(model, objects)
+    invalidate_catalog()
+    return objects
+
+
+class BulkCreateMixin:
+    """Массовое создание жанров и категорий: POST .../bulk/ со списком."""
+    bulk_serializer_class = None
+
+    @action(detail=False, methods=('post',), url_path='bulk')
+    def bulk(self, request):
+        objects = create_slugged(
+            self.queryset.model, self.bulk_serializer_class, request.data
+        )
+        serializer = self.get_serializer(objects, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
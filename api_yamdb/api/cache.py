@@ -0,0 +1,131 @@
+import hashlib
+import json
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+CATALOG_VERSION_KEY = 'api:catalog:version'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_state_cache():
+    """Кеш, из которого записи не вытесняются ради ответов каталога."""
+    return caches[settings.STATE_CACHE_ALIAS]
+
+
+def get_catalog_version():
+    """Возвращает время последнего изменения каталога."""
+    cache = get_state_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = time.time()
+        cache.add(CATALOG_VERSION_KEY, version, None)
+    return version
+
+
+def bump_catalog_version():
+    get_state_cache().set(CATALOG_VERSION_KEY, time.time(), None)
+
+
+def invalidate_catalog():
+    """Сбрасывает все закешированные ответы каталога.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос успел бы закешировать под новой версией прежние данные.
+    Сколько бы объектов ни изменила транзакция, версия меняется один
+    раз. Откат точки сохранения убирает и отложенную смену версии,
+    поэтому следующее изменение поставит её заново.
+    """
+    pending = transaction.get_connection().run_on_commit
+    if any(entry[1] is bump_catalog_version for entry in pending):
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+class CachedResponseMixin:
+    """Кеширует ответы вьюсета и отвечает 304 по ETag/Last-Modified.
+
+    Закешированный ответ не зависит от пользователя, поэтому смешивать
+    класс можно только с вьюсетами, ответы которых одинаковы для всех.
+    """
+    cache_key_prefix = 'api:catalog'
+
+    def use_replica(self, request):
+        # Реплика могла ещё не получить последнее изменение каталога,
+        # а прочитанный с неё ответ закешируется под новой версией.
+        return super().use_replica(request) and (
+            time.time() - get_catalog_version()
+            >= settings.DATABASE_REPLICA_STICKY_SECONDS
+        )
+
+    def get_cache_key(self, request, version):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        raw_key = '|'.join((
+            request.get_host(), request.path, query,
+            request.accepted_renderer.format, repr(version),
+        ))
+        digest = hashlib.md5(raw_key.encode()).hexdigest()
+        return f'{self.cache_key_prefix}:{digest}'
+
+    @staticmethod
+    def get_etag(data):
+        content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+        return quote_etag(hashlib.md5(content.encode()).hexdigest())
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in (tag.strip() for tag in if_none_match.split(','))
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            if_modified_since is not None
+            and int(last_modified) <= if_modified_since
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        version = get_catalog_version()
+        key = self.get_cache_key(request, version)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {
+                'data': response.data,
+                'etag': self.get_etag(response.data),
+            }
+            cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+        if self.is_not_modified(request, entry['etag'], version):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(int(version))
+        response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedReadMixin(CachedListMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from reviews.models import Category, Genre, TitleFacet
+
+
+def _named(model, counts):
+    if not counts:
+        return []
+    objects = model.objects.filter(pk__in=counts).order_by().values(
+        'pk', 'name', 'slug'
+    )
+    return sorted(
+        (
+            {'name': obj['name'], 'slug': obj['slug'],
+             'count': counts[obj['pk']]}
+            for obj in objects
+        ),
+        key=lambda item: (-item['count'], item['slug'])
+    )
+
+
+def facets_data(counts):
+    """Ответ эндпоинта фасетов из счётчиков {(kind, value): count}.
+
+    Десятилетия отдаются границами в виде параметров фильтра
+    year__gte/year__lte, чтобы клиент мог сразу их применить.
+    """
+    by_kind = defaultdict(dict)
+    for (kind, value), count in counts.items():
+        if count > 0:
+            by_kind[kind][value] = count
+    return {
+        'count': by_kind[TitleFacet.TOTAL].get(0, 0),
+        'genre': _named(Genre, by_kind[TitleFacet.GENRE]),
+        'category': _named(Category, by_kind[TitleFacet.CATEGORY]),
+        'year': [
+            {'year__gte': start,
+             'year__lte': start + TitleFacet.YEAR_BUCKET - 1,
+             'count': count}
+            for start, count in sorted(by_kind[TitleFacet.YEAR].items())
+        ],
+    }
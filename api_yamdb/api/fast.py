@@ -0,0 +1,176 @@
+"""Быстрое чтение списков: строки values() вместо объектов моделей.
+
+Поля собираются один раз из обычного сериализатора, поэтому ответ
+совпадает с ним побайтно, а на каждую строку остаётся только
+преобразование значений. Объекты моделей и поля сериализатора
+для строк не создаются.
+"""
+import time
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .metrics import get_request_metrics
+
+
+def _lookup(source):
+    return source.replace('.', '__')
+
+
+class FastSerializer:
+    """Сериализатор строк values(), собранный из ModelSerializer.
+
+    Поддерживаются обычные поля модели, SlugRelatedField,
+    PrimaryKeyRelatedField, вложенный сериализатор внешнего ключа и
+    список вложенных сериализаторов many-to-many (одним запросом на
+    всю страницу).
+    """
+
+    def __init__(self, serializer, prefix=''):
+        self.model = serializer.Meta.model
+        self.lookups = []
+        # (ключ ответа, ключ строки, преобразование или None)
+        self.fields = []
+        # (ключ строки, ключ для проверки на None, FastSerializer)
+        self.nested = []
+        # (ключ строки, поле many-to-many, FastSerializer)
+        self.many = []
+        self.pk_lookup = f'{prefix}pk'
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.fields.append(self._compile(name, field, prefix))
+
+    def _compile(self, name, field, prefix):
+        if field.source == '*' or isinstance(
+            field, (serializers.SerializerMethodField,
+                    serializers.ManyRelatedField)
+        ):
+            raise ImproperlyConfigured(
+                f'Поле {name} не поддерживается FastSerializer.'
+            )
+        lookup = prefix + _lookup(field.source)
+        if isinstance(field, serializers.ListSerializer):
+            key = ('many', lookup)
+            self.lookups.append(self.pk_lookup)
+            self.many.append((
+                key, self.model._meta.get_field(field.source),
+                FastSerializer(field.child),
+            ))
+            return name, key, None
+        if isinstance(field, serializers.Serializer):
+            key = ('nested', lookup)
+            child = FastSerializer(field, prefix=f'{lookup}__')
+            self.lookups.append(lookup)
+            self.lookups.extend(child.lookups)
+            self.nested.append((key, lookup, child))
+            return name, key, None
+        convert = None
+        if isinstance(field, serializers.SlugRelatedField):
+            lookup = f'{lookup}__{field.slug_field}'
+        elif not isinstance(field, serializers.RelatedField):
+            convert = field.to_representation
+        elif not isinstance(field, serializers.PrimaryKeyRelatedField) or (
+            field.pk_field is not None
+        ):
+            raise ImproperlyConfigured(
+                f'Поле {name} не поддерживается FastSerializer.'
+            )
+        self.lookups.append(lookup)
+        return name, lookup, convert
+
+    def values(self, queryset, extra=()):
+        """Строки для сериализации; extra — дополнительные поля строк."""
+        lookups = dict.fromkeys(self.lookups + list(extra))
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def prepare(self, rows):
+        """Добавляет в строки вложенные объекты и списки many-to-many."""
+        for key, null_lookup, child in self.nested:
+            child.prepare(rows)
+            for row in rows:
+                row[key] = (
+                    None if row[null_lookup] is None
+                    else child.to_representation(row)
+                )
+        for key, field, child in self.many:
+            items = {row[self.pk_lookup]: [] for row in rows}
+            query_name = field.related_query_name()
+            related = list(
+                child.model._default_manager
+                .filter(**{f'{query_name}__in': list(items)})
+                .values(query_name, *child.lookups)
+            )
+            child.prepare(related)
+            for item in related:
+                items[item[query_name]].append(child.to_representation(item))
+            for row in rows:
+                row[key] = items[row[self.pk_lookup]]
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, convert in self.fields:
+            value = row[lookup]
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        started = time.perf_counter()
+        try:
+            return [self.to_representation(row) for row in rows]
+        finally:
+            request_metrics = get_request_metrics()
+            if request_metrics is not None:
+                request_metrics.serializer_time += (
+                    time.perf_counter() - started
+                )
+
+
+@lru_cache(maxsize=None)
+def get_fast_serializer(serializer_class):
+    return FastSerializer(serializer_class())
+
+
+class FastReadMixin:
+    """list и retrieve через FastSerializer.
+
+    Остальные действия и формы browsable API используют обычный
+    сериализатор из get_serializer_class().
+    """
+
+    def get_fast_serializer(self):
+        return get_fast_serializer(self.get_serializer_class())
+
+    def get_rows(self, queryset):
+        # Keyset-пагинация строит курсор по полям сортировки,
+        # поэтому они должны быть в строках.
+        cursor_class = getattr(self.paginator, 'cursor_class', None)
+        ordering = getattr(cursor_class, 'ordering', ())
+        return self.get_fast_serializer().values(
+            queryset, [field.lstrip('-') for field in ordering]
+        )
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_fast_serializer().serialize(page)
+            )
+        return Response(self.get_fast_serializer().serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_rows(self.filter_queryset(self.get_queryset())),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(self.get_fast_serializer().serialize([row])[0])
@@ -1,15 +1,53 @@
+from django.db.models import Count
 from django_filters import rest_framework as rf
-from reviews.models import Title
+from reviews.models import GenreTitle, Title
+
+
+class CharInFilter(rf.BaseInFilter, rf.CharFilter):
+    pass
 
 
 class TitleFilter(rf.FilterSet):
-    """Фильтрация произведений по полям вложенных моделей."""
+    """Фильтрация произведений по полям вложенных моделей.
+
+    Слаги и год сравниваются точно, чтобы запрос шёл по индексам;
+    поиск подстроки доступен только через явные ``__icontains``.
+    """
+    GENRE_MATCH = (
+        ('any', 'Любой из жанров'),
+        ('all', 'Все жанры'),
+    )
+
     name = rf.CharFilter(field_name='name', lookup_expr='icontains')
-    category = rf.CharFilter(field_name='category__slug',
-                             lookup_expr='icontains')
-    genre = rf.CharFilter(field_name='genre__slug', lookup_expr='icontains')
-    year = rf.NumberFilter(field_name='year', lookup_expr='icontains')
+    category = CharInFilter(field_name='category__slug', lookup_expr='in')
+    category__icontains = rf.CharFilter(field_name='category__slug',
+                                        lookup_expr='icontains')
+    genre = CharInFilter(method='filter_genre')
+    genre_match = rf.ChoiceFilter(choices=GENRE_MATCH,
+                                  method='filter_genre_match')
+    genre__icontains = rf.CharFilter(method='filter_genre')
+    year = rf.NumberFilter(field_name='year')
+    year__gte = rf.NumberFilter(field_name='year', lookup_expr='gte')
+    year__lte = rf.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        if not value:
+            return queryset
+        links = GenreTitle.objects.order_by()
+        if name == 'genre__icontains':
+            links = links.filter(genre__slug__icontains=value)
+        else:
+            slugs = set(value)
+            links = links.filter(genre__slug__in=slugs)
+            if self.form.cleaned_data.get('genre_match') == 'all':
+                links = links.values('title_id').annotate(
+                    matched=Count('genre_id', distinct=True)
+                ).filter(matched=len(slugs))
+        return queryset.filter(pk__in=links.values('title_id'))
+
+    def filter_genre_match(self, queryset, name, value):
+        return queryset
@@ -0,0 +1,421 @@
+import glob
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_local = threading.local()
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Гистограмма Prometheus с накопительными корзинами."""
+
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0, 0]
+        counts = series[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def dump(self):
+        return [[labels, series] for labels, series in self.series.items()]
+
+    def merge(self, dumped):
+        for labels, (counts, total, count) in dumped:
+            labels = tuple(tuple(pair) for pair in labels)
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0, 0]
+            series[0] = [
+                mine + theirs for mine, theirs in zip(series[0], counts)
+            ]
+            series[1] += total
+            series[2] += count
+
+    def samples(self):
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield ('_bucket', labels + (('le', _format_value(bound)),),
+                       cumulative)
+            yield '_bucket', labels + (('le', '+Inf'),), count
+            yield '_sum', labels, total
+            yield '_count', labels, count
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def dump(self):
+        return [[labels, value] for labels, value in self.series.items()]
+
+    def merge(self, dumped):
+        for labels, value in dumped:
+            self.inc(tuple(tuple(pair) for pair in labels), value)
+
+    def samples(self):
+        for labels, value in self.series.items():
+            yield '', labels, value
+
+
+class Registry:
+    """Метрики процесса.
+
+    Если задан METRICS_DIR, процесс не реже раза в METRICS_FLUSH_INTERVAL
+    секунд сохраняет в нём свои значения, а /metrics суммирует файлы всех
+    воркеров. Файлы завершившихся воркеров остаются, поэтому счётчики
+    не убывают до перезапуска gunicorn.
+    """
+    metric_names = (
+        'requests', 'duration', 'queries', 'db_time', 'serializer_time',
+        'response_size', 'slow',
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter(
+            'yamdb_http_requests_total', 'Количество запросов.'
+        )
+        self.duration = Histogram(
+            'yamdb_http_request_duration_seconds',
+            'Время обработки запроса.', DURATION_BUCKETS
+        )
+        self.queries = Histogram(
+            'yamdb_db_queries_per_request',
+            'Количество SQL-запросов на запрос.', QUERY_BUCKETS
+        )
+        self.db_time = Histogram(
+            'yamdb_db_duration_seconds',
+            'Суммарное время SQL-запросов на запрос.', DURATION_BUCKETS
+        )
+        self.serializer_time = Histogram(
+            'yamdb_serializer_duration_seconds',
+            'Время сериализации ответа.', DURATION_BUCKETS
+        )
+        self.response_size = Histogram(
+            'yamdb_http_response_size_bytes',
+            'Размер тела ответа.', SIZE_BUCKETS
+        )
+        self.slow = Counter(
+            'yamdb_slow_requests_total', 'Количество медленных запросов.'
+        )
+        self.slow_samples = deque(
+            maxlen=settings.METRICS_SLOW_REQUEST_SAMPLES
+        )
+        self.flushed_at = 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'metrics': {
+                    name: getattr(self, name).dump()
+                    for name in self.metric_names
+                },
+                'slow_samples': list(self.slow_samples),
+            }
+
+    def merge(self, snapshot):
+        with self.lock:
+            for name, dumped in snapshot['metrics'].items():
+                getattr(self, name).merge(dumped)
+            self.slow_samples.extend(snapshot['slow_samples'])
+
+    def get_path(self):
+        # Имя уникально для процесса, даже если pid уже использовался.
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.name = f'{self.pid}-{uuid.uuid4().hex}.json'
+        return os.path.join(settings.METRICS_DIR, self.name)
+
+    def flush(self):
+        """Сохраняет метрики процесса в METRICS_DIR."""
+        path = self.get_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False)
+        os.replace(temporary, path)
+        self.flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        if settings.METRICS_DIR and (
+            time.monotonic() - self.flushed_at
+            >= settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def aggregate(self):
+        """Метрики всех воркеров или, без METRICS_DIR, только этого."""
+        if not settings.METRICS_DIR:
+            return self
+        self.flush()
+        total = Registry()
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path, encoding='utf-8') as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            total.merge(snapshot)
+        return total
+
+    def record(self, request_metrics, route, method, status, size):
+        labels = (('route', route), ('method', method))
+        with self.lock:
+            self.requests.inc(labels + (('status', status),))
+            self.duration.observe(labels, request_metrics.duration)
+            self.queries.observe(labels, request_metrics.query_count)
+            self.db_time.observe(labels, request_metrics.db_time)
+            self.serializer_time.observe(
+                labels, request_metrics.serializer_time
+            )
+            if size is not None:
+                self.response_size.observe(labels, size)
+            if (
+                request_metrics.duration
+                >= settings.METRICS_SLOW_REQUEST_THRESHOLD
+            ):
+                self.slow.inc(labels)
+                self.slow_samples.append(
+                    request_metrics.as_sample(route, method, status)
+                )
+        self.maybe_flush()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in (
+                self.requests, self.duration, self.queries, self.db_time,
+                self.serializer_time, self.response_size, self.slow,
+            ):
+                lines.append(f'# HELP {metric.name} {metric.help_text}')
+                lines.append(f'# TYPE {metric.name} {metric.type}')
+                for suffix, labels, value in metric.samples():
+                    lines.append(
+                        f'{metric.name}{suffix}'
+                        f'{{{_format_labels(labels)}}} '
+                        f'{_format_value(value)}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, сериализация и общее время."""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += elapsed
+            if len(self.statements) < settings.METRICS_SLOW_REQUEST_SQL:
+                self.statements.append((sql, elapsed))
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def as_sample(self, route, method, status):
+        return {
+            'route': route,
+            'method': method,
+            'path': self.path,
+            'status': status,
+            'duration_ms': round(self.duration * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'queries': self.query_count,
+            'sql': [
+                {'sql': sql, 'ms': round(elapsed * 1000, 2)}
+                for sql, elapsed in self.statements
+            ],
+        }
+
+
+def get_request_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+class MetricsSerializerMixin:
+    """Учитывает время сериализации в метриках текущего запроса.
+
+    Засекается только внешний вызов, вложенные сериализаторы
+    в него уже входят.
+    """
+
+    def to_representation(self, instance):
+        request_metrics = get_request_metrics()
+        if request_metrics is None or request_metrics.serializer_depth:
+            return super().to_representation(instance)
+        request_metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            request_metrics.serializer_time += time.perf_counter() - started
+            request_metrics.serializer_depth -= 1
+
+
+def _get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name
+
+
+class MetricsMiddleware:
+    """Собирает время ответа, SQL-запросы и размер ответа по маршрутам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in settings.METRICS_EXCLUDE_PATHS:
+            return self.get_response(request)
+        request_metrics = _local.metrics = RequestMetrics(request.path)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        request_metrics.finish()
+        size = None if response.streaming else len(response.content)
+        route = _get_route(request)
+        registry.record(
+            request_metrics, route, request.method,
+            response.status_code, size
+        )
+        if request_metrics.duration >= settings.METRICS_SLOW_REQUEST_THRESHOLD:
+            logger.warning(
+                'Медленный запрос %s %s: %.0f мс, SQL-запросов %s',
+                request.method, request.path,
+                request_metrics.duration * 1000, request_metrics.query_count
+            )
+        return response
+
+
+@lru_cache(maxsize=None)
+def _get_networks(networks):
+    return tuple(
+        ipaddress.ip_network(network, strict=False) for network in networks
+    )
+
+
+def is_internal(request):
+    """Запрос пришёл напрямую, не через nginx, из METRICS_ALLOWED_NETWORKS."""
+    if 'HTTP_X_FORWARDED_FOR' in request.META:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in network
+        for network in _get_networks(tuple(settings.METRICS_ALLOWED_NETWORKS))
+    )
+
+
+def internal_only(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_internal(request):
+            return HttpResponseForbidden()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@internal_only
+def metrics(request):
+    """Метрики в текстовом формате Prometheus."""
+    return HttpResponse(
+        registry.aggregate().render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@internal_only
+def slow_requests(request):
+    """Последние медленные запросы вместе с их SQL."""
+    return HttpResponse(
+        json.dumps(
+            list(registry.aggregate().slow_samples), ensure_ascii=False
+        ),
+        content_type='application/json'
+    )
@@ -1,7 +1,11 @@
 from rest_framework import mixins, viewsets
+from rest_framework.generics import get_object_or_404
+
+from .replicas import ReplicaReadMixin
 
 
 class CreateDestroyUpdateDeleteListViewSet(
+    ReplicaReadMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -13,9 +17,47 @@ class CreateDestroyUpdateDeleteListViewSet(
 
 
 class CreateDestroyListViewSet(
+    ReplicaReadMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
 ):
     pass
+
+
+class NestedParentMixin:
+    """Родительский объект вложенного маршрута.
+
+    Список и отдельные объекты выбираются одним запросом с фильтром
+    по всей цепочке родителей из URL. Сам родитель загружается только
+    при создании объекта или когда список пуст и нужно отличить
+    пустой список от несуществующего родителя; в пределах запроса
+    он кешируется.
+    """
+    parent_model = None
+    # Поле родительской модели -> именованный аргумент URL.
+    parent_lookups = {}
+    # Поле дочерней модели -> именованный аргумент URL.
+    parent_filters = {}
+
+    def _from_kwargs(self, lookups):
+        return {field: self.kwargs[kwarg] for field, kwarg in lookups.items()}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_model, **self._from_kwargs(self.parent_lookups)
+            )
+        return self._parent
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            **self._from_kwargs(self.parent_filters)
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
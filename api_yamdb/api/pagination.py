@@ -0,0 +1,132 @@
+import json
+
+from django.db import connections
+from rest_framework import pagination
+
+
+class CountableLimitOffsetPagination(pagination.LimitOffsetPagination):
+    """Limit/offset-пагинация с выбором способа подсчёта записей.
+
+    Параметр ``count`` принимает значения ``exact`` (по умолчанию),
+    ``estimate`` (оценка планировщика PostgreSQL) и ``none``
+    (без подсчёта).
+    """
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate', 'none')
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param, 'exact')
+        return mode if mode in self.count_modes else 'exact'
+
+    def get_estimated_count(self, queryset):
+        if connections[queryset.db].vendor != 'postgresql':
+            return self.get_count(queryset)
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == 'exact':
+            self.has_next = None
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        if self.count_mode == 'estimate':
+            self.count = self.get_estimated_count(queryset)
+        else:
+            self.count = None
+        return page[:self.limit]
+
+    def get_next_link(self):
+        if self.has_next is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = pagination.replace_query_param(
+            url, self.limit_query_param, self.limit
+        )
+        return pagination.replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Способ подсчёта записей: exact, estimate, none.',
+            'schema': {'type': 'string', 'enum': list(self.count_modes)},
+        }]
+
+
+class PubDateCursorPagination(pagination.CursorPagination):
+    """Keyset-пагинация по дате публикации и идентификатору."""
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class KeysetOptionalPagination(pagination.BasePagination):
+    """Пагинация, в которой клиент может выбрать keyset-режим.
+
+    Keyset-режим включается параметром ``pagination=cursor`` и сохраняется
+    в ссылках ``next``/``previous`` через параметр ``cursor``.
+    """
+    mode_query_param = 'pagination'
+    offset_class = CountableLimitOffsetPagination
+    cursor_class = PubDateCursorPagination
+
+    def get_paginator(self, request):
+        cursor = self.cursor_class()
+        if (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor.cursor_query_param in request.query_params
+        ):
+            return cursor
+        return self.offset_class()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.offset_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = {
+            parameter['name']: parameter
+            for paginator in (self.offset_class(), self.cursor_class())
+            for parameter in paginator.get_schema_operation_parameters(view)
+        }
+        parameters[self.mode_query_param] = {
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Режим пагинации: cursor для keyset-пагинации.',
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        }
+        return list(parameters.values())
@@ -11,7 +11,7 @@ class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return request.user.is_authenticated and (
-            request.user == obj.author
+            obj.author_id == request.user.id
             or request.user.get_admin
             or request.user.get_moderator
             or request.user.is_staff
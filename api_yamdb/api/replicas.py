@@ -0,0 +1,138 @@
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import get_state_cache
+
+STICKY_KEY = 'api:replicas:sticky:{}'
+STICKY_COOKIE = 'replica_sticky'
+
+_local = threading.local()
+# Реплика -> время, до которого она не используется после сбоя.
+_down_until = {}
+
+
+def get_replica():
+    """Реплика, выбранная для текущего запроса, или None."""
+    return getattr(_local, 'alias', None)
+
+
+def set_replica(alias):
+    _local.alias = alias
+
+
+def mark_down(alias):
+    _down_until[alias] = (
+        time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+    )
+
+
+def choose_replica():
+    """Возвращает доступную реплику или None, если читать нужно с основной.
+
+    Реплика, к которой не удалось подключиться, пропускается
+    DATABASE_REPLICA_RETRY_SECONDS секунд.
+    """
+    now = time.monotonic()
+    aliases = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if _down_until.get(alias, 0) <= now
+    ]
+    random.shuffle(aliases)
+    for alias in aliases:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_down(alias)
+            continue
+        return alias
+    return None
+
+
+def mark_written(request, response):
+    """Следующие запросы клиента читают с основной БД.
+
+    Метка ставится в подписанную cookie, которую проверит любой воркер,
+    и для клиентов без cookie — в кеш по пользователю.
+    """
+    sticky_seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+    response.set_signed_cookie(
+        STICKY_COOKIE, '1', salt=STICKY_COOKIE,
+        max_age=math.ceil(sticky_seconds), httponly=True, samesite='Lax'
+    )
+    if request.user.is_authenticated:
+        get_state_cache().set(
+            STICKY_KEY.format(request.user.id), True, sticky_seconds
+        )
+
+
+def is_sticky(request):
+    if request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=STICKY_COOKIE,
+        max_age=settings.DATABASE_REPLICA_STICKY_SECONDS
+    ) is not None:
+        return True
+    return (
+        request.user.is_authenticated
+        and get_state_cache().get(STICKY_KEY.format(request.user.id), False)
+    )
+
+
+class ReplicaRouter:
+    """Направляет чтение на реплику, выбранную для запроса.
+
+    Запись, чтение вне безопасных запросов API и чтение внутри
+    транзакции всегда идут в основную БД.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = get_replica()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы вьюсета читают с реплики.
+
+    После успешной записи пользователь DATABASE_REPLICA_STICKY_SECONDS
+    секунд читает с основной БД и видит свои изменения.
+    """
+
+    def use_replica(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not is_sticky(request)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.use_replica(request):
+            set_replica(choose_replica())
+
+    def handle_exception(self, exc):
+        alias = get_replica()
+        if alias is not None and isinstance(exc, DatabaseError):
+            mark_down(alias)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_replica(None)
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_written(request, response)
+        return response
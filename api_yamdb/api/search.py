@@ -0,0 +1,110 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from reviews.models import Comment, Review, Title
+
+SEARCH_CONFIG = 'russian'
+
+# Индексируемые поля и веса колонок для ранжирования в SQLite (bm25).
+SEARCH_FIELDS = {
+    Title: (('name', 10.0), ('description', 1.0)),
+    Review: (('text', 1.0),),
+    Comment: (('text', 1.0),),
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def escape_like(value):
+    return (
+        value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
+
+
+class BaseSearchBackend:
+    """Поиск идентификаторов объектов, упорядоченных по релевантности.
+
+    По умолчанию ищет подстроку в индексируемых полях, новые объекты
+    первыми; так работает поиск в СУБД без полнотекстового индекса.
+    Ищет в базе using.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def search(self, model, query, limit):
+        condition = Q()
+        for field, _ in SEARCH_FIELDS[model]:
+            condition |= Q(**{f'{field}__icontains': query})
+        return list(
+            model.objects.using(self.using).filter(condition).order_by('-pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector + GIN, а для названий произведений ещё и триграммы."""
+
+    def search(self, model, query, limit):
+        table = model._meta.db_table
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {table}, '
+                f'plainto_tsquery(%s, %s) query '
+                f'WHERE search_vector @@ query '
+                f'ORDER BY ts_rank_cd(search_vector, query) DESC, id DESC '
+                f'LIMIT %s',
+                (SEARCH_CONFIG, query, limit)
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if model is Title and len(ids) < limit:
+                cursor.execute(
+                    'SELECT id FROM reviews_title '
+                    'WHERE name %% %s OR name ILIKE %s '
+                    'ORDER BY similarity(name, %s) DESC, id DESC LIMIT %s',
+                    (query, f'%{escape_like(query)}%', query, limit)
+                )
+                ids += [row[0] for row in cursor.fetchall()
+                        if row[0] not in ids]
+        return ids[:limit]
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 с префиксным поиском для локального запуска и тестов."""
+
+    def search(self, model, query, limit):
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        table = f'{model._meta.db_table}_fts'
+        weights = ', '.join(str(weight) for _, weight in SEARCH_FIELDS[model])
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+                f'ORDER BY bm25({table}, {weights}), rowid DESC LIMIT %s',
+                (match, limit)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def get_search_backend(using='default'):
+    vendor = connections[using].vendor
+    if vendor == 'postgresql':
+        return PostgresSearchBackend(using)
+    if vendor == 'sqlite':
+        return SQLiteSearchBackend(using)
+    return BaseSearchBackend(using)
+
+
+def search(queryset, query, limit):
+    """Возвращает объекты queryset, найденные по запросу, по релевантности.
+
+    Идентификаторы и сами объекты читаются из одной базы: реплика,
+    выбранная роутером, может отставать от основной.
+    """
+    using = queryset.db
+    ids = get_search_backend(using).search(queryset.model, query, limit)
+    objects = queryset.using(using).in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
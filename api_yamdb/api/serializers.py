@@ -1,25 +1,64 @@
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
+from .metrics import MetricsSerializerMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+DUPLICATE_REVIEW_MESSAGE = 'Может существовать только один отзыв!'
+
+
+class BaseModelSerializer(MetricsSerializerMixin,
+                          serializers.ModelSerializer):
+    """Сериализатор, время работы которого попадает в метрики."""
+
+
+class CategorySerializer(BaseModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Category
         search_fields = ('name')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(BaseModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
 
 
-class TitleCrudSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(many=True, slug_field='slug',
-                                         queryset=Genre.objects.all())
+class SlugListRelatedField(serializers.ManyRelatedField):
+    """Список слагов, который разрешается в объекты одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slug_field = self.child_relation.slug_field
+        slugs = [str(slug) for slug in data]
+        objects = {
+            getattr(obj, slug_field): obj
+            for obj in self.child_relation.get_queryset().filter(
+                **{f'{slug_field}__in': slugs}
+            )
+        }
+        for slug in slugs:
+            if slug not in objects:
+                self.child_relation.fail(
+                    'does_not_exist', slug_name=slug_field, value=slug
+                )
+        return [objects[slug] for slug in slugs]
+
+
+class TitleCrudSerializer(BaseModelSerializer):
+    genre = SlugListRelatedField(
+        child_relation=serializers.SlugRelatedField(
+            slug_field='slug', queryset=Genre.objects.all()
+        )
+    )
     category = serializers.SlugRelatedField(slug_field='slug',
                                             queryset=Category.objects.all())
 
@@ -32,7 +71,7 @@ class TitleCrudSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleGetSerializer(BaseModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer(many=False)
     rating = serializers.IntegerField(read_only=True, required=False)
@@ -43,7 +82,85 @@ class TitleGetSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class UserSerializer(serializers.ModelSerializer):
+class BulkSlugSerializerMixin:
+    """Уникальность слага в массовой вставке.
+
+    Слаги проверяются по множеству из context['slugs'], заполненному
+    одним запросом, и по уже принятым элементам того же запроса.
+    """
+
+    def validate_slug(self, value):
+        if value in self.context['slugs']:
+            raise ValidationError(UniqueValidator.message)
+        self.context['slugs'].add(value)
+        return value
+
+
+class CategoryBulkSerializer(BulkSlugSerializerMixin, CategorySerializer):
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class GenreBulkSerializer(BulkSlugSerializerMixin, GenreSerializer):
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class TitleBulkSerializer(BaseModelSerializer):
+    """Произведение в массовом создании.
+
+    Жанры и категории ищутся в словарях context['genres'] и
+    context['categories'], загруженных одним запросом на весь список.
+    """
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  allow_empty=False)
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
+    @staticmethod
+    def _resolve(objects, slug):
+        if slug not in objects:
+            raise ValidationError(
+                serializers.SlugRelatedField.default_error_messages[
+                    'does_not_exist'
+                ].format(slug_name='slug', value=slug)
+            )
+        return objects[slug]
+
+    def validate_genre(self, value):
+        return [
+            self._resolve(self.context['genres'], slug)
+            for slug in dict.fromkeys(value)
+        ]
+
+    def validate_category(self, value):
+        return self._resolve(self.context['categories'], value)
+
+
+class TitleBulkUpdateSerializer(TitleBulkSerializer):
+    """Изменение произведения по id, остальные поля необязательны."""
+    id = serializers.IntegerField()
+
+    class Meta(TitleBulkSerializer.Meta):
+        fields = ('id',) + TitleBulkSerializer.Meta.fields
+
+    def validate_id(self, value):
+        if value not in self.context['titles']:
+            raise ValidationError(f'Произведение {value} не найдено.')
+        return value
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            raise ValidationError(
+                {'id': [self.fields['id'].error_messages['required']]}
+            )
+        return attrs
+
+
+class UserSerializer(BaseModelSerializer):
 
     class Meta:
         fields = ('username', 'email', 'first_name',
@@ -51,7 +168,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
-class ProfilePatchSerializer(serializers.ModelSerializer):
+class ProfilePatchSerializer(BaseModelSerializer):
 
     class Meta:
         fields = ('username', 'email', 'first_name',
@@ -60,7 +177,7 @@ class ProfilePatchSerializer(serializers.ModelSerializer):
         model = User
 
 
-class ReviewSerializers(serializers.ModelSerializer):
+class ReviewSerializers(BaseModelSerializer):
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         slug_field='username', read_only=True
@@ -70,20 +187,24 @@ class ReviewSerializers(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
-        ):
-            raise ValidationError('Может существовать только один отзыв!')
-        return data
+    def create(self, validated_data):
+        # Повторный отзыв отсекает ограничение unique review в БД:
+        # так нет отдельного запроса на проверку и гонки между ним
+        # и вставкой.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author_id=validated_data['author_id']
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW_MESSAGE]
+            })
 
 
-class CommentSerializers(serializers.ModelSerializer):
+class CommentSerializers(BaseModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -93,14 +214,65 @@ class CommentSerializers(serializers.ModelSerializer):
         model = Comment
 
 
-class SignUpSerializer(serializers.ModelSerializer):
+class ReviewSearchSerializer(ReviewSerializers):
+    class Meta(ReviewSerializers.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
+
+
+class CommentSearchSerializer(CommentSerializers):
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+
+    class Meta(CommentSerializers.Meta):
+        fields = ('id', 'title', 'review', 'text', 'author', 'pub_date')
+
+
+class SignUpSerializer(BaseModelSerializer):
+    """Регистрация одной вставкой.
+
+    Занятые имя и почту отсекают ограничения unique в БД, поэтому
+    таблица пользователей читается только после неудачной вставки,
+    чтобы вернуть те же ошибки, что и UniqueValidator.
+    """
 
     class Meta:
         fields = ('email', 'username')
         model = User
 
+    def get_fields(self):
+        fields = super().get_fields()
+        self.unique_messages = {}
+        for name, field in fields.items():
+            for validator in field.validators:
+                if isinstance(validator, UniqueValidator):
+                    self.unique_messages[name] = validator.message
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+    def create(self, validated_data):
+        try:
+            # Вне транзакции запроса точка сохранения не создаётся.
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            lookups = Q()
+            for name in self.unique_messages:
+                lookups |= Q(**{name: validated_data[name]})
+            errors = {}
+            for user in User.objects.filter(lookups).values(
+                *self.unique_messages
+            ):
+                for name, message in self.unique_messages.items():
+                    if user[name] == validated_data[name]:
+                        errors[name] = [message]
+            if not errors:
+                raise
+            raise ValidationError(errors)
+
 
-class GetTokenSerializer(serializers.ModelSerializer):
+class GetTokenSerializer(BaseModelSerializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
 
@@ -0,0 +1,69 @@
+import time
+
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, GenreTitle, Review, Title, User
+
+from .authentication import remember_user_state
+from .cache import invalidate_catalog
+
+CATALOG_MODELS = (Category, Genre, GenreTitle, Review, Title)
+
+
+def invalidate_catalog_on_write(sender, **kwargs):
+    invalidate_catalog()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog_on_write, sender=model)
+    post_delete.connect(invalidate_catalog_on_write, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_catalog_on_genres_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_catalog()
+
+
+@receiver(post_save, sender=User)
+def remember_user_state_on_save(sender, instance, created, **kwargs):
+    if not created:
+        remember_user_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def remember_user_state_on_delete(sender, instance, **kwargs):
+    remember_user_state(instance, is_active=False)
+
+
+@receiver(request_finished)
+def remember_connections_use(sender, **kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.yamdb_used_at = now
+
+
+@receiver(request_started)
+def check_database_connections(sender, **kwargs):
+    """Закрывает оборвавшиеся постоянные соединения до начала запроса.
+
+    Проверяются только соединения, простоявшие без запросов дольше
+    YAMDB_CONN_HEALTH_CHECK_IDLE секунд: соединение, на котором запрос
+    упал с ошибкой БД, Django сам закрывает в конце запроса.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        used_at = getattr(connection, 'yamdb_used_at', None)
+        if (
+            settings_dict.get('YAMDB_CONN_HEALTH_CHECKS')
+            and connection.connection is not None
+            and not connection.in_atomic_block
+            and (used_at is None or now - used_at
+                 >= settings_dict['YAMDB_CONN_HEALTH_CHECK_IDLE'])
+            and not connection.is_usable()
+        ):
+            connection.close()
@@ -0,0 +1,191 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+Ведро на каждый ключ хранит остаток токенов и время последнего
+пополнения: одно чтение и одна запись на запрос, без обращений к БД
+приложения. По умолчанию вёдра лежат в файле SQLite THROTTLE_SQLITE_PATH,
+общем для воркеров на одной машине; если путь пуст — в кеше
+THROTTLE_CACHE_ALIAS (общем, только если общий сам кеш).
+"""
+import math
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60): ёмкость ведра и время его наполнения."""
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Неверный лимит запросов: {rate!r}')
+
+
+class CacheBuckets:
+    """Вёдра в кеше Django.
+
+    Чтение и запись не атомарны, при одновременных запросах одного
+    клиента лимит может быть превышен на число параллельных запросов.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, period, now):
+        """Пополняет ведро и берёт токен, если он есть.
+
+        Возвращает количество токенов до взятия.
+        """
+        cache = caches[self.alias]
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        if tokens >= 1:
+            # Запись живёт, пока ведро не наполнится снова.
+            cache.set(key, (tokens - 1, now), math.ceil(period))
+        return tokens
+
+
+class SQLiteBuckets:
+    """Вёдра в файле SQLite, общем для процессов на одной машине.
+
+    Пополнение и списание выполняются одним UPSERT под блокировкой
+    записи, поэтому параллельные воркеры не теряют списаний.
+    """
+    cleanup_every = 1000
+    schema = (
+        'CREATE TABLE IF NOT EXISTS buckets ('
+        'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+        'updated REAL NOT NULL, expires REAL NOT NULL, '
+        'allowed INTEGER NOT NULL) WITHOUT ROWID'
+    )
+    refilled = (
+        'MIN(:capacity, buckets.tokens + '
+        '(:now - buckets.updated) * :capacity / :period)'
+    )
+    upsert = (
+        'INSERT INTO buckets (key, tokens, updated, expires, allowed) '
+        'VALUES (:key, :capacity - 1, :now, :now + :period, 1) '
+        'ON CONFLICT (key) DO UPDATE SET '
+        f'tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 '
+        f'ELSE {refilled} END, '
+        f'allowed = {refilled} >= 1, '
+        'updated = :now, expires = :now + :period'
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def get_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Вёдра не переживают сбой питания, и это допустимо.
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(self.schema)
+            self.local.connection = connection
+            self.local.takes = 0
+        return connection
+
+    def take(self, key, capacity, period, now):
+        connection = self.get_connection()
+        params = {'key': key, 'capacity': capacity, 'period': period,
+                  'now': now}
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(self.upsert, params)
+            tokens, allowed = connection.execute(
+                'SELECT tokens, allowed FROM buckets WHERE key = ?', (key,)
+            ).fetchone()
+            self.local.takes += 1
+            if self.local.takes % self.cleanup_every == 0:
+                connection.execute(
+                    'DELETE FROM buckets WHERE expires < ?', (now,)
+                )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return tokens + allowed
+
+
+@lru_cache(maxsize=None)
+def _get_buckets(sqlite_path, cache_alias):
+    if sqlite_path:
+        return SQLiteBuckets(sqlite_path)
+    return CacheBuckets(cache_alias)
+
+
+def get_buckets():
+    return _get_buckets(
+        settings.THROTTLE_SQLITE_PATH, settings.THROTTLE_CACHE_ALIAS
+    )
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Лимит из DEFAULT_THROTTLE_RATES по throttle_scope представления.
+
+    По умолчанию ведро заводится на IP-адрес клиента.
+
+    Ведро вмещает столько запросов, сколько разрешено за период,
+    и пополняется равномерно, поэтому короткий всплеск допустим,
+    а средняя частота не превышает лимит.
+    """
+    key_format = 'throttle:{scope}:{ident}'
+    timer = time.time
+
+    def get_ident_key(self, request):
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None or not settings.THROTTLE_ENABLED:
+            return True
+        capacity, period = parse_rate(rate)
+        key = self.key_format.format(
+            scope=scope, ident=self.get_ident_key(request)
+        )
+        tokens = get_buckets().take(key, capacity, period, self.timer())
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) * period / capacity
+            return False
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Ведро на IP-адрес клиента."""
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    """Ведро на пользователя, для анонимов — на IP-адрес."""
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return super().get_ident_key(request)
+
+
+class WriteThrottleMixin:
+    """Ограничивает только изменяющие запросы, чтение не учитывается."""
+
+    def get_throttles(self):
+        if self.request.method in SAFE_METHODS:
+            return []
+        return super().get_throttles()
@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet, GetToken,
-                    ReviewViewSet, SignUp, TitleViewSet, UserProfile,
-                    UserViewSet)
+from .views import (CategoryViewSet, CommentViewSet, ExportView, GenreViewSet,
+                    GetToken, ReviewViewSet, SearchView, SignUp, TitleViewSet,
+                    UserProfile, UserViewSet)
 
 app_name = 'api'
 
@@ -27,5 +27,8 @@ urlpatterns = [
     path('v1/users/me/', UserProfile.as_view(), name='profile'),
     path('v1/auth/signup/', SignUp.as_view(), name='signup'),
     path('v1/auth/token/', GetToken.as_view(), name='gettoken'),
+    path('v1/search/', SearchView.as_view(), name='search'),
+    path('v1/export/<slug:dataset>.<slug:file_format>', ExportView.as_view(),
+         name='export'),
     path('v1/', include(router.urls)),
 ]
@@ -1,31 +1,47 @@
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.db import router
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, views
-from rest_framework.generics import get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
-
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleFacet, User)
+from reviews.outbox import enqueue_email
+
+from . import export
+from .authentication import RoleAccessToken
+from .bulk import BulkCreateMixin, create_titles, update_titles
+from .cache import CachedListMixin, CachedReadMixin
+from .facets import facets_data
+from .fast import FastReadMixin
 from .filters import TitleFilter
 from .mixins import (CreateDestroyListViewSet,
-                     CreateDestroyUpdateDeleteListViewSet)
+                     CreateDestroyUpdateDeleteListViewSet, NestedParentMixin)
+from .pagination import KeysetOptionalPagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializers,
-                          GenreSerializer, GetTokenSerializer,
-                          ProfilePatchSerializer, ReviewSerializers,
+from .replicas import ReplicaReadMixin
+from .search import search
+from .serializers import (CategoryBulkSerializer, CategorySerializer,
+                          CommentSearchSerializer, CommentSerializers,
+                          GenreBulkSerializer, GenreSerializer,
+                          GetTokenSerializer, ProfilePatchSerializer,
+                          ReviewSearchSerializer, ReviewSerializers,
                           SignUpSerializer, TitleCrudSerializer,
                           TitleGetSerializer, UserSerializer)
+from .throttling import IPRateThrottle, UserRateThrottle, WriteThrottleMixin
 
 
-class TitleViewSet(CreateDestroyUpdateDeleteListViewSet):
+class TitleViewSet(CachedReadMixin, FastReadMixin,
+                   CreateDestroyUpdateDeleteListViewSet):
     queryset = (
-        Title.objects.annotate(rating=Avg('reviews__score')).all()
+        Title.objects.select_related('category').prefetch_related('genre')
         .order_by('-rating')
     )
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter, DjangoFilterBackend,)
+    pagination_class = KeysetOptionalPagination
+    filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     http_method_names = ('get', 'post', 'delete', 'patch')
 
@@ -34,19 +50,62 @@ class TitleViewSet(CreateDestroyUpdateDeleteListViewSet):
             return TitleGetSerializer
         return TitleCrudSerializer
 
+    def get_queryset(self):
+        # Изменение жанров сбрасывает предзагрузку, а удаление
+        # её не читает.
+        if self.action in ('partial_update', 'destroy'):
+            return Title.objects.select_related('category')
+        return super().get_queryset()
+
+    def has_filters(self, request):
+        return any(
+            request.query_params.get(name)
+            for name in self.filterset_class.base_filters
+        )
+
+    def get_facets(self, request):
+        # Без фильтров счётчики читаются из хранимой таблицы, с фильтрами
+        # считаются группировкой по отфильтрованным произведениям.
+        if self.has_filters(request):
+            counts = TitleFacet.objects.count_titles(
+                self.filter_queryset(Title.objects.all())
+            )
+        else:
+            counts = TitleFacet.objects.counts()
+        return Response(facets_data(counts))
+
+    @action(detail=False)
+    def facets(self, request):
+        return self.cached_response(self.get_facets, request)
+
+    @action(detail=False, methods=('post',), url_path='bulk')
+    def bulk(self, request):
+        titles = create_titles(request.data)
+        return Response([{'id': title.pk} for title in titles],
+                        status=status.HTTP_201_CREATED)
 
-class CategoryViewSet(CreateDestroyListViewSet):
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        titles = update_titles(request.data)
+        return Response([{'id': title.pk} for title in titles])
+
+
+class CategoryViewSet(CachedListMixin, BulkCreateMixin,
+                      CreateDestroyListViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = CategoryBulkSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateDestroyListViewSet):
+class GenreViewSet(CachedListMixin, BulkCreateMixin,
+                   CreateDestroyListViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
@@ -60,58 +119,139 @@ class UserViewSet(CreateDestroyUpdateDeleteListViewSet):
     lookup_field = ('username')
 
 
-class ReviewViewSet(CreateDestroyUpdateDeleteListViewSet):
-    queryset = Review.objects.all()
+class ReviewViewSet(WriteThrottleMixin, NestedParentMixin, FastReadMixin,
+                    CreateDestroyUpdateDeleteListViewSet):
+    queryset = Review.objects.select_related('author')
     serializer_class = ReviewSerializers
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
-
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
-
-    def get_queryset(self):
-        return self.get_title().reviews.all()
+    throttle_classes = (UserRateThrottle,)
+    throttle_scope = 'reviews'
+    pagination_class = KeysetOptionalPagination
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    parent_filters = {'title_id': 'title_id'}
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author_id=self.request.user.id,
+                        title=self.get_parent())
 
 
-class CommentViewSet(CreateDestroyUpdateDeleteListViewSet):
-    queryset = Comment.objects.all()
+class CommentViewSet(WriteThrottleMixin, NestedParentMixin, FastReadMixin,
+                     CreateDestroyUpdateDeleteListViewSet):
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializers
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    throttle_classes = (UserRateThrottle,)
+    throttle_scope = 'comments'
+    pagination_class = KeysetOptionalPagination
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_filters = {'review_id': 'review_id',
+                      'review__title_id': 'title_id'}
 
-    def get_review(self):
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title_id=self.kwargs.get('title_id')
-        )
+    def perform_create(self, serializer):
+        serializer.save(author_id=self.request.user.id,
+                        review=self.get_parent())
 
-    def get_queryset(self):
-        return self.get_review().comments.all()
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+class SearchView(ReplicaReadMixin, views.APIView):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям."""
+    permission_classes = (permissions.AllowAny,)
+    default_limit = 10
+    max_limit = 50
+    targets = {
+        'titles': (
+            Title.objects.select_related('category')
+            .prefetch_related('genre'),
+            TitleGetSerializer,
+        ),
+        'reviews': (
+            Review.objects.select_related('author'),
+            ReviewSearchSerializer,
+        ),
+        'comments': (
+            Comment.objects.select_related('author', 'review'),
+            CommentSearchSerializer,
+        ),
+    }
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'q': 'Укажите поисковый запрос'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        types = request.query_params.get('type')
+        types = types.split(',') if types else list(self.targets)
+        unknown = [name for name in types if name not in self.targets]
+        if unknown:
+            return Response(
+                {'type': f'Неизвестный тип: {", ".join(unknown)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = self.get_limit()
+        data = {}
+        for name in types:
+            queryset, serializer_class = self.targets[name]
+            data[name] = serializer_class(
+                search(queryset.all(), query, limit), many=True
+            ).data
+        return Response(data)
+
+
+class ExportView(ReplicaReadMixin, views.APIView):
+    """Потоковая выгрузка набора данных каталога целиком."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, dataset, file_format):
+        if (
+            dataset not in export.PUBLIC_DATASETS
+            or file_format not in export.FORMATS
+        ):
+            raise NotFound()
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        # Чтение начнётся после выхода из представления, когда реплика
+        # для запроса уже сброшена, поэтому база выбирается сейчас.
+        using = router.db_for_read(export.DATASETS[dataset].model)
+        response = StreamingHttpResponse(
+            export.stream(dataset, file_format, using, compress),
+            content_type=(
+                'application/gzip' if compress
+                else export.FORMATS[file_format]
+            )
+        )
+        name = export.file_name(dataset, file_format, compress)
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
 
 
 class SignUp(views.APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IPRateThrottle,)
+    throttle_scope = 'signup'
 
     @staticmethod
     def send_email(data):
-        email = EmailMessage(
+        enqueue_email(
             subject=data['email_subject'],
             body=data['email_body'],
-            to=[data['to']]
+            to=data['to']
         )
-        email.send()
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         email_body = (
-            f'проверочный код {user.confirmation_code}'
+            f'проверочный код {user.raw_confirmation_code}'
         )
         data = {
             'email_subject': 'Код подтверждения',
@@ -124,19 +264,21 @@ class SignUp(views.APIView):
 
 class GetToken(views.APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IPRateThrottle,)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
-        if not User.objects.filter(username=data.get('username')).exists():
+        user = User.objects.filter(username=data['username']).first()
+        if user is None:
             return Response(
                 {'username': 'Пользователь не найден'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        user = User.objects.get(username=data['username'])
-        if data.get('confirmation_code') == user.confirmation_code:
-            token = RefreshToken.for_user(user).access_token
+        if user.check_confirmation_code(data['confirmation_code']):
+            token = RoleAccessToken.for_user(user)
             return Response({'token': str(token)},
                             status=status.HTTP_201_CREATED)
         return Response(
@@ -145,7 +287,7 @@ class GetToken(views.APIView):
         )
 
 
-class UserProfile(views.APIView):
+class UserProfile(ReplicaReadMixin, views.APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_obj(self, id):
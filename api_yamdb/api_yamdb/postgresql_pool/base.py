@@ -0,0 +1,105 @@
+"""PostgreSQL с пулом соединений внутри процесса.
+
+Подключается через DB_POOL=True. Размер пула и время ожидания
+свободного соединения задаются в DATABASES[...]['YAMDB_POOL'].
+"""
+import threading
+import time
+import weakref
+
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from psycopg2 import Error, extensions, pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Когда соединение вернулось в пул.
+_idle_since = weakref.WeakKeyDictionary()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Берёт соединения из общего пула процесса вместо открытия новых.
+
+    Закрытие соединения в Django возвращает его в пул, поэтому
+    открытых соединений столько, сколько запросов выполняется
+    одновременно, а не сколько потоков запущено.
+    """
+
+    def get_pool(self, conn_params):
+        with _pools_lock:
+            if self.alias not in _pools:
+                options = self.settings_dict['YAMDB_POOL']
+                _pools[self.alias] = pool.ThreadedConnectionPool(
+                    options['MIN_SIZE'], options['MAX_SIZE'], **conn_params
+                )
+            return _pools[self.alias]
+
+    def _is_alive(self, connection):
+        """Проверяет запросом только соединения, простоявшие в пуле
+        дольше YAMDB_CONN_HEALTH_CHECK_IDLE секунд."""
+        idle_since = _idle_since.pop(connection, None)
+        if connection.closed:
+            return False
+        if (
+            not self.settings_dict['YAMDB_CONN_HEALTH_CHECKS']
+            or idle_since is None
+            or time.monotonic() - idle_since
+            < self.settings_dict['YAMDB_CONN_HEALTH_CHECK_IDLE']
+        ):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Error:
+            return False
+        return True
+
+    def _take(self, connection_pool):
+        timeout = self.settings_dict['YAMDB_POOL']['TIMEOUT']
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection = connection_pool.getconn()
+            except pool.PoolError:
+                if time.monotonic() >= deadline:
+                    raise OperationalError(
+                        'Нет свободных соединений в пуле '
+                        f'{self.alias}'
+                    )
+                time.sleep(0.01)
+                continue
+            if self._is_alive(connection):
+                return connection
+            connection_pool.putconn(connection, close=True)
+
+    def get_new_connection(self, conn_params):
+        connection = self._take(self.get_pool(conn_params))
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection_pool = _pools[self.alias]
+        connection = self.connection
+        with self.wrap_database_errors:
+            status = (
+                None if connection.closed
+                else connection.info.transaction_status
+            )
+            if status in (None, extensions.TRANSACTION_STATUS_UNKNOWN):
+                connection_pool.putconn(connection, close=True)
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            connection.autocommit = False
+            _idle_since[connection] = time.monotonic()
+            connection_pool.putconn(connection)
@@ -1,9 +1,21 @@
-from django.shortcuts import render
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import get_resolver
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition, require_safe
 from rest_framework.schemas.openapi import SchemaGenerator
 
+SchemaPage = namedtuple('SchemaPage', ('content', 'etag'))
 
-def schema(request):
-    """Функция, позволяющия генерировать схему доступных эндпоинтов."""
+
+def build_schema():
+    """Список эндпоинтов для страницы схемы."""
     generator = SchemaGenerator(title='API Yamdb')
     getted_schema = generator.get_schema() or {
         'info': {'title': 'API Yamdb'}, 'paths': {}
@@ -15,5 +27,33 @@ def schema(request):
     for path in getted_schema['paths']:
         for method in getted_schema['paths'][path].keys():
             schema['endpoints'].append({'path': path, 'method': method})
+    return schema
+
+
+@lru_cache(maxsize=1)
+def _build_page(resolver):
+    content = render_to_string(
+        'schema.html', {'schema': build_schema()}
+    ).encode()
+    return SchemaPage(content, quote_etag(hashlib.md5(content).hexdigest()))
 
-    return render(request, 'schema.html', {'schema': schema})
+
+def get_schema_page():
+    """Страница схемы, собранная один раз на процесс.
+
+    Страница привязана к текущему резолверу URL: после
+    clear_url_caches() (смена URLconf, перезагрузка в DEBUG)
+    она собирается заново.
+    """
+    return _build_page(get_resolver())
+
+
+@require_safe
+@condition(etag_func=lambda request: get_schema_page().etag)
+def schema(request):
+    """Функция, позволяющия генерировать схему доступных эндпоинтов."""
+    response = HttpResponse(get_schema_page().content)
+    patch_cache_control(
+        response, public=True, max_age=settings.SCHEMA_CACHE_MAX_AGE
+    )
+    return response
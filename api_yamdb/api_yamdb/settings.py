@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'reviews.User'
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,10 +74,140 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Для pgbouncer в режиме pool_mode = transaction.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', default='False') == 'True',
+        # Ключи проекта, Django их не читает: проверка соединений
+        # перед запросом (api.signals) и пул (api_yamdb.postgresql_pool).
+        'YAMDB_CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        # Проверяются только соединения, простоявшие дольше, секунд.
+        'YAMDB_CONN_HEALTH_CHECK_IDLE': float(os.getenv('DB_CONN_HEALTH_CHECK_IDLE', default=10)),
+        'YAMDB_POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=2)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
+        },
     }
 }
 
+# Сколько соединений с основной БД и с каждой репликой может открыть
+# весь gunicorn. По умолчанию max_connections PostgreSQL (100) минус
+# запас на миграции, команды manage.py и администраторов.
+DB_CONNECTION_BUDGET = int(os.getenv('DB_CONNECTION_BUDGET', default=80))
+
+# Пул соединений внутри процесса: соединение возвращается в пул
+# в конце каждого запроса и общее для всех потоков воркера.
+# Для gevent пул включён по умолчанию: без него каждый из тысяч
+# гринлетов открыл бы своё соединение.
+DB_POOL_DEFAULT = os.getenv('GUNICORN_WORKER_CLASS') == 'gevent' and (
+    DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+)
+if os.getenv('DB_POOL', default=str(DB_POOL_DEFAULT)) == 'True':
+    DATABASES['default']['ENGINE'] = 'api_yamdb.postgresql_pool'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Реплики для чтения: хосты через запятую, для SQLite — пути к файлам.
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1
+):
+    alias = f'replica{number}'
+    replica_key = 'NAME' if 'sqlite3' in DATABASES['default']['ENGINE'] else 'HOST'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        **{replica_key: location.strip()},
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает с основной БД.
+DATABASE_REPLICA_STICKY_SECONDS = float(
+    os.getenv('DB_REPLICA_STICKY_SECONDS', default=5)
+)
+# Сколько секунд не использовать реплику, к которой не удалось подключиться.
+DATABASE_REPLICA_RETRY_SECONDS = float(
+    os.getenv('DB_REPLICA_RETRY_SECONDS', default=30)
+)
+
+# Cache
+
+# Два общих для всех воркеров кеша: default — ответы каталога,
+# state — версия каталога, состояние пользователей JWT и метки чтения
+# с основной БД. Записи state не должны вытесняться ответами, поэтому
+# это отдельное хранилище. В docker-compose оба — memcached (state
+# запущен с -M и не вытесняет записи); без CACHE_LOCATION, при
+# локальном запуске и в тестах, — каталоги на диске, общие для
+# воркеров на одной машине.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND',
+    default='django.core.cache.backends.memcached.MemcachedCache'
+)
+CACHE_LOCATION = os.getenv('CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': CACHE_LOCATION,
+        },
+        'state': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.getenv('CACHE_STATE_LOCATION', default=CACHE_LOCATION),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=100000)),
+            },
+        },
+        'state': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-state'),
+            # Записи живут не дольше JWT_USER_STATE_TIMEOUT и
+            # DB_REPLICA_STICKY_SECONDS, до предела не доходит.
+            'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+        },
+    }
+
+STATE_CACHE_ALIAS = 'state'
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+# Максимум объектов в одном запросе к эндпоинтам массовой записи.
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', default=50000))
+# Страница схемы собирается один раз на процесс и кешируется клиентами.
+SCHEMA_CACHE_MAX_AGE = int(os.getenv(
+    'SCHEMA_CACHE_MAX_AGE', default=0 if DEBUG else 86400
+))
+
+# Запросы дольше порога (в секундах) сохраняются вместе с их SQL.
+METRICS_SLOW_REQUEST_THRESHOLD = float(
+    os.getenv('METRICS_SLOW_REQUEST_THRESHOLD', default=0.5)
+)
+METRICS_SLOW_REQUEST_SAMPLES = int(
+    os.getenv('METRICS_SLOW_REQUEST_SAMPLES', default=50)
+)
+METRICS_SLOW_REQUEST_SQL = 50
+METRICS_EXCLUDE_PATHS = ('/metrics', '/metrics/slow')
+# Каталог, через который воркеры gunicorn складывают метрики; пусто —
+# каждый процесс отдаёт только свои.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'yamdb-metrics')
+)
+METRICS_FLUSH_INTERVAL = float(
+    os.getenv('METRICS_FLUSH_INTERVAL', default=1)
+)
+# Сети, из которых /metrics доступны напрямую; запросы через nginx
+# (с X-Forwarded-For) отклоняются всегда.
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    'METRICS_ALLOWED_NETWORKS',
+    default='127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+).split(',')
+
 
 # Password validation
 
@@ -102,11 +234,32 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Лимиты для throttle_scope представлений (api.throttling).
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP_RATE', default='5/min'),
+        'token': os.getenv('THROTTLE_TOKEN_RATE', default='30/min'),
+        'reviews': os.getenv('THROTTLE_REVIEWS_RATE', default='30/min'),
+        'comments': os.getenv('THROTTLE_COMMENTS_RATE', default='60/min'),
+    },
+    # nginx добавляет адрес клиента в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', default=1)),
 }
+# Вёдра ограничения запросов: файл SQLite, общий для воркеров на одной
+# машине, или, если путь пуст, кеш THROTTLE_CACHE_ALIAS (например, Redis).
+THROTTLE_CACHE_ALIAS = os.getenv('THROTTLE_CACHE_ALIAS', default='default')
+THROTTLE_SQLITE_PATH = os.getenv(
+    'THROTTLE_SQLITE_PATH',
+    default=os.path.join(tempfile.gettempdir(), 'yamdb-throttle.sqlite3')
+)
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', default='True') == 'True'
+# Сколько строк админка считает точно; больше — по оценке PostgreSQL.
+ADMIN_EXACT_COUNT_LIMIT = int(
+    os.getenv('ADMIN_EXACT_COUNT_LIMIT', default=10000)
+)
 
 
 # Internationalization
@@ -164,6 +317,32 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=10),
 }
 
+# Роль и статус пользователя кешируются на JWT_USER_STATE_TIMEOUT секунд:
+# изменения применяются к выданным токенам не позже чем через это время.
+JWT_USER_STATE_CACHE_ALIAS = os.getenv(
+    'JWT_USER_STATE_CACHE_ALIAS', default=STATE_CACHE_ALIAS
+)
+JWT_USER_STATE_TIMEOUT = int(
+    os.getenv('JWT_USER_STATE_TIMEOUT', default=60)
+)
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(
+    os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)
+)
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', default=30))
+EMAIL_OUTBOX_POLL_INTERVAL = float(
+    os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', default=5)
+)
+# На сколько секунд взятая пачка скрыта от других процессов send-emails.
+EMAIL_OUTBOX_CLAIM_TIMEOUT = int(
+    os.getenv('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=300)
+)
+# Сколько секунд хранить отправленные письма (без текста) до удаления.
+EMAIL_OUTBOX_KEEP_SENT = int(
+    os.getenv('EMAIL_OUTBOX_KEEP_SENT', default=86400)
+)
+
 if DEBUG:
     EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
     EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -1,3 +1,4 @@
+from api.metrics import metrics, slow_requests
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
@@ -12,6 +13,8 @@ urlpatterns = [
         name='redoc'
     ),
     path('api/', include('api.urls', namespace='api')),
+    path('metrics', metrics, name='metrics'),
+    path('metrics/slow', slow_requests, name='slow-requests'),
     path('', schema, name='schema'),
 
 ]
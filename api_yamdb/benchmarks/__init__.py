@@ -0,0 +1 @@
+"""Нагрузочное тестирование API: сценарии, запуск и сравнение."""
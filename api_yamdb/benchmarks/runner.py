@@ -0,0 +1,248 @@
+import json
+import math
+import threading
+import time
+
+import requests
+from django.db import connection
+from django.test import Client, override_settings
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class QueryCounter:
+    """Считает SQL-запросы текущего потока через execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class InProcessClient:
+    """Выполняет запросы через Django без сети и считает SQL-запросы."""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def request(self, method, path, data=None, token=None):
+        extra = {}
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        if data is not None:
+            extra['data'] = json.dumps(data)
+            extra['content_type'] = 'application/json'
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = getattr(self.client, method)(path, **extra)
+        return response.status_code, counter.count
+
+    def close(self):
+        connection.close()
+
+
+class HttpClient:
+    """Выполняет запросы к запущенному серверу по HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        response = self.session.request(
+            method, self.base_url + path, json=data, headers=headers
+        )
+        return response.status_code, None
+
+    def close(self):
+        self.session.close()
+
+
+class Scenario:
+    """Один маршрут API с генератором запросов.
+
+    ``build`` получает порядковый номер запроса и возвращает путь,
+    тело запроса и токен, чтобы создающие запросы не конфликтовали.
+    """
+
+    def __init__(self, name, method, build, expected=200):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.expected = expected
+
+
+class ScenarioRun:
+    """Прогон одного сценария в нескольких потоках."""
+
+    def __init__(self, scenario, client_factory, requests_count, warmup=0):
+        self.scenario = scenario
+        self.client_factory = client_factory
+        self.warmup = warmup
+        self.numbers = iter(range(warmup, warmup + requests_count))
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.queries = []
+        self.errors = []
+
+    def call(self, client, number):
+        path, data, token = self.scenario.build(number)
+        started = time.perf_counter()
+        try:
+            status, count = client.request(
+                self.scenario.method, path, data, token
+            )
+        except Exception as error:
+            # Исключение внутри Django или обрыв соединения считаются
+            # ошибкой запроса, а не причиной остановить прогон.
+            status, count = type(error).__name__, None
+        return time.perf_counter() - started, status, count
+
+    def next_number(self):
+        with self.lock:
+            return next(self.numbers, None)
+
+    def record(self, elapsed, status, count):
+        with self.lock:
+            self.latencies.append(elapsed)
+            if count is not None:
+                self.queries.append(count)
+            if status != self.scenario.expected:
+                self.errors.append(status)
+
+    def work(self, client):
+        number = self.next_number()
+        while number is not None:
+            self.record(*self.call(client, number))
+            number = self.next_number()
+
+    def work_in_thread(self):
+        client = self.client_factory()
+        try:
+            self.work(client)
+        finally:
+            client.close()
+
+    def run(self, concurrency):
+        client = self.client_factory()
+        for number in range(self.warmup):
+            self.call(client, number)
+        started = time.perf_counter()
+        if concurrency == 1:
+            self.work(client)
+        else:
+            threads = [
+                threading.Thread(target=self.work_in_thread)
+                for _ in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return self.summary(time.perf_counter() - started)
+
+    def summary(self, elapsed):
+        latencies = self.latencies
+        return {
+            'requests': len(latencies),
+            'errors': len(self.errors),
+            'statuses': sorted(set(map(str, self.errors))),
+            'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+            'p50_ms': _ms(percentile(latencies, 50)),
+            'p95_ms': _ms(percentile(latencies, 95)),
+            'p99_ms': _ms(percentile(latencies, 99)),
+            'queries': (
+                round(sum(self.queries) / len(self.queries), 2)
+                if self.queries else None
+            ),
+        }
+
+
+def run_scenario(scenario, client_factory, requests_count, concurrency,
+                 warmup=0):
+    """Выполняет сценарий и возвращает сводку по задержкам."""
+    return ScenarioRun(
+        scenario, client_factory, requests_count, warmup
+    ).run(concurrency)
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def format_result(name, result):
+    queries = '-' if result['queries'] is None else result['queries']
+    return (
+        f'{name:<20} {result["rps"]!s:>8} rps  '
+        f'p50 {result["p50_ms"]!s:>8} мс  '
+        f'p95 {result["p95_ms"]!s:>8} мс  '
+        f'p99 {result["p99_ms"]!s:>8} мс  '
+        f'запросов {queries!s:>5}  ошибок {result["errors"]}'
+    )
+
+
+def run_suite(scenarios, client_factory, requests_count, concurrency,
+              warmup=0, progress=None):
+    results = {}
+    # Все запросы идут с одного адреса и упёрлись бы в лимиты
+    # запросов; на сервер с --url это не влияет.
+    with override_settings(THROTTLE_ENABLED=False):
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(
+                scenario, client_factory, requests_count, concurrency, warmup
+            )
+            if progress:
+                progress(scenario.name, results[scenario.name])
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Возвращает описания регрессий относительно сохранённого отчёта.
+
+    Регрессия — рост p95 или падение requests/sec больше чем на
+    ``threshold``, а также любой рост числа ошибок или SQL-запросов
+    на запрос.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        if result['errors'] > base['errors']:
+            regressions.append(
+                f'{name}: ошибок {base["errors"]} -> {result["errors"]}'
+            )
+        if (
+            base['p95_ms'] and result['p95_ms']
+            and result['p95_ms'] > base['p95_ms'] * (1 + threshold)
+        ):
+            regressions.append(
+                f'{name}: p95 {base["p95_ms"]} -> {result["p95_ms"]} мс'
+            )
+        if (
+            base['rps'] and result['rps']
+            and result['rps'] < base['rps'] * (1 - threshold)
+        ):
+            regressions.append(
+                f'{name}: rps {base["rps"]} -> {result["rps"]}'
+            )
+        if (
+            base['queries'] is not None and result['queries'] is not None
+            and result['queries'] > base['queries']
+        ):
+            regressions.append(
+                f'{name}: запросов {base["queries"]} -> {result["queries"]}'
+            )
+    return regressions
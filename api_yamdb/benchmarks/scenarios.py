@@ -0,0 +1,200 @@
+import time
+from urllib.parse import quote
+
+from api.authentication import RoleAccessToken
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .runner import Scenario
+
+BASE = '/api/v1'
+SAMPLE_SIZE = 1000
+SEARCH_WORDS = ('город', 'звезда', 'море', 'ночь', 'свет')
+
+
+def _bench_user(username, role):
+    user, _ = User.objects.get_or_create(
+        username=username,
+        defaults={'email': f'{username}@yamdb.fake', 'role': role},
+    )
+    return user
+
+
+class BenchData:
+    """Идентификаторы и токены, на которых строятся запросы сценариев."""
+
+    def __init__(self, requests_count):
+        self.run = str(int(time.time()))
+        self.admin = _bench_user('bench-admin', User.ADMIN)
+        self.user = _bench_user('bench-user', User.USER)
+        self.admin_token = str(RoleAccessToken.for_user(self.admin))
+        self.user_token = str(RoleAccessToken.for_user(self.user))
+        # В базе хранится только HMAC кода, поэтому для сценария
+        # получения токена выпускается новый код.
+        self.user_code = self.user.set_confirmation_code()
+        self.user.save(update_fields=('confirmation_code',))
+        self.titles = list(
+            Title.objects.order_by('pk')
+            .values_list('pk', flat=True)[:SAMPLE_SIZE]
+        )
+        self.reviews = list(
+            Review.objects.filter(title__in=self.titles[:100]).order_by('pk')
+            .values_list('title_id', 'pk')[:SAMPLE_SIZE]
+        )
+        self.comments = list(
+            Comment.objects.filter(review__title__in=self.titles[:100])
+            .order_by('pk')
+            .values_list('review__title_id', 'review_id', 'pk')[:SAMPLE_SIZE]
+        )
+        self.categories = list(
+            Category.objects.order_by('pk').values_list('slug', flat=True)
+        )
+        self.genres = list(
+            Genre.objects.order_by('pk').values_list('slug', flat=True)
+        )
+        if not (self.titles and self.reviews and self.comments
+                and self.categories and self.genres):
+            raise ValueError(
+                'Недостаточно данных, заполните базу командой seed-data'
+            )
+        self.writers = self._create_writers(requests_count)
+
+    def _create_writers(self, requests_count):
+        # Каждый автор пишет не больше одного отзыва на произведение.
+        count = requests_count // len(self.titles) + 1
+        writers = []
+        for number in range(count):
+            writer = User(
+                username=f'bench-{self.run}-writer-{number}',
+                email=f'bench-{self.run}-writer-{number}@yamdb.fake',
+            )
+            writer.set_unusable_password()
+            writers.append(writer)
+        User.objects.bulk_create(writers)
+        return [
+            str(RoleAccessToken.for_user(writer))
+            for writer in User.objects.filter(
+                username__startswith=f'bench-{self.run}-writer-'
+            ).order_by('pk')
+        ]
+
+    def pick(self, items, number):
+        return items[number % len(items)]
+
+    def title_path(self, number):
+        return f'{BASE}/titles/{self.pick(self.titles, number)}/'
+
+    def review_path(self, number):
+        title_id, review_id = self.pick(self.reviews, number)
+        return f'{BASE}/titles/{title_id}/reviews/{review_id}/'
+
+    def comments_path(self, number):
+        title_id, review_id, _ = self.pick(self.comments, number)
+        return f'{BASE}/titles/{title_id}/reviews/{review_id}/comments/'
+
+    def comment_path(self, number):
+        title_id, review_id, comment_id = self.pick(self.comments, number)
+        return (f'{BASE}/titles/{title_id}/reviews/{review_id}/'
+                f'comments/{comment_id}/')
+
+    def new_title(self, number):
+        return f'{BASE}/titles/', {
+            'name': f'Бенчмарк {self.run} {number}',
+            'year': 2000,
+            'category': self.pick(self.categories, number),
+            'genre': [self.pick(self.genres, number)],
+        }, self.admin_token
+
+    def new_review(self, number):
+        title_id = self.pick(self.titles, number)
+        writer = self.writers[number // len(self.titles)]
+        return (f'{BASE}/titles/{title_id}/reviews/',
+                {'text': 'Отзыв', 'score': number % 10 + 1}, writer)
+
+    def new_category(self, number):
+        return f'{BASE}/categories/', {
+            'name': f'Бенчмарк {number}',
+            'slug': f'bench-{self.run}-{number}',
+        }, self.admin_token
+
+    def new_genre(self, number):
+        return f'{BASE}/genres/', {
+            'name': f'Бенчмарк {number}',
+            'slug': f'bench-{self.run}-{number}',
+        }, self.admin_token
+
+    def signup(self, number):
+        username = f'bench-{self.run}-signup-{number}'
+        return f'{BASE}/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake',
+        }, None
+
+    def get_token(self, number):
+        return f'{BASE}/auth/token/', {
+            'username': self.user.username,
+            'confirmation_code': self.user_code,
+        }, None
+
+
+def build_scenarios(data):
+    """Сценарии для всех маршрутов /api/v1/: список, объект, создание."""
+    return [
+        Scenario('titles-list', 'get', lambda number: (
+            f'{BASE}/titles/?limit=10&offset={number % 50 * 10}', None, None
+        )),
+        Scenario('titles-filter', 'get', lambda number: (
+            f'{BASE}/titles/?genre={data.pick(data.genres, number)}'
+            f'&year__gte=1950', None, None
+        )),
+        Scenario('titles-facets', 'get', lambda number: (
+            f'{BASE}/titles/facets/', None, None
+        )),
+        Scenario('titles-retrieve', 'get',
+                 lambda number: (data.title_path(number), None, None)),
+        Scenario('titles-create', 'post', data.new_title, expected=201),
+        Scenario('categories-list', 'get',
+                 lambda number: (f'{BASE}/categories/', None, None)),
+        Scenario('categories-create', 'post', data.new_category,
+                 expected=201),
+        Scenario('genres-list', 'get',
+                 lambda number: (f'{BASE}/genres/', None, None)),
+        Scenario('genres-create', 'post', data.new_genre, expected=201),
+        Scenario('reviews-list', 'get', lambda number: (
+            data.title_path(number) + 'reviews/', None, None
+        )),
+        Scenario('reviews-retrieve', 'get',
+                 lambda number: (data.review_path(number), None, None)),
+        Scenario('reviews-create', 'post', data.new_review, expected=201),
+        Scenario('comments-list', 'get',
+                 lambda number: (data.comments_path(number), None, None)),
+        Scenario('comments-retrieve', 'get',
+                 lambda number: (data.comment_path(number), None, None)),
+        Scenario('comments-create', 'post', lambda number: (
+            data.comments_path(number), {'text': 'Комментарий'},
+            data.user_token
+        ), expected=201),
+        Scenario('search', 'get', lambda number: (
+            f'{BASE}/search/?q={quote(data.pick(SEARCH_WORDS, number))}',
+            None, None
+        )),
+        Scenario('users-list', 'get', lambda number: (
+            f'{BASE}/users/', None, data.admin_token
+        )),
+        Scenario('users-me', 'get', lambda number: (
+            f'{BASE}/users/me/', None, data.user_token
+        )),
+        Scenario('auth-signup', 'post', data.signup),
+        Scenario('auth-token', 'post', data.get_token, expected=201),
+    ]
+
+
+def select_scenarios(scenarios, names):
+    if not names:
+        return scenarios
+    known = {scenario.name for scenario in scenarios}
+    unknown = set(names) - known
+    if unknown:
+        raise ValueError(
+            f'Неизвестные сценарии: {", ".join(sorted(unknown))}. '
+            f'Доступны: {", ".join(sorted(known))}'
+        )
+    return [scenario for scenario in scenarios if scenario.name in names]
@@ -0,0 +1,96 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+from django.conf import settings
+
+
+def _rss(pid):
+    """Резидентная память процесса в байтах (только Linux)."""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+class GunicornServer:
+    """Запускает gunicorn с gunicorn.conf.py в заданном режиме."""
+
+    def __init__(self, worker_class, workers, threads, connections, port,
+                 env=None):
+        self.url = f'http://127.0.0.1:{port}'
+        self.env = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{port}',
+            GUNICORN_WORKER_CLASS=worker_class,
+            GUNICORN_WORKERS=str(workers),
+            GUNICORN_THREADS=str(threads),
+            GUNICORN_WORKER_CONNECTIONS=str(connections),
+            # Все запросы идут с одного адреса и упёрлись бы в лимиты.
+            THROTTLE_ENABLED='False',
+            **(env or {})
+        )
+        self.process = None
+        self.log = None
+
+    def __enter__(self):
+        # Журнал пишется в файл: заполненный канал остановил бы сервер.
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [sys.executable, '-c',
+             'from gunicorn.app.wsgiapp import run; run()',
+             'api_yamdb.wsgi:application', '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=self.log
+        )
+        self.wait_ready()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+    def wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                raise RuntimeError(
+                    'gunicorn завершился: '
+                    + self.log.read().decode()[-2000:]
+                )
+            try:
+                requests.get(self.url + '/api/v1/genres/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError(f'gunicorn не ответил за {timeout} с')
+
+    def memory(self):
+        """Суммарная резидентная память мастера и воркеров."""
+        pids = [self.process.pid] + _children(self.process.pid)
+        sizes = [_rss(pid) for pid in pids]
+        if None in sizes:
+            return None
+        return sum(sizes)
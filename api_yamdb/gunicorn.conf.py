@@ -0,0 +1,108 @@
+"""Настройки gunicorn.
+
+Режим работы выбирается переменной GUNICORN_WORKER_CLASS:
+
+* ``sync`` — один запрос на процесс;
+* ``gthread`` — пул потоков в каждом процессе, медленные клиенты
+  и ожидание БД не блокируют весь воркер;
+* ``gevent`` — кооперативная многозадачность, тысячи соединений
+  на процесс; драйвер PostgreSQL переключается в неблокирующий режим
+  через psycogreen.
+"""
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', default='gthread')
+threads = int(os.getenv('GUNICORN_THREADS', default=8))
+worker_connections = int(
+    os.getenv('GUNICORN_WORKER_CONNECTIONS', default=1000)
+)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', default=0))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+
+
+def get_settings():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from django.conf import settings
+
+    return settings
+
+
+def connections_per_worker():
+    """Сколько соединений с одной БД может держать воркер.
+
+    Каждый поток или гринлет открывает своё соединение и при
+    DB_CONN_MAX_AGE держит его между запросами; пул ограничивает
+    их число своим размером (для gevent он включён по умолчанию).
+    SQLite соединений не считает.
+    """
+    database = get_settings().DATABASES['default']
+    if 'sqlite3' in database['ENGINE']:
+        return 0
+    concurrency = {'sync': 1, 'gthread': threads}.get(
+        worker_class, worker_connections
+    )
+    if database['ENGINE'] == 'api_yamdb.postgresql_pool':
+        return min(concurrency, database['YAMDB_POOL']['MAX_SIZE'])
+    return concurrency
+
+
+def default_workers():
+    """2 * CPU + 1, но не больше, чем позволяет DB_CONNECTION_BUDGET."""
+    workers = multiprocessing.cpu_count() * 2 + 1
+    per_worker = connections_per_worker()
+    if not per_worker:
+        return workers
+    budget = get_settings().DB_CONNECTION_BUDGET
+    return max(1, min(workers, budget // per_worker))
+
+
+workers = int(os.getenv('GUNICORN_WORKERS') or default_workers())
+
+
+def on_starting(server):
+    """Готовит общее состояние воркеров.
+
+    Не запускает сервер, если воркеры могут открыть больше соединений
+    с БД, чем DB_CONNECTION_BUDGET. Удаляет метрики воркеров прошлого
+    запуска и предупреждает, если воркеры не разделяют кеш Django:
+    сброс кеша каталога, состояние пользователей и метки чтения
+    с основной БД должны быть видны всем.
+    """
+    settings = get_settings()
+    connections = workers * connections_per_worker()
+    if connections > settings.DB_CONNECTION_BUDGET:
+        raise RuntimeError(
+            f'{workers} воркеров {worker_class} могут открыть {connections} '
+            'соединений с каждой БД, а DB_CONNECTION_BUDGET = '
+            f'{settings.DB_CONNECTION_BUDGET}. Уменьшите GUNICORN_WORKERS '
+            'и GUNICORN_THREADS или включите DB_POOL.'
+        )
+
+    if settings.METRICS_DIR:
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            os.remove(path)
+
+    local = [
+        alias for alias, config in settings.CACHES.items()
+        if config['BACKEND'].endswith('.LocMemCache')
+    ]
+    if workers > 1 and local:
+        server.log.warning(
+            'Кеши %s хранятся в памяти процесса, а воркеров %d: '
+            'изменения в одном воркере не видны остальным. '
+            'Задайте CACHE_BACKEND с общим хранилищем.',
+            ', '.join(local), workers
+        )
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
@@ -1,13 +1,104 @@
+import json
+
+from api.search import get_search_backend
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import (Category, Comment, Genre, GenreTitle, OutgoingEmail,
+                     Review, Title, User)
+
+
+def estimated_count(queryset):
+    """Оценка количества строк планировщиком PostgreSQL."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор без COUNT(*) по всей таблице.
+
+    Точно считается не больше ADMIN_EXACT_COUNT_LIMIT строк. Если их
+    больше, в PostgreSQL берётся оценка планировщика, в других СУБД —
+    предел; в списке такое количество подписано как неточное, а
+    страницы после него всё равно открываются. Страница выбирается
+    в два шага: ключи строк читаются по индексу сортировки через
+    OFFSET, поэтому дальние страницы медленнее ближних, сами строки —
+    по первичному ключу.
+    """
+
+    @cached_property
+    def exact_count(self):
+        """Количество строк или None, если их больше предела."""
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        count = self.object_list.order_by()[:limit + 1].count()
+        return count if count <= limit else None
+
+    @cached_property
+    def is_estimated(self):
+        return (
+            self.exact_count is None
+            and connections[self.object_list.db].vendor == 'postgresql'
+        )
+
+    @cached_property
+    def count(self):
+        if self.exact_count is not None:
+            return self.exact_count
+        count = settings.ADMIN_EXACT_COUNT_LIMIT + 1
+        if self.is_estimated:
+            return max(estimated_count(self.object_list.order_by()), count)
+        return count
+
+    @property
+    def count_label(self):
+        if self.exact_count is not None:
+            return str(self.exact_count)
+        if self.is_estimated:
+            return f'около {self.count}'
+        return f'больше {settings.ADMIN_EXACT_COUNT_LIMIT}'
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Строк может быть больше, чем в оценке: есть ли они
+            # на странице, проверяет page().
+            if self.exact_count is not None or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        keys = list(self.object_list.values_list('pk', flat=True)[
+            bottom:bottom + self.per_page
+        ])
+        if not keys and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        return self._get_page(
+            list(self.object_list.filter(pk__in=keys)), number, self
+        )
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список больших таблиц: сортировка по первичному ключу,
+    оценка количества строк и без подсчёта всей таблицы.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    list_max_show_all = 500
+    empty_value_display = '-пусто-'
 
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'slug', 'pub_date',)
     list_editable = ('name', 'slug',)
     search_fields = ('name', 'slug',)
-    list_filter = ('name', 'slug', 'pub_date',)
+    list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
 
@@ -15,30 +106,70 @@ class GenreAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'slug', 'pub_date',)
     list_editable = ('name', 'slug',)
     search_fields = ('name', 'slug',)
-    list_filter = ('name', 'slug', 'pub_date',)
+    list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
 
-class GenreTitleAdmin(admin.ModelAdmin):
+class GenreTitleAdmin(LargeTableAdmin):
     list_display = ('pk', 'genre', 'title', 'pub_date',)
-    list_editable = ('genre', 'title',)
-    search_fields = ('genre', 'title',)
-    list_filter = ('genre', 'title', 'pub_date',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('genre', 'title',)
+    search_fields = ('=genre__slug',)
+    list_filter = ('genre',)
+    autocomplete_fields = ('genre',)
+    raw_id_fields = ('title',)
 
 
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(LargeTableAdmin):
     list_display = ('pk', 'name', 'year', 'category', 'pub_date',)
-    list_editable = ('name', 'year', 'category')
-    search_fields = ('name', 'year', 'category', 'genre',)
-    list_filter = ('name', 'year', 'category', 'genre', 'pub_date',)
-    empty_value_display = '-пусто-'
+    list_editable = ('name', 'year',)
+    list_select_related = ('category',)
+    search_fields = ('name',)
+    list_filter = ('category', 'genre',)
+    autocomplete_fields = ('category',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по всей таблице."""
+        if not search_term:
+            return queryset, False
+        ids = get_search_backend(queryset.db).search(
+            Title, search_term, self.list_max_show_all
+        )
+        return queryset.filter(pk__in=ids), False
+
+
+class UserAdmin(LargeTableAdmin):
+    list_display = ('pk', 'username', 'email', 'role', 'is_active',)
+    search_fields = ('=username', '=email',)
+    readonly_fields = ('confirmation_code', 'last_login', 'date_joined',)
+
+
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ('pk', 'title', 'author', 'score', 'pub_date',)
+    list_select_related = ('title', 'author',)
+    search_fields = ('=author__username',)
+    raw_id_fields = ('title', 'author',)
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'review', 'author', 'pub_date',)
+    list_select_related = ('review', 'author',)
+    search_fields = ('=author__username',)
+    raw_id_fields = ('review', 'author',)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'to', 'subject', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at',)
+    search_fields = ('to',)
+    list_filter = ('status',)
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at',)
 
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(GenreTitle, GenreTitleAdmin)
 admin.site.register(Title, TitleAdmin)
-admin.site.register(User)
-admin.site.register(Comment)
-admin.site.register(Review)
+admin.site.register(User, UserAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Review, ReviewAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from .signals import restore_search_triggers
+
+        post_migrate.connect(restore_search_triggers, sender=self)
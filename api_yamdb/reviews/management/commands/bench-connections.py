@@ -0,0 +1,87 @@
+import json
+import time
+
+from api.cache import invalidate_catalog
+from benchmarks.runner import InProcessClient, format_result, run_suite
+from benchmarks.scenarios import BenchData, build_scenarios, select_scenarios
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+READ_SCENARIOS = (
+    'titles-retrieve', 'categories-list', 'reviews-retrieve', 'users-me',
+)
+# Режим -> CONN_MAX_AGE: новое соединение на каждый запрос
+# или одно постоянное.
+MODES = {'per-request': 0, 'persistent': None}
+
+
+class Command(BaseCommand):
+    help = ('Измеряет стоимость открытия соединения с БД и её долю '
+            'во времени ответа без постоянных соединений и с ними.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connects', type=int, default=50,
+            help='Количество открытий соединения для замера.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Количество измеряемых запросов в каждом сценарии.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Сценарий из команды bench (можно повторять).'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+
+    def _measure_connect(self, count):
+        timings = []
+        for _ in range(count):
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            timings.append(time.perf_counter() - started)
+        return round(sum(timings) / len(timings) * 1000, 3)
+
+    def handle(self, *args, **options):
+        try:
+            data = BenchData(options['requests'])
+            scenarios = select_scenarios(
+                build_scenarios(data), options['scenarios'] or READ_SCENARIOS
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        report = {
+            'engine': connection.settings_dict['ENGINE'],
+            'connect_ms': self._measure_connect(options['connects']),
+            'modes': {},
+        }
+        self.stdout.write(
+            f'{report["engine"]}: открытие соединения '
+            f'{report["connect_ms"]} мс'
+        )
+        settings_dict = connection.settings_dict
+        conn_max_age = settings_dict['CONN_MAX_AGE']
+        try:
+            for mode, max_age in MODES.items():
+                settings_dict['CONN_MAX_AGE'] = max_age
+                connection.close()
+                invalidate_catalog()
+                self.stdout.write(self.style.MIGRATE_HEADING(mode))
+                report['modes'][mode] = run_suite(
+                    scenarios, InProcessClient, options['requests'],
+                    concurrency=1, warmup=1,
+                    progress=lambda name, result: self.stdout.write(
+                        format_result(name, result)
+                    )
+                )
+        finally:
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+            connection.close()
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,110 @@
+import json
+import time
+
+from api.fast import get_fast_serializer
+from api.serializers import (CommentSerializers, ReviewSerializers,
+                             TitleGetSerializer)
+from django.core.management import BaseCommand, CommandError
+from reviews.models import Comment, Review, Title
+
+TARGETS = {
+    'titles': (
+        Title.objects.select_related('category').prefetch_related('genre'),
+        TitleGetSerializer,
+    ),
+    'reviews': (Review.objects.select_related('author'), ReviewSerializers),
+    'comments': (Comment.objects.select_related('author'),
+                 CommentSerializers),
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость обычных сериализаторов списков '
+            'и быстрого чтения через values() в строках в секунду.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Количество строк в одной выборке.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество повторов, берётся лучший результат.'
+        )
+        parser.add_argument(
+            '--target', action='append', dest='targets',
+            choices=list(TARGETS),
+            help='Набор данных (можно повторять), по умолчанию все.'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+
+    @staticmethod
+    def _best(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _measure(self, queryset, serializer_class, rows, repeat):
+        queryset = queryset.order_by('pk')[:rows]
+        fast = get_fast_serializer(serializer_class)
+        instances = list(queryset.all())
+        values = list(fast.values(queryset))
+        fast.prepare(values)
+        count = len(instances)
+        if not count:
+            raise CommandError('Нет данных, заполните базу: seed-data.')
+        timings = {
+            # Только сериализация уже загруженных строк.
+            'serializer': self._best(
+                lambda: serializer_class(instances, many=True).data, repeat
+            ),
+            'fast': self._best(
+                lambda: [fast.to_representation(row) for row in values],
+                repeat
+            ),
+            # Выборка из БД вместе с сериализацией.
+            'serializer_with_db': self._best(
+                lambda: serializer_class(list(queryset.all()), many=True).data,
+                repeat
+            ),
+            'fast_with_db': self._best(
+                lambda: fast.serialize(fast.values(queryset)), repeat
+            ),
+        }
+        return {
+            'rows': count,
+            **{name: round(count / seconds)
+               for name, seconds in timings.items()},
+        }
+
+    def handle(self, *args, **options):
+        report = {}
+        for name in options['targets'] or TARGETS:
+            queryset, serializer_class = TARGETS[name]
+            result = self._measure(
+                queryset, serializer_class, options['rows'],
+                max(options['repeat'], 1)
+            )
+            report[name] = result
+            speedup = result['fast'] / result['serializer']
+            speedup_with_db = (
+                result['fast_with_db'] / result['serializer_with_db']
+            )
+            self.stdout.write(
+                f'{name}: {result["rows"]} строк, строк/с: '
+                f'сериализатор {result["serializer"]}, '
+                f'быстрый {result["fast"]} '
+                f'(x{speedup:.1f}); '
+                f'с запросами к БД {result["serializer_with_db"]} и '
+                f'{result["fast_with_db"]} '
+                f'(x{speedup_with_db:.1f})'
+            )
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,152 @@
+import importlib
+import json
+
+from benchmarks.runner import HttpClient, format_result, run_suite
+from benchmarks.scenarios import BenchData, build_scenarios, select_scenarios
+from benchmarks.servers import GunicornServer
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+READ_SCENARIOS = (
+    'titles-list', 'titles-retrieve', 'categories-list',
+    'reviews-list', 'comments-list', 'auth-token',
+)
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает режимы воркеров gunicorn при одинаковом '
+            'количестве процессов: пропускная способность, задержки '
+            'и занятая память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--worker-class', action='append', dest='worker_classes',
+            choices=WORKER_CLASSES,
+            help='Режим воркеров (можно повторять), по умолчанию все.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов — общий бюджет памяти.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоков на процесс для gthread.'
+        )
+        parser.add_argument(
+            '--connections', type=int, default=1000,
+            help='Соединений на процесс для gevent.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Количество одновременных клиентов.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=300,
+            help='Количество измеряемых запросов в каждом сценарии.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Количество неизмеряемых запросов перед сценарием.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Сценарий из команды bench (можно повторять), '
+                 'по умолчанию только читающие.'
+        )
+        parser.add_argument(
+            '--port', type=int, default=8765,
+            help='Порт, на котором запускается gunicorn.'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+
+    def _available(self, worker_class):
+        if worker_class != 'gevent':
+            return True
+        try:
+            importlib.import_module('gevent')
+            importlib.import_module('psycogreen')
+        except ImportError:
+            return False
+        return True
+
+    def _run_mode(self, worker_class, scenarios, options):
+        server = GunicornServer(
+            worker_class, options['workers'], options['threads'],
+            options['connections'], options['port']
+        )
+        with server:
+            results = run_suite(
+                scenarios, lambda: HttpClient(server.url),
+                options['requests'], options['concurrency'],
+                options['warmup'],
+                lambda name, result: self.stdout.write(
+                    format_result(name, result)
+                )
+            )
+            memory = server.memory()
+        requests_count = sum(result['requests'] for result in results.values())
+        seconds = sum(
+            result['requests'] / result['rps']
+            for result in results.values() if result['rps']
+        )
+        rps = round(requests_count / seconds, 1) if seconds else None
+        memory_mb = round(memory / 2 ** 20, 1) if memory else None
+        return {
+            'rps': rps,
+            'memory_mb': memory_mb,
+            'rps_per_100mb': (
+                round(rps / memory_mb * 100, 1)
+                if rps and memory_mb else None
+            ),
+            'scenarios': results,
+        }
+
+    def handle(self, *args, **options):
+        worker_classes = options['worker_classes'] or WORKER_CLASSES
+        total = options['warmup'] + options['requests']
+        try:
+            data = BenchData(total)
+            scenarios = select_scenarios(
+                build_scenarios(data), options['scenarios'] or READ_SCENARIOS
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        connection.close()
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'workers': options['workers'],
+                'threads': options['threads'],
+                'connections': options['connections'],
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+            },
+            'modes': {},
+        }
+        for worker_class in worker_classes:
+            if not self._available(worker_class):
+                self.stderr.write(
+                    f'{worker_class}: не установлены gevent и psycogreen'
+                )
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(worker_class))
+            report['modes'][worker_class] = self._run_mode(
+                worker_class, scenarios, options
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Итого'))
+        for worker_class, mode in report['modes'].items():
+            self.stdout.write(
+                f'{worker_class:<8} {mode["rps"]!s:>8} rps  '
+                f'память {mode["memory_mb"]!s:>7} МБ  '
+                f'{mode["rps_per_100mb"]!s:>8} rps на 100 МБ'
+            )
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
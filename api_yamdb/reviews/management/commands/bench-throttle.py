@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import time
+
+from api.throttling import IPRateThrottle, get_buckets
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.test import RequestFactory, override_settings
+from rest_framework.request import Request
+
+BENCH_ALIAS = 'bench-throttle'
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+class BenchView:
+    throttle_scope = 'bench'
+
+
+class Command(BaseCommand):
+    help = ('Измеряет накладные расходы ограничения частоты запросов: '
+            'время одной проверки token bucket в микросекундах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks', type=int, default=20000,
+            help='Количество проверок для каждого хранилища.'
+        )
+        parser.add_argument(
+            '--clients', type=int, default=1000,
+            help='Количество разных IP-адресов, по которым идут проверки.'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+
+    @staticmethod
+    def _measure(checks, clients):
+        factory = RequestFactory()
+        requests = [
+            Request(factory.post(
+                '/', REMOTE_ADDR=f'10.0.{number // 256}.{number % 256}'
+            ))
+            for number in range(clients)
+        ]
+        throttle = IPRateThrottle()
+        view = BenchView()
+        started = time.perf_counter()
+        for number in range(checks):
+            if not throttle.allow_request(requests[number % clients], view):
+                raise RuntimeError('Лимит не должен срабатывать.')
+        return round((time.perf_counter() - started) / checks * 10 ** 6, 2)
+
+    def handle(self, *args, **options):
+        rest_framework = dict(
+            settings.REST_FRAMEWORK,
+            DEFAULT_THROTTLE_RATES={'bench': f'{10 ** 9}/s'},
+        )
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            stores = {
+                'locmem': {'THROTTLE_SQLITE_PATH': '', 'CACHES': dict(
+                    settings.CACHES, **{BENCH_ALIAS: {
+                        'BACKEND': LOCMEM, 'LOCATION': BENCH_ALIAS,
+                    }}
+                ), 'THROTTLE_CACHE_ALIAS': BENCH_ALIAS},
+                'sqlite': {'THROTTLE_SQLITE_PATH': os.path.join(
+                    directory, 'throttle.sqlite3'
+                )},
+                'configured': {},
+            }
+            for name, overrides in stores.items():
+                with override_settings(
+                    THROTTLE_ENABLED=True, REST_FRAMEWORK=rest_framework,
+                    **overrides
+                ):
+                    report[name] = self._measure(
+                        options['checks'], max(options['clients'], 1)
+                    )
+                    self.stdout.write(
+                        f'{name:<12} {report[name]} мкс на проверку '
+                        f'({type(get_buckets()).__name__})'
+                    )
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
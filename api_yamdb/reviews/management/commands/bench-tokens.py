@@ -0,0 +1,66 @@
+import json
+import time
+
+from api.authentication import RoleAccessToken
+from benchmarks.runner import InProcessClient, format_result, run_suite
+from benchmarks.scenarios import BenchData, build_scenarios, select_scenarios
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Измеряет выдачу токенов в секунду: через /auth/token/ '
+            'и только проверку кода с подписью токена.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Количество выдаваемых токенов.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Количество параллельных потоков для запросов.'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+
+    @staticmethod
+    def _measure_signing(data, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            if not data.user.check_confirmation_code(data.user_code):
+                raise CommandError('Код подтверждения не совпал.')
+            str(RoleAccessToken.for_user(data.user))
+        return round(count / (time.perf_counter() - started))
+
+    def handle(self, *args, **options):
+        try:
+            data = BenchData(options['requests'])
+            scenarios = select_scenarios(
+                build_scenarios(data), ['auth-token']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        endpoint = run_suite(
+            scenarios, InProcessClient, options['requests'],
+            concurrency=options['concurrency'], warmup=1,
+            progress=lambda name, result: self.stdout.write(
+                format_result(name, result)
+            )
+        )['auth-token']
+        report = {
+            'endpoint_tokens_per_second': endpoint['rps'],
+            'queries_per_token': endpoint['queries'],
+            'signing_tokens_per_second': self._measure_signing(
+                data, options['requests']
+            ),
+        }
+        self.stdout.write(
+            f'Токенов в секунду: через API '
+            f'{report["endpoint_tokens_per_second"]}, проверка кода и подпись '
+            f'{report["signing_tokens_per_second"]}'
+        )
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,111 @@
+import json
+import os
+import platform
+
+from benchmarks.runner import (HttpClient, InProcessClient, compare,
+                               format_result, run_suite)
+from benchmarks.scenarios import BenchData, build_scenarios, select_scenarios
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+from reviews.models import Comment, Review, Title, User
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест маршрутов /api/v1/: задержки p50/p95/p99, '
+            'запросы в секунду и SQL-запросы на запрос.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Количество измеряемых запросов в каждом сценарии.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Количество одновременных клиентов.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Количество неизмеряемых запросов перед сценарием.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Запустить только указанный сценарий (можно повторять).'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера. По умолчанию запросы '
+                 'выполняются в этом процессе, без сети.'
+        )
+        parser.add_argument(
+            '--save',
+            help='Сохранить отчёт в JSON-файл.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Сравнить с сохранённым отчётом и завершиться с ошибкой '
+                 'при регрессии.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимое ухудшение p95 и requests/sec при сравнении.'
+        )
+
+    def _progress(self, name, result):
+        self.stdout.write(format_result(name, result))
+
+    def _meta(self, options):
+        return {
+            'created_at': timezone.now().isoformat(),
+            'target': options['url'] or 'in-process',
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'warmup': options['warmup'],
+            'dataset': {
+                model._meta.model_name: model.objects.count()
+                for model in (User, Title, Review, Comment)
+            },
+        }
+
+    def handle(self, *args, **options):
+        total = options['warmup'] + options['requests']
+        try:
+            data = BenchData(total)
+            scenarios = select_scenarios(
+                build_scenarios(data), options['scenarios']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['url']:
+            def client_factory():
+                return HttpClient(options['url'])
+        else:
+            client_factory = InProcessClient
+        report = {'meta': self._meta(options)}
+        report['scenarios'] = run_suite(
+            scenarios, client_factory, options['requests'],
+            options['concurrency'], options['warmup'], self._progress
+        )
+        connections.close_all()
+
+        if options['save']:
+            directory = os.path.dirname(options['save'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчёт сохранён в {options["save"]}')
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            regressions = compare(
+                report['scenarios'], baseline, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно '
+                    f'{options["compare"]}:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
@@ -0,0 +1,53 @@
+import os
+import time
+
+from api import export
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает каталог в NDJSON или CSV. CSV-выгрузку '
+            'можно загрузить обратно командой load-csv.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='export/',
+            help='Каталог для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format', choices=tuple(export.FORMATS), default=export.CSV,
+            dest='file_format',
+            help='Формат файлов.'
+        )
+        parser.add_argument(
+            '--dataset', action='append', dest='datasets',
+            choices=tuple(export.DATASETS),
+            help='Набор данных (можно повторять), по умолчанию все.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз.'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['path'], exist_ok=True)
+        for name in options['datasets'] or export.DATASETS:
+            path = os.path.join(options['path'], export.file_name(
+                name, options['file_format'], options['gzip']
+            ))
+            started = time.monotonic()
+            with open(path, 'wb') as file:
+                for part in export.stream(
+                    name, options['file_format'],
+                    compress=options['gzip'],
+                    chunk_size=options['chunk_size']
+                ):
+                    file.write(part)
+            self.stdout.write(
+                f'Выгружен набор {name} в {path} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
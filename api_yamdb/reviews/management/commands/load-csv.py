@@ -1,7 +1,15 @@
 import csv
+import io
 import os
+import time
+from contextlib import contextmanager
 
-from django.core.management import BaseCommand
+from api.cache import invalidate_catalog
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management import BaseCommand, CommandError, call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
@@ -16,16 +24,219 @@ CSV = {
 }
 
 
+def _copy_value(value):
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _auto_date_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+@contextmanager
+def _keep_csv_dates(model):
+    """Отключает auto_now/auto_now_add на время загрузки модели.
+
+    Возвращает поля, у которых они были включены.
+
+    bulk_create() и pre_save() в COPY иначе заменили бы даты из CSV
+    текущим временем, а bulk_update() в --upsert — нет.
+    """
+    fields = _auto_date_fields(model)
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
 class Command(BaseCommand):
-    def _fill_db(self, model, file):
-        path = os.path.join('static/data/', file)
-        with open(path, 'r', encoding='utf-8') as csv_file:
-            file_reader = csv.DictReader(csv_file, delimiter=',')
-            for data in file_reader:
-                print(f'Заполнены {data} из {file}')
-                model.objects.get_or_create(**data)
-            print(f'Заполнены модели {model.__name__} из {file}')
-
-    def handle(self, *args, **kwargs):
+    help = 'Потоково загружает данные из CSV-файлов в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='static/data/',
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк, сохраняемых в одной транзакции.'
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--truncate', action='store_true',
+            help=('Очистить таблицы перед загрузкой, в том числе '
+                  'всех пользователей вместе с администраторами.')
+        )
+        mode.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять уже существующие записи вместо пропуска.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже для PostgreSQL.'
+        )
+
+    def _truncate(self):
+        tables = [model._meta.db_table for model in CSV]
+        statements = connection.ops.sql_flush(
+            no_style(), tables, (), allow_cascade=True
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def _get_columns(self, model, header):
+        fields = []
+        for name in header:
+            try:
+                fields.append(model._meta.get_field(name))
+            except FieldDoesNotExist:
+                raise CommandError(
+                    f'В модели {model.__name__} нет поля {name}'
+                )
+        return fields
+
+    def _get_related_keys(self, fields):
+        return {
+            field.attname: set(
+                field.related_model._base_manager
+                .values_list(field.target_field.attname, flat=True)
+            )
+            for field in fields if field.is_relation
+        }
+
+    def _build(self, model, fields, row, defaults):
+        data = dict(defaults)
+        for field, value in zip(fields, row):
+            if value == '' and (field.null or field.is_relation):
+                value = None
+            data[field.attname] = field.to_python(value)
+        instance = model(**data)
+        if model is User and not instance.confirmation_code:
+            instance.set_confirmation_code()
+        return instance
+
+    def _save_copy(self, model, batch):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key and getattr(batch[0], field.attname)
+                    is None)
+        ]
+        buffer = io.StringIO()
+        for obj in batch:
+            buffer.write(','.join(
+                _copy_value(field.get_db_prep_save(
+                    field.pre_save(obj, True), connection
+                ))
+                for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+    def _save_upsert(self, model, fields, batch):
+        existing = set(
+            model._base_manager.filter(pk__in=[obj.pk for obj in batch])
+            .values_list('pk', flat=True)
+        )
+        update_fields = [field.name for field in fields
+                         if not field.primary_key]
+        to_update = [obj for obj in batch if obj.pk in existing]
+        if to_update and update_fields:
+            model._base_manager.bulk_update(to_update, update_fields)
+        model._base_manager.bulk_create(
+            [obj for obj in batch if obj.pk not in existing]
+        )
+
+    def _save(self, model, fields, batch, use_copy, upsert):
+        with transaction.atomic():
+            if use_copy:
+                self._save_copy(model, batch)
+            elif upsert:
+                self._save_upsert(model, fields, batch)
+            else:
+                model._base_manager.bulk_create(batch, ignore_conflicts=True)
+
+    def _fill_db(self, model, file, date_fields, options):
+        path = os.path.join(options['path'], file)
+        batch_size = options['batch_size']
+        use_copy = (
+            connection.vendor == 'postgresql'
+            and not options['no_copy']
+            and not options['upsert']
+            and not model._base_manager.exists()
+        )
+        started = time.monotonic()
+        loaded = skipped = 0
+        with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+            file_reader = csv.reader(csv_file, delimiter=',')
+            fields = self._get_columns(model, next(file_reader))
+            related_keys = self._get_related_keys(fields)
+            # Даты, которых нет в CSV, — время загрузки.
+            now = timezone.now()
+            defaults = {
+                field.attname: now for field in date_fields
+                if field not in fields
+            }
+            batch = []
+            for row in file_reader:
+                instance = self._build(model, fields, row, defaults)
+                if any(
+                    getattr(instance, attname) not in keys
+                    and getattr(instance, attname) is not None
+                    for attname, keys in related_keys.items()
+                ):
+                    skipped += 1
+                    continue
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    self._save(model, fields, batch, use_copy,
+                               options['upsert'])
+                    loaded += len(batch)
+                    batch = []
+            if batch:
+                self._save(model, fields, batch, use_copy, options['upsert'])
+                loaded += len(batch)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'Заполнена модель {model.__name__} из {file}: {loaded} строк '
+            f'за {elapsed:.2f} с ({loaded / elapsed:.0f} строк/с)'
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено строк без связанных записей: {skipped}'
+            ))
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        if options['truncate']:
+            self._truncate()
         for model, file in CSV.items():
-            self._fill_db(model, file)
+            with _keep_csv_dates(model) as date_fields:
+                self._fill_db(model, file, date_fields, options)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(CSV)
+            ):
+                cursor.execute(sql)
+        call_command('recount-ratings', stdout=self.stdout, verbosity=0)
+        call_command('recount-facets', stdout=self.stdout, verbosity=0)
+        invalidate_catalog()
@@ -0,0 +1,40 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.models import Title, TitleFacet
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает хранимые фасеты каталога '
+            'и сообщает о расхождениях.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        stored = TitleFacet.objects.counts()
+        expected = TitleFacet.objects.count_titles(Title.objects.all())
+        drifted = sorted(
+            key for key in stored.keys() | expected.keys()
+            if stored[key] != expected[key]
+        )
+        if options['verbosity'] > 0:
+            for kind, value in drifted:
+                self.stdout.write(
+                    f'Расхождение у фасета {kind} {value}: '
+                    f'{stored[kind, value]} -> {expected[kind, value]}'
+                )
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                TitleFacet.objects.all().delete()
+                TitleFacet.objects.bulk_create(
+                    TitleFacet(kind=kind, value=value, count=count)
+                    for (kind, value), count in expected.items()
+                )
+        action = 'найдено' if options['dry_run'] else 'исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено фасетов: {len(expected)}, '
+            f'{action} расхождений: {len(drifted)}'
+        ))
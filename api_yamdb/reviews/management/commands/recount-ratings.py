@@ -0,0 +1,74 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает хранимые рейтинги произведений '
+            'и сообщает о расхождениях.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество произведений, обрабатываемых за один проход.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их.'
+        )
+
+    def _recount_batch(self, titles, dry_run, verbose):
+        totals = {
+            row['title_id']: row
+            for row in Review.objects.filter(title__in=titles).order_by()
+            .values('title_id')
+            .annotate(score_sum=Sum('score'), review_count=Count('pk'))
+        }
+        drifted = []
+        for title in titles:
+            row = totals.get(title.pk, {})
+            score_sum = row.get('score_sum') or 0
+            review_count = row.get('review_count') or 0
+            rating = score_sum / review_count if review_count else None
+            if (
+                title.score_sum != score_sum
+                or title.review_count != review_count
+                or title.rating != rating
+            ):
+                if verbose:
+                    self.stdout.write(
+                        f'Расхождение у произведения {title.pk}: '
+                        f'сумма {title.score_sum} -> {score_sum}, '
+                        f'отзывов {title.review_count} -> {review_count}'
+                    )
+                title.score_sum = score_sum
+                title.review_count = review_count
+                title.rating = rating
+                drifted.append(title)
+        if drifted and not dry_run:
+            with transaction.atomic():
+                Title.objects.bulk_update(drifted, Title.RATING_FIELDS)
+        return len(drifted)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Title.objects.only(
+            'pk', *Title.RATING_FIELDS
+        ).order_by('pk')
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            titles = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not titles:
+                break
+            drifted += self._recount_batch(
+                titles, options['dry_run'], options['verbosity'] > 0
+            )
+            checked += len(titles)
+            last_pk = titles[-1].pk
+        action = 'найдено' if options['dry_run'] else 'исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено произведений: {checked}, '
+            f'{action} расхождений: {drifted}'
+        ))
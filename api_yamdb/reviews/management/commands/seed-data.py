@@ -0,0 +1,214 @@
+import random
+import time
+
+from api.cache import invalidate_catalog
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+WORDS = (
+    'время', 'город', 'дорога', 'жизнь', 'звезда', 'история', 'книга',
+    'любовь', 'море', 'ночь', 'память', 'песня', 'путь', 'река', 'свет',
+    'сердце', 'сон', 'тайна', 'ветер', 'война', 'дом', 'зима', 'лето',
+    'мир', 'небо', 'огонь', 'остров', 'правда', 'сад', 'тишина',
+)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными заданного объёма '
+            'для нагрузочного тестирования.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reviews', type=int, default=10000,
+            help='Количество отзывов.'
+        )
+        parser.add_argument(
+            '--titles', type=int,
+            help='Количество произведений (по умолчанию отзывы / 20).'
+        )
+        parser.add_argument(
+            '--users', type=int,
+            help='Количество пользователей (по умолчанию сколько нужно, '
+                 'чтобы у каждого было не больше одного отзыва '
+                 'на произведение).'
+        )
+        parser.add_argument(
+            '--comments-per-review', type=float, default=0.5,
+            help='Среднее количество комментариев к отзыву.'
+        )
+        parser.add_argument(
+            '--categories', type=int, default=10,
+            help='Количество категорий.'
+        )
+        parser.add_argument(
+            '--genres', type=int, default=20,
+            help='Количество жанров.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк, сохраняемых в одной транзакции.'
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён и слагов, чтобы данные можно было '
+                 'добавить повторно.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+
+    def _text(self, words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words))
+
+    def _last_pk(self, model):
+        return (
+            model.objects.order_by('-pk').values_list('pk', flat=True).first()
+            or 0
+        )
+
+    def _create(self, model, objects):
+        """Сохраняет объекты пачками и возвращает их количество."""
+        count = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                self._save(model, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._save(model, batch)
+            count += len(batch)
+        return count
+
+    def _create_ids(self, model, objects):
+        """Сохраняет объекты и возвращает их идентификаторы.
+
+        bulk_create не возвращает первичные ключи во всех СУБД,
+        поэтому они читаются после вставки.
+        """
+        last_pk = self._last_pk(model)
+        self._create(model, objects)
+        return list(
+            model.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def _save(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+
+    def _users(self, count):
+        for number in range(count):
+            user = User(
+                username=f'{self.prefix}-user-{number}',
+                email=f'{self.prefix}-user-{number}@yamdb.fake',
+                bio=self._text(8),
+            )
+            user.set_unusable_password()
+            yield user
+
+    def _titles(self, count, categories):
+        for number in range(count):
+            yield Title(
+                name=f'{self._text(3).capitalize()} {number}',
+                year=self.random.randint(1900, 2022),
+                description=self._text(20),
+                category_id=self.random.choice(categories),
+            )
+
+    def _genre_titles(self, titles, genres):
+        for title_id in titles:
+            for genre_id in self.random.sample(
+                genres, self.random.randint(1, min(3, len(genres)))
+            ):
+                yield GenreTitle(title_id=title_id, genre_id=genre_id)
+
+    def _reviews(self, count, titles, users):
+        # Отзыв с номером n пишет пользователь n // len(titles)
+        # на произведение n % len(titles): пары автор-произведение
+        # не повторяются.
+        for number in range(count):
+            yield Review(
+                title_id=titles[number % len(titles)],
+                author_id=users[number // len(titles)],
+                text=self._text(30),
+                score=self.random.randint(1, 10),
+            )
+
+    def _comments(self, reviews, users):
+        whole = int(self.comments_per_review)
+        fraction = self.comments_per_review - whole
+        for review_id in reviews:
+            count = whole + (self.random.random() < fraction)
+            for _ in range(count):
+                yield Comment(
+                    review_id=review_id,
+                    author_id=self.random.choice(users),
+                    text=self._text(12),
+                )
+
+    def _review_batches(self, first_pk):
+        queryset = Review.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = first_pk
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:self.batch_size])
+            if not batch:
+                break
+            yield from batch
+            last_pk = batch[-1]
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.comments_per_review = options['comments_per_review']
+        reviews = options['reviews']
+        titles = options['titles'] or max(reviews // 20, 10)
+        users = options['users'] or max(-(-reviews // titles), 10)
+        if users * titles < reviews:
+            raise CommandError(
+                f'{users} пользователей не могут написать {reviews} '
+                f'отзывов на {titles} произведений'
+            )
+        if User.objects.filter(username__startswith=f'{self.prefix}-'
+                               ).exists():
+            raise CommandError(
+                f'Данные с префиксом {self.prefix} уже есть, '
+                f'укажите другой --prefix'
+            )
+
+        started = time.monotonic()
+        category_ids = self._create_ids(Category, (
+            Category(name=f'Категория {number}',
+                     slug=f'{self.prefix}-category-{number}')
+            for number in range(options['categories'])
+        ))
+        genre_ids = self._create_ids(Genre, (
+            Genre(name=f'Жанр {number}',
+                  slug=f'{self.prefix}-genre-{number}')
+            for number in range(options['genres'])
+        ))
+        user_ids = self._create_ids(User, self._users(users))
+        title_ids = self._create_ids(
+            Title, self._titles(titles, category_ids)
+        )
+        self._create(GenreTitle, self._genre_titles(title_ids, genre_ids))
+        first_review_pk = self._last_pk(Review)
+        self._create(Review, self._reviews(reviews, title_ids, user_ids))
+        comments = self._create(Comment, self._comments(
+            self._review_batches(first_review_pk), user_ids
+        ))
+
+        call_command('recount-ratings', stdout=self.stdout, verbosity=0)
+        call_command('recount-facets', stdout=self.stdout, verbosity=0)
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, '
+            f'произведений {len(title_ids)}, отзывов {reviews}, '
+            f'комментариев {comments} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management import BaseCommand
+from reviews.models import OutgoingEmail
+from reviews.outbox import deliver_batch, purge_sent, queue_depth
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди, работая как фоновый процесс. '
+            'Отправленные письма удаляются через EMAIL_OUTBOX_KEEP_SENT '
+            'секунд.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем, отправляемых за один проход.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Показать размер очереди и завершиться.'
+        )
+
+    def _print_status(self):
+        failed = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.FAILED
+        ).count()
+        self.stdout.write(
+            f'В очереди: {queue_depth()}, не отправлено: {failed}'
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self._print_status()
+            return
+        connection = get_connection()
+        try:
+            while True:
+                try:
+                    connection.open()
+                    sent, failed = deliver_batch(
+                        connection, options['batch_size']
+                    )
+                except Exception as error:
+                    self.stderr.write(f'Ошибка отправки: {error}')
+                    connection.close()
+                    sent = failed = 0
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, отложено: {failed}'
+                    )
+                    if failed:
+                        connection.close()
+                    continue
+                purged = purge_sent()
+                if purged:
+                    self.stdout.write(f'Удалено отправленных: {purged}')
+                if options['once']:
+                    break
+                connection.close()
+                time.sleep(options['poll_interval'])
+        finally:
+            connection.close()
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:34
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(title=OuterRef('pk')).order_by()
+    reviews = reviews.values('title')
+    Title.objects.using(schema_editor.connection.alias).update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value'),
+                     output_field=IntegerField()),
+            0
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value'),
+                     output_field=IntegerField()),
+            0
+        ),
+        rating=Subquery(reviews.annotate(value=Avg('score')).values('value')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rating'], name='title_rating_idx'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
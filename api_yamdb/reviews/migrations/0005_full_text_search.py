@@ -0,0 +1,147 @@
+from django.db import migrations
+
+SEARCH_CONFIG = 'russian'
+
+# Таблица, индексируемые колонки и их веса в ранжировании.
+SEARCH_TABLES = (
+    ('reviews_title', (('name', 'A'), ('description', 'B'))),
+    ('reviews_review', (('text', 'A'),)),
+    ('reviews_comment', (('text', 'A'),)),
+)
+
+
+def _postgres_vector(columns, row):
+    return ' || '.join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+        f"coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def install_postgres(schema_editor):
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SEARCH_TABLES:
+        names = ', '.join(column for column, _ in columns)
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector'
+        )
+        schema_editor.execute(
+            f'CREATE FUNCTION {table}_search_update() RETURNS trigger AS $$ '
+            f'BEGIN NEW.search_vector := {_postgres_vector(columns, "NEW.")};'
+            f' RETURN NEW; END $$ LANGUAGE plpgsql'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {table}_search_update '
+            f'BEFORE INSERT OR UPDATE OF {names} ON {table} '
+            f'FOR EACH ROW EXECUTE PROCEDURE {table}_search_update()'
+        )
+        schema_editor.execute(
+            f'UPDATE {table} SET search_vector = '
+            f'{_postgres_vector(columns, "")}'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {table}_search_idx ON {table} '
+            f'USING gin (search_vector)'
+        )
+    schema_editor.execute(
+        'CREATE INDEX reviews_title_name_trgm_idx ON reviews_title '
+        'USING gin (name gin_trgm_ops)'
+    )
+
+
+def uninstall_postgres(schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS reviews_title_name_trgm_idx')
+    for table, _ in SEARCH_TABLES:
+        schema_editor.execute(
+            f'DROP TRIGGER IF EXISTS {table}_search_update ON {table}'
+        )
+        schema_editor.execute(
+            f'DROP FUNCTION IF EXISTS {table}_search_update()'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector'
+        )
+
+
+def sqlite_triggers(table, columns):
+    """Триггеры, поддерживающие FTS5-таблицу в актуальном состоянии.
+
+    SQLite удаляет триггеры, когда миграция пересоздаёт таблицу
+    (например, при AlterField), поэтому после каждого migrate
+    недостающие триггеры восстанавливает reviews.signals.
+    """
+    names = ', '.join(column for column, _ in columns)
+    new_values = ', '.join(f'new.{column}' for column, _ in columns)
+    old_values = ', '.join(f'old.{column}' for column, _ in columns)
+    delete = (
+        f"INSERT INTO {table}_fts({table}_fts, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert = (
+        f'INSERT INTO {table}_fts(rowid, {names}) '
+        f'VALUES (new.id, {new_values});'
+    )
+    return {
+        f'{table}_fts_insert': (
+            f'CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} '
+            f'BEGIN {insert} END'
+        ),
+        f'{table}_fts_delete': (
+            f'CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} '
+            f'BEGIN {delete} END'
+        ),
+        f'{table}_fts_update': (
+            f'CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} '
+            f'BEGIN {delete} {insert} END'
+        ),
+    }
+
+
+def install_sqlite(schema_editor):
+    for table, columns in SEARCH_TABLES:
+        names = ', '.join(column for column, _ in columns)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table}_fts USING fts5({names}, "
+            f"content='{table}', content_rowid='id')"
+        )
+        for trigger in sqlite_triggers(table, columns).values():
+            schema_editor.execute(trigger)
+        schema_editor.execute(
+            f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+        )
+
+
+def uninstall_sqlite(schema_editor):
+    for table, _ in SEARCH_TABLES:
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS {table}_fts_{action}'
+            )
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        install_postgres(schema_editor)
+    elif vendor == 'sqlite':
+        install_sqlite(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        uninstall_postgres(schema_editor)
+    elif vendor == 'sqlite':
+        uninstall_sqlite(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', 'title'], name='genre_title_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year'], name='title_category_year_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:03
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+YEAR_BUCKET = 10
+
+
+def fill_facets(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    TitleFacet = apps.get_model('reviews', 'TitleFacet')
+    alias = schema_editor.connection.alias
+    counts = Counter()
+    titles = Title.objects.using(alias).order_by()
+    for row in titles.values('category_id').annotate(count=Count('pk')):
+        counts['total', 0] += row['count']
+        if row['category_id'] is not None:
+            counts['category', row['category_id']] += row['count']
+    for row in titles.values('year').annotate(count=Count('pk')):
+        counts['year', row['year'] // YEAR_BUCKET * YEAR_BUCKET] += (
+            row['count']
+        )
+    links = GenreTitle.objects.using(alias).order_by().values('genre_id')
+    for row in links.annotate(count=Count('pk')):
+        counts['genre', row['genre_id']] += row['count']
+    TitleFacet.objects.using(alias).bulk_create(
+        TitleFacet(kind=kind, value=value, count=count)
+        for (kind, value), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('total', 'Всего'), ('genre', 'Жанр'), ('category', 'Категория'), ('year', 'Десятилетие')], max_length=16, verbose_name='Фасет')),
+                ('value', models.IntegerField(help_text='id жанра или категории, первый год десятилетия', verbose_name='Значение')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Произведений')),
+            ],
+            options={
+                'verbose_name': 'Фасет каталога',
+                'verbose_name_plural': 'Фасеты каталога',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlefacet',
+            constraint=models.UniqueConstraint(fields=('kind', 'value'), name='unique_title_facet'),
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
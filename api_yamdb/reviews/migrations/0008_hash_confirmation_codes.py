@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:12
+
+from django.db import migrations
+from django.utils.crypto import salted_hmac
+
+CONFIRMATION_CODE_SALT = 'reviews.User.confirmation_code'
+BATCH_SIZE = 1000
+
+
+def hash_codes(apps, schema_editor):
+    User = apps.get_model('reviews', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    batch = []
+    for user in (
+        users.exclude(confirmation_code='').only('pk', 'confirmation_code')
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        user.confirmation_code = salted_hmac(
+            CONFIRMATION_CODE_SALT, user.confirmation_code
+        ).hexdigest()
+        batch.append(user)
+        if len(batch) >= BATCH_SIZE:
+            users.bulk_update(batch, ('confirmation_code',))
+            batch = []
+    if batch:
+        users.bulk_update(batch, ('confirmation_code',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_facets'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_codes, migrations.RunPython.noop),
+    ]
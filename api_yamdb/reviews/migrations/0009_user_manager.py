@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:19
+
+from django.db import migrations
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_hash_confirmation_codes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.UserManager()),
+            ],
+        ),
+    ]
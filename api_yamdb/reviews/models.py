@@ -1,11 +1,38 @@
+import threading
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
 from django.contrib.auth.models import AbstractUser
-from django.contrib.auth.tokens import default_token_generator
+from django.contrib.auth.models import UserManager as AuthUserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
 from django.dispatch.dispatcher import receiver
+from django.utils import timezone
+from django.utils.crypto import (constant_time_compare, get_random_string,
+                                 salted_hmac)
 
 from .validators import validate_username, validate_year
 
+CONFIRMATION_CODE_SALT = 'reviews.User.confirmation_code'
+CONFIRMATION_CODE_LENGTH = 32
+
+
+def hash_confirmation_code(code):
+    return salted_hmac(CONFIRMATION_CODE_SALT, code).hexdigest()
+
+
+class UserManager(AuthUserManager):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Вставка пользователей пачкой вместе с кодами подтверждения."""
+        objs = list(objs)
+        for user in objs:
+            if not user.confirmation_code:
+                user.set_confirmation_code()
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class User(AbstractUser):
     """Модель пользователя."""
@@ -45,6 +72,33 @@ class User(AbstractUser):
         blank=True,
     )
 
+    objects = UserManager()
+
+    def save(self, *args, **kwargs):
+        # Код создаётся до вставки, чтобы регистрация была одной записью.
+        if self._state.adding and not self.confirmation_code:
+            self.set_confirmation_code()
+        super().save(*args, **kwargs)
+
+    def set_confirmation_code(self):
+        """Создаёт новый код подтверждения и возвращает его.
+
+        В базе хранится только HMAC кода, сам код до отправки письма
+        доступен в raw_confirmation_code.
+        """
+        self.raw_confirmation_code = get_random_string(
+            CONFIRMATION_CODE_LENGTH
+        )
+        self.confirmation_code = hash_confirmation_code(
+            self.raw_confirmation_code
+        )
+        return self.raw_confirmation_code
+
+    def check_confirmation_code(self, code):
+        return bool(self.confirmation_code) and constant_time_compare(
+            hash_confirmation_code(code), self.confirmation_code
+        )
+
     @property
     def get_admin(self):
         return self.role == self.ADMIN
@@ -54,16 +108,6 @@ class User(AbstractUser):
         return self.role == self.MODERATOR
 
 
-@receiver(models.signals.post_save, sender=User)
-def post_save(sender, instance, created, **kwargs):
-    if created:
-        confirmation_code = default_token_generator.make_token(
-            instance
-        )
-        instance.confirmation_code = confirmation_code
-        instance.save()
-
-
 class CreatedModel(models.Model):
     """Абстрактная модель. Добавляет дату создания."""
     pub_date = models.DateTimeField(
@@ -96,7 +140,57 @@ class Category(CreatedModel):
         return self.name[:20]
 
 
-class Genre(CreatedModel):
+_deleting = threading.local()
+
+
+def deleting(model):
+    """Ключи объектов model, которые сейчас удаляются в этом потоке."""
+    pks = getattr(_deleting, 'pks', None)
+    if pks is None:
+        pks = _deleting.pks = defaultdict(set)
+    return pks[model]
+
+
+def pending_facets(model):
+    """Сдвиги счётчиков, отложенные до удаления самих объектов model."""
+    deltas = getattr(_deleting, 'facets', None)
+    if deltas is None:
+        deltas = _deleting.facets = defaultdict(Counter)
+    return deltas[model]
+
+
+def forget_deleting(model):
+    deleting(model).clear()
+    pending_facets(model).clear()
+
+
+class TrackedDeleteQuerySet(models.QuerySet):
+    """Удаление, во время которого ключи удаляемых объектов отмечены.
+
+    Каскад удаляет зависимые строки раньше самих объектов, и по отметке
+    их обработчики не пересчитывают счётчики удаляемых объектов по одной
+    строке. Ключи отмечает pre_delete, а снимает выход из удаления,
+    даже неудачного.
+    """
+
+    def delete(self):
+        try:
+            return super().delete()
+        finally:
+            forget_deleting(self.model)
+
+
+class TrackedDeleteMixin:
+    """То же для удаления одного объекта."""
+
+    def delete(self, *args, **kwargs):
+        try:
+            return super().delete(*args, **kwargs)
+        finally:
+            forget_deleting(type(self))
+
+
+class Genre(TrackedDeleteMixin, CreatedModel):
     """Модель жанров произведений"""
     name = models.CharField(
         verbose_name='Имя',
@@ -107,6 +201,8 @@ class Genre(CreatedModel):
         max_length=50
     )
 
+    objects = TrackedDeleteQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Жанр'
@@ -116,8 +212,26 @@ class Genre(CreatedModel):
         return self.name[:20]
 
 
-class Title(CreatedModel):
+class TitleQuerySet(TrackedDeleteQuerySet):
+    def apply_review_delta(self, title_id, score_delta, count_delta):
+        """Атомарно сдвигает хранимые счётчики рейтинга произведения."""
+        count = F('review_count') + count_delta
+        score_sum = F('score_sum') + score_delta
+        return self.filter(pk=title_id).update(
+            score_sum=score_sum,
+            review_count=count,
+            rating=Case(
+                When(review_count=-count_delta, then=Value(None)),
+                default=Cast(score_sum, FloatField()) / count,
+                output_field=FloatField(),
+            ),
+        )
+
+
+class Title(TrackedDeleteMixin, CreatedModel):
     """Модель произведений"""
+    RATING_FIELDS = ('rating', 'review_count', 'score_sum')
+
     name = models.CharField(
         verbose_name='Название',
         max_length=256
@@ -142,14 +256,85 @@ class Title(CreatedModel):
         Genre,
         through='GenreTitle'
     )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('-rating',), name='title_rating_idx'),
+            models.Index(fields=('category', 'year'),
+                         name='title_category_year_idx'),
+        )
 
     def __str__(self):
         return self.name[:20]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        instance._loaded_year = instance.__dict__.get('year')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and getattr(self, '_loaded_year', None) is None
+        ):
+            self._loaded_category_id, self._loaded_year = (
+                Title.objects.filter(pk=self.pk)
+                .values_list('category_id', 'year').first()
+                or (None, None)
+            )
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Счётчики рейтинга обновляются только через apply_review_delta,
+            # чтобы не затереть их устаревшими значениями из памяти.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class GenreTitleQuerySet(models.QuerySet):
+    def delete_for_titles(self, title_ids):
+        """Удаляет связи произведений одним запросом, без сигналов.
+
+        Счётчики жанров и кеш каталога вызывающий обновляет сам.
+        """
+        if not title_ids:
+            return 0
+        using = router.db_for_write(self.model)
+        quote_name = connections[using].ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        column = quote_name(self.model._meta.get_field('title').column)
+        placeholders = ', '.join(['%s'] * len(title_ids))
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+                list(title_ids)
+            )
+            return cursor.rowcount
+
 
 class GenreTitle(CreatedModel):
     """Модель связи жанров и произведений"""
@@ -166,15 +351,231 @@ class GenreTitle(CreatedModel):
         ordering = ('-pub_date',)
         verbose_name = 'Жанр-Произведение'
         verbose_name_plural = 'Жанры-Произведения'
+        indexes = (
+            models.Index(fields=('genre', 'title'),
+                         name='genre_title_genre_idx'),
+        )
         constraints = (
             models.UniqueConstraint(fields=('title', 'genre',),
                                     name='unique_genre_title'),
         )
 
+    objects = GenreTitleQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.genre} {self.title}'
 
 
+class TitleFacetQuerySet(models.QuerySet):
+    def counts(self):
+        """Хранимые счётчики: {(kind, value): count}."""
+        return Counter({
+            (kind, value): count
+            for kind, value, count in self.filter(count__gt=0)
+            .values_list('kind', 'value', 'count')
+        })
+
+    def count_titles(self, titles):
+        """Считает фасеты для выборки произведений группировкой.
+
+        Возвращает то же, что counts(), но стоит O(произведений).
+        """
+        counts = Counter()
+        titles = titles.order_by()
+        for category_id, year, count in (
+            titles.values('category_id', 'year').annotate(count=Count('pk'))
+            .values_list('category_id', 'year', 'count')
+        ):
+            counts[self.model.TOTAL, 0] += count
+            if category_id is not None:
+                counts[self.model.CATEGORY, category_id] += count
+            counts[self.model.YEAR, self.model.year_bucket(year)] += count
+        for genre_id, count in (
+            GenreTitle.objects.filter(title__in=titles.values('pk'))
+            .order_by().values('genre_id').annotate(count=Count('pk'))
+            .values_list('genre_id', 'count')
+        ):
+            counts[self.model.GENRE, genre_id] = count
+        return counts
+
+    @staticmethod
+    def _lookup(facets):
+        values = defaultdict(list)
+        for kind, value in facets:
+            values[kind].append(value)
+        return reduce(or_, (Q(kind=kind, value__in=kind_values)
+                            for kind, kind_values in values.items()))
+
+    def apply_delta(self, facets, delta):
+        """Атомарно сдвигает счётчики пар (kind, value) на delta."""
+        facets = {
+            (kind, value) for kind, value in facets if value is not None
+        }
+        if not facets or not delta:
+            return
+        rows = self.filter(self._lookup(facets))
+        # После расхождения счётчик не уходит ниже нуля: его исправит
+        # recount-facets.
+        count = F('count') + delta if delta > 0 else Greatest(
+            F('count') + delta, 0
+        )
+        if rows.update(count=count) == len(facets) or delta < 0:
+            return
+        missing = facets - set(rows.values_list('kind', 'value'))
+        self.bulk_create(
+            [self.model(kind=kind, value=value) for kind, value in missing],
+            ignore_conflicts=True
+        )
+        self.filter(self._lookup(missing)).update(count=F('count') + delta)
+
+    def apply_counts(self, deltas):
+        """Применяет {(kind, value): delta} одним UPDATE на каждую дельту."""
+        facets = defaultdict(set)
+        for facet, delta in deltas.items():
+            facets[delta].add(facet)
+        for delta, delta_facets in facets.items():
+            self.apply_delta(delta_facets, delta)
+
+    def title_facets(self, category_id, year):
+        return {
+            (self.model.CATEGORY, category_id),
+            (self.model.YEAR, self.model.year_bucket(year)),
+        }
+
+
+class TitleFacet(models.Model):
+    """Хранимое количество произведений для значения фасета каталога."""
+    TOTAL = 'total'
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    YEAR = 'year'
+
+    KIND = (
+        (TOTAL, 'Всего'),
+        (GENRE, 'Жанр'),
+        (CATEGORY, 'Категория'),
+        (YEAR, 'Десятилетие'),
+    )
+    YEAR_BUCKET = 10
+
+    kind = models.CharField(
+        'Фасет',
+        max_length=16,
+        choices=KIND,
+    )
+    value = models.IntegerField(
+        'Значение',
+        help_text='id жанра или категории, первый год десятилетия',
+    )
+    count = models.PositiveIntegerField(
+        'Произведений',
+        default=0,
+    )
+
+    objects = TitleFacetQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Фасет каталога'
+        verbose_name_plural = 'Фасеты каталога'
+        constraints = (
+            models.UniqueConstraint(fields=('kind', 'value'),
+                                    name='unique_title_facet'),
+        )
+
+    def __str__(self):
+        return f'{self.kind} {self.value}: {self.count}'
+
+    @classmethod
+    def year_bucket(cls, year):
+        if year is None:
+            return None
+        return year // cls.YEAR_BUCKET * cls.YEAR_BUCKET
+
+
+@receiver(models.signals.post_save, sender=Title)
+def update_title_facets(sender, instance, created, **kwargs):
+    """Поддерживает счётчики категорий и десятилетий каталога."""
+    facets = TitleFacet.objects
+    new = facets.title_facets(instance.category_id, instance.year)
+    if created:
+        facets.apply_delta(new | {(TitleFacet.TOTAL, 0)}, 1)
+    else:
+        old = facets.title_facets(
+            instance._loaded_category_id, instance._loaded_year
+        )
+        facets.apply_delta(old - new, -1)
+        facets.apply_delta(new - old, 1)
+    instance._loaded_category_id = instance.category_id
+    instance._loaded_year = instance.year
+
+
+@receiver(models.signals.pre_delete, sender=Genre)
+@receiver(models.signals.pre_delete, sender=Title)
+def mark_deleting(sender, instance, **kwargs):
+    deleting(sender).add(instance.pk)
+
+
+@receiver(models.signals.post_delete, sender=Title)
+def rollback_title_facets(sender, instance, **kwargs):
+    """Вместе со счётчиками произведения сдвигает отложенные счётчики
+    жанров его удалённых связей."""
+    deltas = pending_facets(Title)
+    for facet in TitleFacet.objects.title_facets(
+        instance.category_id, instance.year
+    ) | {(TitleFacet.TOTAL, 0)}:
+        deltas[facet] -= 1
+    TitleFacet.objects.apply_counts(deltas)
+    deltas.clear()
+
+
+@receiver(models.signals.post_save, sender=GenreTitle)
+def add_genre_facet(sender, instance, created, **kwargs):
+    if created:
+        TitleFacet.objects.apply_delta(
+            ((TitleFacet.GENRE, instance.genre_id),), 1
+        )
+
+
+@receiver(models.signals.m2m_changed, sender=GenreTitle)
+def add_genre_facets(sender, instance, action, reverse, pk_set, **kwargs):
+    """Учитывает жанры, добавленные через title.genre.add() и set().
+
+    Такие связи создаются bulk_create без post_save, а удаление
+    связей вызывает post_delete для каждой из них.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        TitleFacet.objects.apply_delta(
+            ((TitleFacet.GENRE, instance.pk),), len(pk_set)
+        )
+    else:
+        TitleFacet.objects.apply_delta(
+            [(TitleFacet.GENRE, genre_id) for genre_id in pk_set], 1
+        )
+
+
+@receiver(models.signals.post_delete, sender=GenreTitle)
+def rollback_genre_facet(sender, instance, **kwargs):
+    if instance.genre_id in deleting(Genre):
+        # Счётчик удаляемого жанра удалит drop_facet.
+        return
+    if instance.title_id in deleting(Title):
+        pending_facets(Title)[TitleFacet.GENRE, instance.genre_id] -= 1
+        return
+    TitleFacet.objects.apply_delta(
+        ((TitleFacet.GENRE, instance.genre_id),), -1
+    )
+
+
+@receiver(models.signals.post_delete, sender=Genre)
+@receiver(models.signals.post_delete, sender=Category)
+def drop_facet(sender, instance, **kwargs):
+    """Удаляет счётчик удалённого жанра или категории."""
+    kind = TitleFacet.GENRE if sender is Genre else TitleFacet.CATEGORY
+    TitleFacet.objects.filter(kind=kind, value=instance.pk).delete()
+
+
 class Review(CreatedModel):
     """Модель отзыва к произведению."""
     text = models.TextField(
@@ -205,6 +606,10 @@ class Review(CreatedModel):
         ordering = ('-pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = (
+            models.Index(fields=('title', '-pub_date', '-id'),
+                         name='review_title_pub_date_idx'),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('title', 'author', ),
@@ -215,6 +620,49 @@ class Review(CreatedModel):
     def __str__(self):
         return self.text[:20]
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            self._loaded_title_id = self._loaded_score = None
+            if self.pk is not None and not self._state.adding:
+                # Прежняя оценка читается под блокировкой строки, поэтому
+                # параллельные изменения отзыва не теряют разницу.
+                self._loaded_title_id, self._loaded_score = (
+                    Review._base_manager.using(using).select_for_update()
+                    .filter(pk=self.pk).values_list('title_id', 'score')
+                    .first() or (None, None)
+                )
+            super().save(*args, **kwargs)
+
+
+@receiver(models.signals.post_save, sender=Review)
+def update_title_rating(sender, instance, created, **kwargs):
+    """Поддерживает хранимый рейтинг произведения при сохранении отзыва."""
+    if created:
+        Title.objects.apply_review_delta(instance.title_id, instance.score, 1)
+    else:
+        old_title_id = instance._loaded_title_id
+        old_score = instance._loaded_score
+        if old_title_id != instance.title_id:
+            Title.objects.apply_review_delta(old_title_id, -old_score, -1)
+            Title.objects.apply_review_delta(
+                instance.title_id, instance.score, 1
+            )
+        elif old_score != instance.score:
+            Title.objects.apply_review_delta(
+                instance.title_id, instance.score - old_score, 0
+            )
+
+
+@receiver(models.signals.post_delete, sender=Review)
+def rollback_title_rating(sender, instance, **kwargs):
+    """Убирает оценку удалённого отзыва из рейтинга произведения."""
+    if instance.title_id in deleting(Title):
+        return
+    Title.objects.apply_review_delta(instance.title_id, -instance.score, -1)
+
 
 class Comment(CreatedModel):
     """Модель комментария."""
@@ -240,6 +688,74 @@ class Comment(CreatedModel):
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(fields=('review', '-pub_date', '-id'),
+                         name='comment_review_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:20]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField(
+        'Тема',
+        max_length=255
+    )
+    body = models.TextField(
+        'Текст'
+    )
+    to = models.EmailField(
+        'Получатель',
+        max_length=128
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUS,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попыток отправки',
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        'Последняя ошибка',
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        'Дата отправки',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(fields=('next_attempt_at',),
+                         name='outgoing_email_pending_idx',
+                         condition=models.Q(status='pending')),
+        )
+
+    def __str__(self):
+        return f'{self.to}: {self.subject[:20]}'
@@ -0,0 +1,136 @@
+import socket
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, to):
+    """Ставит письмо в очередь, отправкой занимается send-emails."""
+    return OutgoingEmail.objects.create(subject=subject, body=body, to=to)
+
+
+def queue_depth():
+    """Количество писем, ожидающих отправки."""
+    return OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).count()
+
+
+def purge_sent(keep=None):
+    """Удаляет отправленные письма старше keep секунд.
+
+    Возвращает количество удалённых писем.
+    """
+    keep = settings.EMAIL_OUTBOX_KEEP_SENT if keep is None else keep
+    deleted, _ = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT,
+        sent_at__lt=timezone.now() - timedelta(seconds=keep),
+    ).delete()
+    return deleted
+
+
+def get_retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+# Ошибки, после которых соединение с SMTP-сервером больше не годится.
+CONNECTION_ERRORS = (SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class ConnectionLostError(Exception):
+    """Соединение с SMTP-сервером оборвалось и не переоткрылось."""
+
+
+def claim_batch(batch_size, now):
+    """Забирает пачку писем и сразу фиксирует транзакцию.
+
+    Пока письма отправляются, строки не заблокированы: от других
+    процессов их скрывает next_attempt_at, сдвинутый на
+    EMAIL_OUTBOX_CLAIM_TIMEOUT секунд. Если процесс упадёт, письма
+    вернутся в очередь по истечении этого времени.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT
+        ))
+    return batch
+
+
+def send_email(connection, email):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        to=[email.to],
+        connection=connection,
+    )
+    try:
+        connection.send_messages([message])
+    except CONNECTION_ERRORS:
+        # Сервер закрыл соединение посреди пачки: переоткрываем его
+        # один раз, чтобы не списывать попытку у остальных писем.
+        connection.close()
+        try:
+            connection.open()
+            connection.send_messages([message])
+        except Exception as error:
+            raise ConnectionLostError(f'{type(error).__name__}: {error}')
+
+
+def mark_failed(email, error, now):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+        email.body = ''
+    else:
+        email.next_attempt_at = now + get_retry_delay(email.attempts)
+
+
+def deliver_batch(connection, batch_size=None):
+    """Отправляет пачку писем через одно открытое соединение.
+
+    Письма отправляются вне транзакции. Если соединение оборвалось
+    и не переоткрылось, пачка прерывается: попытка списывается только
+    у текущего письма, а остальные сразу возвращаются в очередь.
+    Текст отправленного или окончательно не отправленного письма
+    стирается: в нём код подтверждения, который в таблице
+    пользователей хранится только в виде HMAC.
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    batch = claim_batch(batch_size, now)
+    sent, failed = [], []
+    for email in batch:
+        try:
+            send_email(connection, email)
+        except Exception as error:
+            mark_failed(email, error, now)
+            failed.append(email)
+            if isinstance(error, ConnectionLostError):
+                break
+        else:
+            sent.append(email.pk)
+    if sent:
+        OutgoingEmail.objects.filter(pk__in=sent).update(
+            status=OutgoingEmail.SENT, sent_at=timezone.now(), body=''
+        )
+    # Неотправленные письма сохраняют прежний next_attempt_at.
+    OutgoingEmail.objects.bulk_update(
+        failed + batch[len(sent) + len(failed):],
+        ('attempts', 'last_error', 'status', 'next_attempt_at', 'body')
+    )
+    return len(sent), len(failed)
@@ -0,0 +1,34 @@
+from importlib import import_module
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SEARCH_MIGRATION = 'reviews.migrations.0005_full_text_search'
+
+
+def restore_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстанавливает триггеры FTS5, удалённые пересозданием таблиц.
+
+    После восстановления индекс перестраивается: изменения, сделанные
+    без триггеров, в нём не отражены.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    migration = import_module(SEARCH_MIGRATION)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        for table, columns in migration.SEARCH_TABLES:
+            if f'{table}_fts' not in existing:
+                continue
+            triggers = migration.sqlite_triggers(table, columns)
+            missing = [sql for name, sql in triggers.items()
+                       if name not in existing]
+            for trigger in missing:
+                cursor.execute(trigger)
+            if missing:
+                cursor.execute(
+                    f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+                )
@@ -1,9 +1,33 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings, tmp_path):
+    """Свой файл вёдер ограничения запросов для каждого теста."""
+    settings.THROTTLE_SQLITE_PATH = str(tmp_path / 'throttle.sqlite3')
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    """Свой каталог метрик воркеров для каждого теста."""
+    settings.METRICS_DIR = str(tmp_path / 'metrics')
@@ -0,0 +1,58 @@
+import pytest
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+
+TITLES_COUNT = 12
+REVIEWS_PER_TITLE = 3
+COMMENTS_PER_REVIEW = 2
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(2)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'reviewer{i}', email=f'reviewer{i}@yamdb.fake'
+        )
+        for i in range(REVIEWS_PER_TITLE)
+    ]
+    titles = []
+    for i in range(TITLES_COUNT):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i,
+            category=categories[i % len(categories)]
+        )
+        for genre in genres[:2] if i % 2 else genres[1:]:
+            GenreTitle.objects.create(title=title, genre=genre)
+        for author in authors:
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=i % 10 + 1
+            )
+            for _ in range(COMMENTS_PER_REVIEW):
+                Comment.objects.create(
+                    review=review, author=author, text='Комментарий'
+                )
+        titles.append(title)
+    return {
+        'categories': categories,
+        'genres': genres,
+        'authors': authors,
+        'titles': titles,
+    }
+
+
+@pytest.fixture
+def title(catalog):
+    return catalog['titles'][0]
+
+
+@pytest.fixture
+def review(title):
+    return title.reviews.first()
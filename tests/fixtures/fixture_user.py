@@ -0,0 +1,40 @@
+import pytest
+from rest_framework.test import APIClient
+from api.authentication import RoleAccessToken, get_user_state
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake', role='admin',
+        bio='admin bio'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', role='user',
+        bio='user bio'
+    )
+
+
+def _client_for(user):
+    # Состояние пользователя уже в кеше, как после первого запроса,
+    # поэтому бюджеты запросов не включают его чтение.
+    get_user_state(user.pk)
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def admin_client(admin):
+    return _client_for(admin)
+
+
+@pytest.fixture
+def user_client(user):
+    return _client_for(user)
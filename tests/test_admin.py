@@ -0,0 +1,100 @@
+import pytest
+from django.core.paginator import EmptyPage
+from django.test import Client
+from reviews.admin import EstimatedCountPaginator
+from reviews.models import Review, Title
+
+CHANGELISTS = ('title', 'genretitle', 'review', 'comment', 'user')
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    superuser = django_user_model.objects.create_superuser(
+        username='staff', email='staff@yamdb.fake', password='password'
+    )
+    client = Client()
+    client.force_login(superuser)
+    return client
+
+
+@pytest.mark.django_db
+class TestAdmin:
+
+    @pytest.mark.parametrize('model', CHANGELISTS)
+    def test_changelist(self, staff_client, catalog, model):
+        response = staff_client.get(f'/admin/reviews/{model}/')
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('model', ('review', 'comment', 'genretitle'))
+    def test_changelist_queries_do_not_grow(
+            self, staff_client, catalog, model, django_assert_max_num_queries):
+        # Сессия, пользователь, варианты фильтра, счётчик и строки.
+        with django_assert_max_num_queries(5):
+            response = staff_client.get(f'/admin/reviews/{model}/')
+        assert response.status_code == 200
+
+    def test_change_form_uses_raw_id_widgets(self, staff_client, review):
+        response = staff_client.get(
+            f'/admin/reviews/review/{review.pk}/change/'
+        )
+        assert response.status_code == 200
+        assert b'vForeignKeyRawIdAdminField' in response.content
+        assert b'<option value="' not in response.content
+
+    def test_title_search_uses_search_index(self, staff_client, catalog):
+        title = catalog['titles'][3]
+        Title.objects.filter(pk=title.pk).update(name='Шерлок Холмс')
+        response = staff_client.get('/admin/reviews/title/', {'q': 'шерл'})
+        assert [row.pk for row in response.context['cl'].result_list] == [
+            title.pk
+        ]
+
+    def test_capped_count_is_labelled(self, staff_client, catalog,
+                                      settings):
+        settings.ADMIN_EXACT_COUNT_LIMIT = 5
+        response = staff_client.get('/admin/reviews/review/')
+        assert 'больше 5 Отзывы' in response.content.decode()
+
+    def test_filters_are_indexed_only(self, staff_client, catalog):
+        response = staff_client.get('/admin/reviews/title/')
+        filters = response.context['cl'].filter_specs
+        assert [spec.field.name for spec in filters] == ['category', 'genre']
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+
+    def test_exact_count_below_limit(self, catalog, settings):
+        settings.ADMIN_EXACT_COUNT_LIMIT = 1000
+        paginator = EstimatedCountPaginator(Title.objects.order_by('-pk'), 5)
+        assert paginator.count == Title.objects.count()
+
+    def test_count_is_capped(self, catalog, settings,
+                             django_assert_num_queries):
+        settings.ADMIN_EXACT_COUNT_LIMIT = 5
+        paginator = EstimatedCountPaginator(Review.objects.order_by('-pk'), 2)
+        with django_assert_num_queries(1) as captured:
+            assert paginator.count == 6
+        assert 'LIMIT 6' in captured.captured_queries[0]['sql']
+
+    def test_page_keeps_order(self, catalog):
+        queryset = Review.objects.order_by('-pk')
+        paginator = EstimatedCountPaginator(queryset, 4)
+        page = paginator.page(2)
+        assert list(page.object_list) == list(queryset[4:8])
+        assert page.has_next()
+
+    def test_pages_past_capped_count(self, catalog, settings):
+        settings.ADMIN_EXACT_COUNT_LIMIT = 5
+        queryset = Review.objects.order_by('-pk')
+        paginator = EstimatedCountPaginator(queryset, 2)
+        assert paginator.num_pages == 3
+        assert list(paginator.page(5).object_list) == list(queryset[8:10])
+        with pytest.raises(EmptyPage):
+            paginator.page(1000)
+
+    def test_exact_count_pages_are_validated(self, catalog):
+        paginator = EstimatedCountPaginator(Title.objects.order_by('-pk'), 5)
+        assert paginator.count_label == str(Title.objects.count())
+        with pytest.raises(EmptyPage):
+            paginator.page(paginator.num_pages + 1)
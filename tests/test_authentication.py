@@ -0,0 +1,168 @@
+import time
+
+import jwt
+import pytest
+from api.authentication import USER_STATE_KEY, get_state_cache
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import OutgoingEmail, User
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_request_does_not_load_user(self, user_client,
+                                        django_assert_max_num_queries):
+        with django_assert_max_num_queries(0):
+            response = user_client.post('/api/v1/categories/',
+                                        data={'name': 'Н', 'slug': 'n'})
+        assert response.status_code == 403
+
+    def test_admin_allowed_by_token_claims(self, admin_client):
+        response = admin_client.post('/api/v1/categories/',
+                                     data={'name': 'Н', 'slug': 'n'})
+        assert response.status_code == 201
+
+    def test_role_change_applies_to_issued_tokens(self, admin, admin_client):
+        admin.role = 'user'
+        admin.save()
+        response = admin_client.post('/api/v1/categories/',
+                                     data={'name': 'Н', 'slug': 'n'})
+        assert response.status_code == 403
+
+    def test_state_is_read_once_per_timeout(self, user_client,
+                                            django_assert_num_queries):
+        get_state_cache().clear()
+        for queries in (1, 0):
+            with django_assert_num_queries(queries):
+                response = user_client.post('/api/v1/categories/',
+                                            data={'name': 'Н', 'slug': 'n'})
+            assert response.status_code == 403
+
+    def test_role_change_in_other_process(self, admin, admin_client):
+        # update() не шлёт сигналов, как и запись из другого процесса:
+        # изменение видно, когда истекает запись в кеше.
+        User.objects.filter(pk=admin.pk).update(role='user')
+        response = admin_client.post('/api/v1/categories/',
+                                     data={'name': 'Н', 'slug': 'n'})
+        assert response.status_code == 201
+        get_state_cache().delete(USER_STATE_KEY.format(admin.pk))
+        response = admin_client.post('/api/v1/categories/',
+                                     data={'name': 'Д', 'slug': 'd'})
+        assert response.status_code == 403
+
+    def test_state_expires_after_timeout(self, user, user_client, settings):
+        settings.JWT_USER_STATE_TIMEOUT = 1
+        get_state_cache().clear()
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        time.sleep(1.1)
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_deleted_user_is_rejected(self, user, user_client):
+        user.delete()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 401
+
+    def test_token_without_role_claim_still_accepted(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['username'] == user.username
+
+    def test_issued_token_carries_role(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.raw_confirmation_code,
+        })
+        assert response.status_code == 201
+        payload = jwt.decode(response.json()['token'], settings.SECRET_KEY,
+                             algorithms=['HS256'])
+        assert payload['role'] == 'user'
+        assert payload['is_staff'] is False
+        assert 'iat' in payload
+
+
+@pytest.mark.django_db
+class TestConfirmationCode:
+
+    def test_code_is_stored_hashed(self, user):
+        user.refresh_from_db()
+        assert user.confirmation_code
+        assert user.raw_confirmation_code not in user.confirmation_code
+        assert user.check_confirmation_code(user.raw_confirmation_code)
+        assert not user.check_confirmation_code('wrong')
+
+    def test_emailed_code_issues_token(self, client):
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake',
+        })
+        assert response.status_code == 200
+        email = OutgoingEmail.objects.get(to='newbie@yamdb.fake')
+        code = email.body.split()[-1]
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'newbie', 'confirmation_code': code,
+        })
+        assert response.status_code == 201
+
+    def test_wrong_code_and_unknown_user(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username, 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 400
+        response = client.post('/api/v1/auth/token/', data={
+            'username': 'nobody', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestSignUp:
+
+    def test_conflicts_match_unique_validator(self, client, user):
+        class UniqueSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = User
+                fields = ('email', 'username')
+
+        for data in (
+            {'username': user.username, 'email': user.email},
+            {'username': user.username, 'email': 'other@yamdb.fake'},
+            {'username': 'other', 'email': user.email},
+        ):
+            expected = UniqueSerializer(data=data)
+            assert not expected.is_valid()
+            response = client.post('/api/v1/auth/signup/', data=data)
+            assert response.status_code == 400
+            assert response.json() == expected.errors
+        assert User.objects.count() == 1
+
+    def test_bulk_create_sets_codes(self):
+        users = User.objects.bulk_create([
+            User(username=f'bulk{number}', email=f'bulk{number}@yamdb.fake')
+            for number in range(2)
+        ])
+        for user in users:
+            assert user.check_confirmation_code(user.raw_confirmation_code)
+        assert not User.objects.filter(confirmation_code='').exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_signup_statements(client, django_assert_max_num_queries):
+    # Вставка пользователя и письма: уникальность проверяет БД,
+    # код подтверждения создаётся до вставки. SQLite дополнительно
+    # пишет BEGIN транзакции вокруг вставки пользователя.
+    with django_assert_max_num_queries(3) as captured:
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake',
+        })
+    assert response.status_code == 200, response.json()
+    statements = [query['sql'].split()[0]
+                  for query in captured.captured_queries]
+    assert [statement for statement in statements
+            if statement != 'BEGIN'] == ['INSERT', 'INSERT']
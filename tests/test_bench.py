@@ -0,0 +1,72 @@
+import io
+
+import pytest
+from benchmarks.runner import InProcessClient, compare, percentile, run_suite
+from benchmarks.scenarios import BenchData, build_scenarios
+from django.core.management import call_command
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.fixture
+def seeded(db):
+    call_command('seed-data', reviews=200, titles=20, comments_per_review=1,
+                 batch_size=50, stdout=io.StringIO())
+
+
+class TestSeedData:
+
+    def test_creates_requested_volume(self, seeded):
+        assert Review.objects.count() == 200
+        assert Title.objects.count() == 20
+        assert Comment.objects.count() == 200
+        assert User.objects.count() >= 10
+        title = Title.objects.first()
+        assert title.review_count == title.reviews.count()
+
+    def test_same_prefix_is_rejected(self, seeded):
+        with pytest.raises(Exception, match='seed'):
+            call_command('seed-data', reviews=10, stdout=io.StringIO())
+
+
+class TestBench:
+
+    def test_all_scenarios_succeed(self, seeded):
+        data = BenchData(requests_count=5)
+        results = run_suite(build_scenarios(data), InProcessClient,
+                            requests_count=5, concurrency=1)
+        failed = {name: result['statuses']
+                  for name, result in results.items() if result['errors']}
+        assert not failed
+        for result in results.values():
+            assert result['requests'] == 5
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+            assert result['queries'] is not None
+
+    def test_bench_tokens(self, seeded):
+        out = io.StringIO()
+        call_command('bench-tokens', requests=5, stdout=out)
+        assert 'ошибок 0' in out.getvalue()
+
+    def test_bench_throttle(self):
+        out = io.StringIO()
+        call_command('bench-throttle', checks=10, clients=2, stdout=out)
+        assert 'sqlite' in out.getvalue()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) is None
+
+    def test_compare_reports_regressions(self):
+        baseline = {'scenarios': {'titles-list': {
+            'errors': 0, 'p95_ms': 10.0, 'rps': 100.0, 'queries': 2.0,
+        }}}
+        same = {'titles-list': {
+            'errors': 0, 'p95_ms': 11.0, 'rps': 95.0, 'queries': 2.0,
+        }}
+        worse = {'titles-list': {
+            'errors': 1, 'p95_ms': 20.0, 'rps': 50.0, 'queries': 3.0,
+        }}
+        assert compare(same, baseline, threshold=0.2) == []
+        assert len(compare(worse, baseline, threshold=0.2)) == 4
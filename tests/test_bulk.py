@@ -0,0 +1,143 @@
+import pytest
+from api import bulk
+from reviews.models import Genre, GenreTitle, Title
+
+from .test_facets import assert_facets_are_fresh
+
+URL = '/api/v1/titles/bulk/'
+
+
+def title_items(count, genres=('genre-0', 'genre-1')):
+    return [
+        {'name': f'Массовое {number}', 'year': 1950 + number % 50,
+         'genre': list(genres), 'category': 'category-0'}
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitlesBulk:
+
+    def test_create(self, admin_client, catalog):
+        response = admin_client.post(URL, data=title_items(3), format='json')
+        assert response.status_code == 201, response.json()
+        ids = [item['id'] for item in response.json()]
+        titles = Title.objects.filter(pk__in=ids).order_by('pk')
+        assert [title.name for title in titles] == [
+            'Массовое 0', 'Массовое 1', 'Массовое 2'
+        ]
+        assert GenreTitle.objects.filter(title_id__in=ids).count() == 6
+        assert_facets_are_fresh()
+
+    def test_create_queries_do_not_grow_with_items(
+            self, admin_client, catalog, django_assert_max_num_queries):
+        # На SQLite ещё два запроса: последний ключ до вставки
+        # и ключи вставленных строк.
+        with django_assert_max_num_queries(13):
+            response = admin_client.post(URL, data=title_items(50),
+                                         format='json')
+        assert response.status_code == 201
+
+    def test_created_ids_survive_concurrent_inserts(self, admin_client,
+                                                    catalog, monkeypatch):
+        create = bulk._bulk_create
+
+        def create_before_other_process(model, objects):
+            create(model, objects)
+            if model is Title:
+                Title.objects.create(name='Чужое', year=2001)
+
+        monkeypatch.setattr(bulk, '_bulk_create', create_before_other_process)
+        items = title_items(2) + title_items(1, genres=('genre-2',))
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 201, response.json()
+        for item, created in zip(items, response.json()):
+            title = Title.objects.get(pk=created['id'])
+            assert title.name == item['name']
+            assert sorted(genre.slug for genre in title.genre.all()) == (
+                item['genre']
+            )
+        assert not Title.objects.get(name='Чужое').genre.exists()
+        assert_facets_are_fresh()
+
+    def test_errors_are_reported_per_item(self, admin_client, catalog):
+        items = title_items(3)
+        items[1]['genre'] = ['missing']
+        items[2]['year'] = 3000
+        count = Title.objects.count()
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert list(errors[1]) == ['genre']
+        assert list(errors[2]) == ['year']
+        assert Title.objects.count() == count
+
+    def test_update(self, admin_client, catalog):
+        first, second = catalog['titles'][:2]
+        response = admin_client.patch(URL, data=[
+            {'id': first.id, 'genre': ['genre-2'], 'year': 1950},
+            {'id': second.id, 'category': 'category-0', 'name': 'Новое'},
+        ], format='json')
+        assert response.status_code == 200, response.json()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.year == 1950
+        assert [genre.slug for genre in first.genre.all()] == ['genre-2']
+        assert (second.name, second.category.slug) == ('Новое', 'category-0')
+        assert_facets_are_fresh()
+
+    def test_update_genres_queries_do_not_grow(
+            self, admin_client, catalog, django_assert_max_num_queries):
+        items = [{'id': title.id, 'genre': ['genre-2']}
+                 for title in catalog['titles']]
+        # Один DELETE связей и по UPDATE на каждое изменение счётчика.
+        with django_assert_max_num_queries(10):
+            response = admin_client.patch(URL, data=items, format='json')
+        assert response.status_code == 200, response.json()
+        slugs = GenreTitle.objects.values_list('genre__slug', flat=True)
+        assert set(slugs) == {'genre-2'}
+        assert_facets_are_fresh()
+
+    def test_update_unknown_title(self, admin_client, catalog):
+        response = admin_client.patch(URL, data=[{'id': 0, 'year': 1950},
+                                                 {'year': 1950}],
+                                      format='json')
+        assert response.status_code == 400
+        assert [list(errors) for errors in response.json()] == [['id'],
+                                                                 ['id']]
+
+    def test_limit_and_permissions(self, admin_client, user_client,
+                                   catalog, settings):
+        response = user_client.post(URL, data=title_items(1), format='json')
+        assert response.status_code == 403
+        settings.API_BULK_MAX_ITEMS = 2
+        response = admin_client.post(URL, data=title_items(3), format='json')
+        assert response.status_code == 400
+        response = admin_client.post(URL, data={}, format='json')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestSlugBulk:
+
+    def test_genres_create(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/genres/bulk/', data=[
+            {'name': 'Нуар', 'slug': 'noir'},
+            {'name': 'Вестерн', 'slug': 'western'},
+        ], format='json')
+        assert response.status_code == 201
+        assert response.json() == [{'name': 'Нуар', 'slug': 'noir'},
+                                   {'name': 'Вестерн', 'slug': 'western'}]
+        assert Genre.objects.filter(slug__in=('noir', 'western')).count() == 2
+
+    def test_duplicate_slugs(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/categories/bulk/', data=[
+            {'name': 'Новая', 'slug': 'new'},
+            {'name': 'Копия', 'slug': 'new'},
+            {'name': 'Старая', 'slug': 'category-0'},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert list(errors[1]) == list(errors[2]) == ['slug']
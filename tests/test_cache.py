@@ -0,0 +1,145 @@
+import runpy
+import time
+from os.path import abspath, dirname, join
+from unittest import mock
+
+import pytest
+from api import cache as api_cache
+from api.cache import get_catalog_version
+from django.core.cache import caches
+from django.db import transaction
+from reviews.models import Review
+
+GUNICORN_CONF = join(dirname(dirname(abspath(__file__))), 'api_yamdb',
+                     'gunicorn.conf.py')
+SETTINGS = join(dirname(GUNICORN_CONF), 'api_yamdb', 'settings.py')
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_repeated_list_is_served_from_cache(
+            self, client, catalog, django_assert_max_num_queries):
+        url = '/api/v1/titles/?genre=genre-1&limit=5'
+        first = client.get(url)
+        assert first.status_code == 200
+        with django_assert_max_num_queries(0):
+            second = client.get(url)
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert second['ETag'] == first['ETag']
+
+    def test_query_params_vary_cache_key(self, client, catalog):
+        first = client.get('/api/v1/titles/?limit=1').json()
+        second = client.get('/api/v1/titles/?limit=1&offset=1').json()
+        assert first['results'][0]['id'] != second['results'][0]['id']
+
+    def test_etag_gives_not_modified(self, client, title,
+                                     django_assert_max_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        with django_assert_max_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+
+    def test_last_modified_gives_not_modified(self, client, catalog):
+        last_modified = client.get('/api/v1/genres/')['Last-Modified']
+        response = client.get('/api/v1/genres/',
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_write_invalidates_titles(self, client, user_client,
+                                             title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        response = user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                                    data={'text': 'Отзыв', 'score': 10})
+        assert response.status_code == 201
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_change_invalidates_titles(self, admin_client, client,
+                                             title):
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        response = admin_client.patch(url, data={'genre': ['genre-2']},
+                                      format='json')
+        assert response.status_code == 200
+        genres = [genre['slug'] for genre in client.get(url).json()['genre']]
+        assert genres == ['genre-2']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_version_changes_after_commit(self, user, title):
+        before = get_catalog_version()
+        time.sleep(0.01)
+        with transaction.atomic():
+            Review.objects.create(title=title, author=user, text='Отзыв',
+                                  score=5)
+            assert get_catalog_version() == before
+        assert get_catalog_version() > before
+
+    @pytest.mark.django_db(transaction=True)
+    def test_one_bump_per_transaction(self, catalog, monkeypatch):
+        bumps = []
+        monkeypatch.setattr(api_cache, 'bump_catalog_version',
+                            lambda: bumps.append(1))
+        with transaction.atomic():
+            catalog['titles'][0].delete()
+            Review.objects.filter(pk__in=list(Review.objects.values_list(
+                'pk', flat=True
+            )[:3])).delete()
+        assert bumps == [1]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bump_after_rolled_back_savepoint(self, catalog, monkeypatch):
+        bumps = []
+        monkeypatch.setattr(api_cache, 'bump_catalog_version',
+                            lambda: bumps.append(1))
+        title = catalog['titles'][0]
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    title.delete()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            catalog['titles'][1].delete()
+        assert bumps == [1]
+
+
+@pytest.mark.parametrize('backend, warned', (
+    ('django.core.cache.backends.locmem.LocMemCache', True),
+    ('django.core.cache.backends.filebased.FileBasedCache', False),
+))
+def test_gunicorn_warns_about_local_cache(settings, monkeypatch, backend,
+                                          warned):
+    monkeypatch.setenv('GUNICORN_WORKERS', '3')
+    settings.CACHES = {'default': {'BACKEND': backend, 'LOCATION': 'test'}}
+    server = mock.Mock()
+    runpy.run_path(GUNICORN_CONF)['on_starting'](server)
+    assert server.log.warning.called is warned
+
+
+@pytest.mark.django_db
+def test_version_survives_response_cache_eviction():
+    version = get_catalog_version()
+    caches['default'].clear()
+    assert get_catalog_version() == version
+
+
+def test_memcached_from_env(monkeypatch):
+    monkeypatch.setenv('CACHE_LOCATION', 'cache:11211')
+    monkeypatch.setenv('CACHE_STATE_LOCATION', 'state:11211')
+    configured = runpy.run_path(SETTINGS)
+    assert {
+        alias: (config['BACKEND'].rsplit('.', 1)[1], config['LOCATION'])
+        for alias, config in configured['CACHES'].items()
+    } == {
+        'default': ('MemcachedCache', 'cache:11211'),
+        'state': ('MemcachedCache', 'state:11211'),
+    }
+    assert configured['JWT_USER_STATE_CACHE_ALIAS'] == 'state'
@@ -0,0 +1,138 @@
+import multiprocessing
+import runpy
+import time
+from os.path import abspath, dirname, join
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.db import connection
+
+GUNICORN_CONF = join(dirname(dirname(abspath(__file__))), 'api_yamdb',
+                     'gunicorn.conf.py')
+SETTINGS = join(dirname(GUNICORN_CONF), 'api_yamdb', 'settings.py')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnectionHealthChecks:
+
+    def test_unusable_connection_is_closed(self, client, monkeypatch):
+        closed = []
+        connection.ensure_connection()
+        monkeypatch.setitem(connection.settings_dict,
+                            'YAMDB_CONN_HEALTH_CHECK_IDLE', 0)
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        client.get('/api/v1/genres/')
+        assert closed
+
+    def test_checks_can_be_disabled(self, client, monkeypatch):
+        closed = []
+        connection.ensure_connection()
+        monkeypatch.setitem(connection.settings_dict,
+                            'YAMDB_CONN_HEALTH_CHECKS', False)
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        client.get('/api/v1/genres/')
+        assert not closed
+
+    def test_recently_used_connection_is_not_checked(self, client,
+                                                     monkeypatch):
+        client.get('/api/v1/genres/')
+        checks = []
+        monkeypatch.setattr(connection, 'is_usable',
+                            lambda: checks.append(1) or True)
+        client.get('/api/v1/genres/')
+        assert not checks
+
+        monkeypatch.setitem(connection.settings_dict,
+                            'YAMDB_CONN_HEALTH_CHECK_IDLE', 0)
+        client.get('/api/v1/genres/')
+        assert checks
+
+
+class TestPoolHealthChecks:
+
+    def wrapper(self, **options):
+        from api_yamdb.postgresql_pool.base import DatabaseWrapper
+        return DatabaseWrapper(dict(
+            settings.DATABASES['default'], **options
+        ))
+
+    def test_recently_returned_connection_is_not_pinged(self):
+        from api_yamdb.postgresql_pool.base import _idle_since
+        database = self.wrapper()
+        pooled = mock.MagicMock(closed=False)
+        assert database._is_alive(pooled)
+        _idle_since[pooled] = time.monotonic()
+        assert database._is_alive(pooled)
+        pooled.cursor.assert_not_called()
+
+    def test_idle_connection_is_pinged(self):
+        from api_yamdb.postgresql_pool.base import _idle_since
+        database = self.wrapper(YAMDB_CONN_HEALTH_CHECK_IDLE=0)
+        pooled = mock.MagicMock(closed=False)
+        _idle_since[pooled] = time.monotonic()
+        assert database._is_alive(pooled)
+        pooled.cursor.assert_called_once()
+
+
+def run_gunicorn_conf(monkeypatch, engine, **env):
+    monkeypatch.setitem(settings.DATABASES['default'], 'ENGINE', engine)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(GUNICORN_CONF)
+
+
+class TestConnectionBudget:
+
+    def test_default_workers_fit_budget(self, monkeypatch):
+        monkeypatch.setattr(settings, 'DB_CONNECTION_BUDGET', 20)
+        monkeypatch.setattr(multiprocessing, 'cpu_count', lambda: 16)
+        conf = run_gunicorn_conf(
+            monkeypatch, 'django.db.backends.postgresql',
+            GUNICORN_WORKER_CLASS='gthread', GUNICORN_THREADS='8'
+        )
+        assert conf['workers'] == 2
+        conf['on_starting'](mock.Mock())
+
+    def test_pool_limits_connections_per_worker(self, monkeypatch):
+        monkeypatch.setattr(settings, 'DB_CONNECTION_BUDGET', 20)
+        monkeypatch.setitem(settings.DATABASES['default'], 'YAMDB_POOL',
+                            {'MIN_SIZE': 1, 'MAX_SIZE': 4, 'TIMEOUT': 1})
+        conf = run_gunicorn_conf(
+            monkeypatch, 'api_yamdb.postgresql_pool',
+            GUNICORN_WORKER_CLASS='gevent', GUNICORN_WORKERS='5'
+        )
+        assert conf['connections_per_worker']() == 4
+        conf['on_starting'](mock.Mock())
+
+    def test_over_budget_does_not_start(self, monkeypatch):
+        monkeypatch.setattr(settings, 'DB_CONNECTION_BUDGET', 20)
+        conf = run_gunicorn_conf(
+            monkeypatch, 'django.db.backends.postgresql',
+            GUNICORN_WORKER_CLASS='gthread', GUNICORN_THREADS='8',
+            GUNICORN_WORKERS='3'
+        )
+        with pytest.raises(RuntimeError, match='DB_CONNECTION_BUDGET'):
+            conf['on_starting'](mock.Mock())
+
+    def test_gevent_starts_with_default_env(self, monkeypatch):
+        for name in ('DB_POOL', 'GUNICORN_WORKERS', 'GUNICORN_THREADS',
+                     'GUNICORN_WORKER_CONNECTIONS', 'DB_CONNECTION_BUDGET',
+                     'DB_POOL_MAX_SIZE'):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv('DB_ENGINE', 'django.db.backends.postgresql')
+        monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gevent')
+        defaults = runpy.run_path(SETTINGS)
+        database = defaults['DATABASES']['default']
+        assert database['ENGINE'] == 'api_yamdb.postgresql_pool'
+        monkeypatch.setattr(settings, 'DB_CONNECTION_BUDGET',
+                            defaults['DB_CONNECTION_BUDGET'])
+        monkeypatch.setitem(settings.DATABASES, 'default', database)
+        conf = runpy.run_path(GUNICORN_CONF)
+        assert conf['connections_per_worker']() == (
+            database['YAMDB_POOL']['MAX_SIZE']
+        )
+        assert conf['workers'] >= 1
+        conf['on_starting'](mock.Mock())
@@ -0,0 +1,107 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Comment, GenreTitle, Review, Title
+
+
+def content(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+
+    def test_admin_only(self, client, user_client, catalog):
+        assert client.get('/api/v1/export/titles.csv').status_code == 401
+        assert user_client.get('/api/v1/export/titles.csv').status_code == 403
+
+    def test_unknown_dataset_or_format(self, admin_client, catalog):
+        assert admin_client.get('/api/v1/export/users.csv').status_code == 404
+        assert admin_client.get('/api/v1/export/titles.xml').status_code == 404
+
+    def test_titles_ndjson(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/titles.ndjson')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        assert len(rows) == len(catalog['titles'])
+        title = catalog['titles'][1]
+        row = next(row for row in rows if row['id'] == title.id)
+        assert row['category'] == title.category.slug
+        assert row['genre'] == sorted(
+            genre.slug for genre in title.genre.all()
+        )
+
+    def test_reviews_csv_gzip(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/reviews.csv?gzip=1')
+        assert response.status_code == 200
+        assert response['Content-Disposition'] == (
+            'attachment; filename="review.csv.gz"'
+        )
+        text = gzip.decompress(content(response)).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == Review.objects.count()
+        assert set(rows[0]) == {'id', 'title_id', 'text', 'author_id',
+                                'score', 'pub_date'}
+
+    def test_queries_do_not_depend_on_rows(
+            self, admin_client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            response = admin_client.get('/api/v1/export/comments.ndjson')
+            assert len(content(response).splitlines()) > 1
+
+
+REVIEW_FIELDS = ('pk', 'title_id', 'author_id', 'text', 'score', 'pub_date')
+COMMENT_FIELDS = ('pk', 'review_id', 'author_id', 'text', 'pub_date')
+
+
+@pytest.mark.django_db
+def test_csv_round_trips_into_load_csv(catalog, client, tmp_path):
+    # Разные даты в прошлом: после загрузки они не должны стать now().
+    started = timezone.now() - timedelta(days=365)
+    for model in (Review, Comment):
+        for number, pk in enumerate(
+            model.objects.order_by('?').values_list('pk', flat=True)
+        ):
+            model.objects.filter(pk=pk).update(
+                pub_date=started + timedelta(hours=number)
+            )
+    titles = list(Title.objects.order_by('pk').values_list(
+        'pk', 'name', 'year', 'category_id', 'rating'
+    ))
+    links = set(GenreTitle.objects.values_list('title_id', 'genre_id'))
+    reviews = list(Review.objects.order_by('pk').values_list(*REVIEW_FIELDS))
+    comments = list(
+        Comment.objects.order_by('pk').values_list(*COMMENT_FIELDS)
+    )
+    title = catalog['titles'][0]
+    url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+    ordered = [review['id'] for review in client.get(url).json()['results']]
+
+    call_command('export-catalog', path=str(tmp_path), stdout=io.StringIO())
+    call_command('load-csv', path=str(tmp_path), truncate=True,
+                 stdout=io.StringIO())
+
+    assert list(Title.objects.order_by('pk').values_list(
+        'pk', 'name', 'year', 'category_id', 'rating'
+    )) == titles
+    assert set(
+        GenreTitle.objects.values_list('title_id', 'genre_id')
+    ) == links
+    assert list(
+        Review.objects.order_by('pk').values_list(*REVIEW_FIELDS)
+    ) == reviews
+    assert list(
+        Comment.objects.order_by('pk').values_list(*COMMENT_FIELDS)
+    ) == comments
+    cache.clear()
+    assert [
+        review['id'] for review in client.get(url).json()['results']
+    ] == ordered
@@ -0,0 +1,110 @@
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from reviews.models import Genre, GenreTitle, Title, TitleFacet
+
+
+def assert_facets_are_fresh():
+    expected = TitleFacet.objects.count_titles(Title.objects.all())
+    assert TitleFacet.objects.counts() == +expected
+
+
+@pytest.mark.django_db
+class TestFacetCounters:
+
+    def test_catalog_fixture_is_counted(self, catalog):
+        assert_facets_are_fresh()
+
+    def test_title_create_and_update(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 1987,
+            'genre': ['genre-0', 'genre-2'], 'category': 'category-0',
+        }, format='json')
+        assert response.status_code == 201
+        assert_facets_are_fresh()
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{response.json()["id"]}/',
+            data={'genre': ['genre-1'], 'category': 'category-1',
+                  'year': 2001},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert_facets_are_fresh()
+
+    def test_deletes(self, catalog):
+        catalog['titles'][0].delete()
+        catalog['categories'][0].delete()
+        catalog['genres'][1].delete()
+        GenreTitle.objects.filter(genre=catalog['genres'][0]).delete()
+        assert_facets_are_fresh()
+
+    def test_queryset_deletes(self, catalog):
+        Title.objects.filter(pk__in=[
+            title.pk for title in catalog['titles'][:3]
+        ]).delete()
+        Genre.objects.filter(slug='genre-1').delete()
+        assert_facets_are_fresh()
+
+    def test_failed_delete_keeps_genre_updates(self, catalog, monkeypatch):
+        title = catalog['titles'][0]
+        monkeypatch.setattr(
+            TitleFacet.objects.__class__, 'apply_counts',
+            lambda self, deltas: 1 / 0
+        )
+        with pytest.raises(ZeroDivisionError), transaction.atomic():
+            title.delete()
+        monkeypatch.undo()
+        GenreTitle.objects.filter(title=title).first().delete()
+        catalog['titles'][1].delete()
+        assert_facets_are_fresh()
+
+    def test_decrement_stops_at_zero(self, catalog):
+        genre = catalog['genres'][0]
+        TitleFacet.objects.filter(
+            kind=TitleFacet.GENRE, value=genre.pk
+        ).update(count=0)
+        GenreTitle.objects.filter(genre=genre).first().delete()
+        assert TitleFacet.objects.counts()[TitleFacet.GENRE, genre.pk] == 0
+
+    def test_reverse_genre_add(self, catalog):
+        genre = Genre.objects.create(name='Новый', slug='new')
+        genre.title_set.add(*catalog['titles'][:3])
+        assert TitleFacet.objects.counts()[TitleFacet.GENRE, genre.pk] == 3
+        assert_facets_are_fresh()
+
+    def test_recount_fixes_drift(self, catalog):
+        TitleFacet.objects.filter(kind=TitleFacet.GENRE).update(count=0)
+        call_command('recount-facets', verbosity=0)
+        assert_facets_are_fresh()
+
+
+@pytest.mark.django_db
+class TestFacetsEndpoint:
+
+    def test_unfiltered_facets_do_not_scan_titles(
+            self, client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3) as captured:
+            response = client.get('/api/v1/titles/facets/')
+        assert response.status_code == 200
+        assert not any('reviews_title"' in query['sql']
+                       for query in captured.captured_queries)
+        data = response.json()
+        assert data['count'] == len(catalog['titles'])
+        assert data['year'] == [
+            {'year__gte': 2000, 'year__lte': 2009, 'count': 10},
+            {'year__gte': 2010, 'year__lte': 2019, 'count': 2},
+        ]
+        assert {item['slug']: item['count'] for item in data['genre']} == {
+            'genre-0': 6, 'genre-1': 12, 'genre-2': 6,
+        }
+
+    def test_filtered_facets(self, client, catalog):
+        response = client.get('/api/v1/titles/facets/?genre=genre-0')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 6
+        assert {item['slug']: item['count'] for item in data['genre']} == {
+            'genre-0': 6, 'genre-1': 6,
+        }
+        assert {item['slug'] for item in data['category']} == {'category-1'}
@@ -0,0 +1,93 @@
+import io
+
+import pytest
+from api.fast import FastReadMixin, get_fast_serializer
+from api.serializers import (CommentSerializers, ReviewSerializers,
+                             TitleGetSerializer)
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def titles_without_relations(catalog):
+    # Без категории, жанров и отзывов: null в category и rating.
+    return Title.objects.create(name='Пустое', year=1990)
+
+
+def get_both(client, monkeypatch, url):
+    fast = client.get(url)
+    cache.clear()
+    with monkeypatch.context() as patch:
+        patch.setattr(FastReadMixin, 'list', ListModelMixin.list)
+        patch.setattr(FastReadMixin, 'retrieve', RetrieveModelMixin.retrieve)
+        regular = client.get(url)
+    return fast, regular
+
+
+@pytest.mark.django_db
+class TestFastSerializer:
+
+    @pytest.mark.parametrize('serializer_class, queryset', [
+        (TitleGetSerializer,
+         Title.objects.select_related('category').prefetch_related('genre')),
+        (ReviewSerializers, Review.objects.select_related('author')),
+        (CommentSerializers, Comment.objects.select_related('author')),
+    ])
+    def test_same_json_as_serializer(self, catalog, titles_without_relations,
+                                     serializer_class, queryset):
+        queryset = queryset.order_by('pk')
+        fast = get_fast_serializer(serializer_class)
+        renderer = JSONRenderer()
+        assert renderer.render(
+            fast.serialize(fast.values(queryset))
+        ) == renderer.render(serializer_class(queryset, many=True).data)
+
+    def test_genres_are_one_query_per_page(
+            self, catalog, django_assert_num_queries):
+        fast = get_fast_serializer(TitleGetSerializer)
+        with django_assert_num_queries(2):
+            fast.serialize(fast.values(Title.objects.all()))
+
+
+@pytest.mark.django_db
+class TestFastEndpoints:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/?genre=genre-0&limit=3&offset=2',
+        '/api/v1/titles/?pagination=cursor&limit=5',
+        '/api/v1/titles/{title}/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/?pagination=cursor&limit=2',
+        '/api/v1/titles/{title}/reviews/{review}/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/?count=none',
+    ])
+    def test_byte_identical_responses(self, client, review,
+                                      titles_without_relations,
+                                      monkeypatch, url):
+        url = url.format(title=review.title_id, review=review.pk)
+        fast, regular = get_both(client, monkeypatch, url)
+        assert fast.status_code == regular.status_code == 200
+        assert fast.content == regular.content
+
+    def test_missing_objects(self, client, review):
+        assert client.get('/api/v1/titles/0/').status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/0/'
+        ).status_code == 404
+        assert client.get(
+            '/api/v1/titles/0/reviews/'
+        ).status_code == 404
+
+
+@pytest.mark.django_db
+def test_bench_serializers_command(catalog):
+    out = io.StringIO()
+    call_command('bench-serializers', rows=10, repeat=1, stdout=out)
+    report = out.getvalue()
+    for name in ('titles', 'reviews', 'comments'):
+        assert name in report
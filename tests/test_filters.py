@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+    url = '/api/v1/titles/'
+
+    def get_ids(self, client, params):
+        response = client.get(self.url, {'limit': 100, **params})
+        assert response.status_code == 200
+        return [title['id'] for title in response.json()['results']]
+
+    def test_category_is_exact(self, client, catalog):
+        assert self.get_ids(client, {'category': 'category'}) == []
+        ids = self.get_ids(client, {'category': 'category-0'})
+        assert sorted(ids) == [
+            title.id for title in catalog['titles']
+            if title.category.slug == 'category-0'
+        ]
+        both = self.get_ids(client, {'category': 'category-0,category-1'})
+        assert len(both) == len(catalog['titles'])
+
+    def test_icontains_is_opt_in(self, client, catalog):
+        titles_count = len(catalog['titles'])
+        assert len(self.get_ids(
+            client, {'category__icontains': 'category'}
+        )) == titles_count
+        assert self.get_ids(client, {'genre': 'genre'}) == []
+        assert len(self.get_ids(
+            client, {'genre__icontains': 'genre'}
+        )) == titles_count
+
+    def test_genre_any_has_no_duplicates(self, client, catalog):
+        ids = self.get_ids(client, {'genre': 'genre-0,genre-1,genre-2'})
+        assert len(ids) == len(set(ids)) == len(catalog['titles'])
+
+    def test_genre_all(self, client, catalog):
+        ids = self.get_ids(
+            client, {'genre': 'genre-0,genre-1', 'genre_match': 'all'}
+        )
+        assert sorted(ids) == [
+            title.id for title in catalog['titles']
+            if {'genre-0', 'genre-1'} <= set(
+                title.genre.values_list('slug', flat=True)
+            )
+        ]
+
+    def test_year_exact_and_range(self, client, catalog):
+        assert len(self.get_ids(client, {'year': 2003})) == 1
+        assert self.get_ids(client, {'year': 200}) == []
+        ids = self.get_ids(
+            client, {'year__gte': 2002, 'year__lte': 2005,
+                     'category': 'category-0'}
+        )
+        assert sorted(ids) == [
+            title.id for title in catalog['titles']
+            if 2002 <= title.year <= 2005
+            and title.category.slug == 'category-0'
+        ]
@@ -0,0 +1,119 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Review, Title, User
+
+FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,alice,alice@yamdb.fake,user,,,\n'
+        '101,bob,bob@yamdb.fake,admin,,,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'titles.csv': (
+        'id,name,year,category_id\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Крестный отец,1972,1\n'
+        '3,Без категории,1980,7\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author_id,score,pub_date\n'
+        '1,1,"Ставлю десять звёзд!",100,10,2019-09-24T21:08:21.567Z\n'
+        '2,2,"Хорошо, но длинно",101,8,2019-09-25T10:00:00.000Z\n'
+        '3,1,"Нет автора",999,5,2019-09-26T10:00:00.000Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author_id,pub_date\n'
+        '1,1,"Согласен",101,2020-01-13T23:20:02.422Z\n'
+        '2,3,"К пропущенному отзыву",100,2020-01-14T23:20:02.422Z\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,2,1\n',
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, content in FILES.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+def load(path, **options):
+    stdout = io.StringIO()
+    call_command('load-csv', path=str(path), stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestLoadCsv:
+
+    def test_dates_come_from_csv(self, data_dir):
+        load(data_dir)
+        assert Review.objects.get(pk=1).pub_date == datetime(
+            2019, 9, 24, 21, 8, 21, 567000, tzinfo=timezone.utc
+        )
+        assert Comment.objects.get(pk=1).pub_date == datetime(
+            2020, 1, 13, 23, 20, 2, 422000, tzinfo=timezone.utc
+        )
+        # В titles.csv даты нет, подставляется время загрузки.
+        assert Title.objects.get(pk=1).pub_date is not None
+        assert Review._meta.get_field('pub_date').auto_now_add
+
+    def test_rows_without_related_rows_are_skipped(self, data_dir):
+        output = load(data_dir)
+        assert set(Title.objects.values_list('pk', flat=True)) == {1, 2}
+        assert set(Review.objects.values_list('pk', flat=True)) == {1, 2}
+        assert list(Comment.objects.values_list('pk', flat=True)) == [1]
+        assert output.count('Пропущено строк без связанных записей: 1') == 3
+        assert Title.objects.get(pk=1).rating == 10
+
+    def test_batches(self, data_dir):
+        with CaptureQueriesContext(connection) as captured:
+            output = load(data_dir, batch_size=1)
+        inserts = [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('INSERT')
+            and 'INTO "reviews_review"' in query['sql']
+        ]
+        assert len(inserts) == 2
+        assert 'Заполнена модель Review из review.csv: 2 строк' in output
+        assert Review.objects.count() == 2
+
+    def test_existing_rows_are_kept_without_upsert(self, data_dir):
+        Category.objects.create(pk=1, name='Старое', slug='old')
+        load(data_dir)
+        assert Category.objects.get(pk=1).name == 'Старое'
+
+    def test_upsert_updates_existing_rows(self, data_dir):
+        load(data_dir)
+        (data_dir / 'category.csv').write_text(
+            'id,name,slug\n1,Кино,movie\n2,Книга,book\n', encoding='utf-8'
+        )
+        (data_dir / 'review.csv').write_text(
+            'id,title_id,text,author_id,score,pub_date\n'
+            '1,1,"Передумал",100,4,2019-10-01T00:00:00.000Z\n',
+            encoding='utf-8'
+        )
+        load(data_dir, upsert=True)
+        assert list(Category.objects.order_by('pk').values_list(
+            'name', flat=True
+        )) == ['Кино', 'Книга']
+        review = Review.objects.get(pk=1)
+        assert (review.text, review.score) == ('Передумал', 4)
+        assert review.pub_date == datetime(2019, 10, 1, tzinfo=timezone.utc)
+        assert Title.objects.get(pk=1).rating == 4
+
+    def test_truncate_replaces_all_rows_including_admins(self, data_dir,
+                                                          admin):
+        Category.objects.create(name='Лишняя', slug='extra')
+        load(data_dir, truncate=True)
+        assert list(Category.objects.values_list('slug', flat=True)) == [
+            'movie'
+        ]
+        assert not User.objects.filter(pk=admin.pk).exists()
+        assert User.objects.count() == 2
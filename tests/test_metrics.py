@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+from api.metrics import Registry, registry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_are_labeled_by_route(self, client, title):
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/reviews/')
+        text = client.get('/metrics').content.decode()
+        assert (
+            'yamdb_http_requests_total'
+            '{route="titles-list",method="GET",status="200"} 1'
+        ) in text
+        assert (
+            'yamdb_db_queries_per_request_count'
+            '{route="reviews-list",method="GET"} 1'
+        ) in text
+        assert 'yamdb_serializer_duration_seconds_sum{route="titles-list"' \
+            in text
+        assert 'yamdb_http_response_size_bytes_bucket' in text
+
+    def test_metrics_endpoint_is_not_measured(self, client):
+        client.get('/metrics')
+        text = client.get('/metrics').content.decode()
+        assert 'route="metrics"' not in text
+
+    def test_slow_requests_keep_sql(self, client, title, settings):
+        settings.METRICS_SLOW_REQUEST_THRESHOLD = 0
+        client.get(f'/api/v1/titles/{title.id}/')
+        samples = client.get('/metrics/slow').json()
+        assert samples[-1]['route'] == 'titles-detail'
+        assert samples[-1]['queries'] == len(samples[-1]['sql'])
+        assert 'reviews_title' in samples[-1]['sql'][0]['sql']
+
+    def test_workers_are_summed(self, client, title, settings):
+        client.get('/api/v1/titles/')
+        # Снимок другого воркера с тем же маршрутом.
+        other = Registry()
+        other.merge(registry.snapshot())
+        with open(os.path.join(settings.METRICS_DIR, 'other.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(other.snapshot(), file)
+        text = client.get('/metrics').content.decode()
+        assert (
+            'yamdb_http_requests_total'
+            '{route="titles-list",method="GET",status="200"} 2'
+        ) in text
+
+    def test_single_process_without_metrics_dir(self, client, settings):
+        settings.METRICS_DIR = ''
+        client.get('/api/v1/categories/')
+        text = client.get('/metrics').content.decode()
+        assert 'route="categories-list"' in text
+
+
+@pytest.mark.parametrize('meta, status', (
+    ({'REMOTE_ADDR': '127.0.0.1'}, 200),
+    ({'REMOTE_ADDR': '172.18.0.5'}, 200),
+    ({'REMOTE_ADDR': '8.8.8.8'}, 403),
+    ({'REMOTE_ADDR': '172.18.0.5', 'HTTP_X_FORWARDED_FOR': '8.8.8.8'}, 403),
+))
+@pytest.mark.parametrize('url', ('/metrics', '/metrics/slow'))
+def test_metrics_are_internal_only(client, url, meta, status):
+    assert client.get(url, **meta).status_code == status
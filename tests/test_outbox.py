@@ -0,0 +1,181 @@
+import importlib
+import io
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from reviews.models import OutgoingEmail, User
+from reviews.outbox import deliver_batch, queue_depth
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class DroppingBackend(BaseEmailBackend):
+    """Сервер рвёт соединение после sent_before писем."""
+
+    def __init__(self, sent_before, reconnects=True, **kwargs):
+        super().__init__(**kwargs)
+        self.sent_before = sent_before
+        self.reconnects = reconnects
+        self.opened = 0
+        self.sent = []
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, email_messages):
+        if len(self.sent) == self.sent_before and (
+            self.opened == 1 or not self.reconnects
+        ):
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent += email_messages
+        return len(email_messages)
+
+
+def create_emails(count):
+    return [
+        OutgoingEmail.objects.create(
+            subject='Тема', body=f'Письмо {i}', to=f'user{i}@yamdb.fake'
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_only_queues_email(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0
+        assert queue_depth() == 1
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'newbie@yamdb.fake'
+
+    def test_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            OutgoingEmail.objects.create(
+                subject='Тема', body=f'Письмо {i}', to=f'user{i}@yamdb.fake'
+            )
+        connection = get_connection()
+        assert deliver_batch(connection, batch_size=2) == (2, 0)
+        assert deliver_batch(connection, batch_size=2) == (1, 0)
+        assert deliver_batch(connection, batch_size=2) == (0, 0)
+        assert len(mail.outbox) == 3
+        assert queue_depth() == 0
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+        assert not OutgoingEmail.objects.exclude(body='').exists()
+
+    def test_failed_email_is_retried_with_backoff(self, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = OutgoingEmail.objects.create(
+            subject='Тема', body='Письмо', to='user@yamdb.fake'
+        )
+        connection = FailingBackend()
+        assert deliver_batch(connection) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTP недоступен' in email.last_error
+        assert deliver_batch(connection) == (0, 0)
+
+        OutgoingEmail.objects.update(next_attempt_at=email.created_at)
+        assert deliver_batch(connection) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.FAILED
+        assert email.body == ''
+        assert queue_depth() == 0
+
+    def test_batch_is_claimed_before_sending(self):
+        create_emails(2)
+        due = []
+
+        class CheckingBackend(BaseEmailBackend):
+            def send_messages(self, email_messages):
+                due.append(OutgoingEmail.objects.filter(
+                    next_attempt_at__lte=timezone.now()
+                ).count())
+                return len(email_messages)
+
+        assert deliver_batch(CheckingBackend()) == (2, 0)
+        assert due == [0, 0]
+
+    def test_dropped_connection_is_reopened(self):
+        create_emails(3)
+        connection = DroppingBackend(sent_before=1)
+        connection.open()
+        assert deliver_batch(connection) == (3, 0)
+        assert connection.opened == 2
+        assert not OutgoingEmail.objects.exclude(attempts=0).exists()
+
+    def test_lost_connection_stops_batch(self):
+        first, second, third = create_emails(3)
+        connection = DroppingBackend(sent_before=1, reconnects=False)
+        connection.open()
+        assert deliver_batch(connection) == (1, 1)
+        second.refresh_from_db()
+        assert second.attempts == 1
+        assert 'SMTPServerDisconnected' in second.last_error
+        third_before = third.next_attempt_at
+        third.refresh_from_db()
+        assert third.attempts == 0
+        assert third.next_attempt_at == third_before
+        assert queue_depth() == 2
+
+    def test_send_emails_purges_old_sent(self, settings):
+        settings.EMAIL_OUTBOX_KEEP_SENT = 3600
+        old, recent, pending = (
+            OutgoingEmail.objects.create(
+                subject='Тема', body='Письмо', to=f'user{i}@yamdb.fake'
+            )
+            for i in range(3)
+        )
+        now = timezone.now()
+        OutgoingEmail.objects.filter(pk=old.pk).update(
+            status=OutgoingEmail.SENT, sent_at=now - timedelta(hours=2)
+        )
+        OutgoingEmail.objects.filter(pk=recent.pk).update(
+            status=OutgoingEmail.SENT, sent_at=now
+        )
+        OutgoingEmail.objects.filter(pk=pending.pk).update(
+            next_attempt_at=now + timedelta(hours=1)
+        )
+        stdout = io.StringIO()
+        call_command('send-emails', once=True, stdout=stdout)
+        assert 'Удалено отправленных: 1' in stdout.getvalue()
+        assert set(OutgoingEmail.objects.values_list('pk', flat=True)) == {
+            recent.pk, pending.pk
+        }
+
+
+@pytest.mark.django_db
+def test_migration_hashes_codes_in_batches(monkeypatch, user):
+    migration = importlib.import_module(
+        'reviews.migrations.0008_hash_confirmation_codes'
+    )
+    monkeypatch.setattr(migration, 'BATCH_SIZE', 2)
+    User.objects.bulk_create([
+        User(username=f'plain{i}', email=f'plain{i}@yamdb.fake')
+        for i in range(4)
+    ])
+    User.objects.update(confirmation_code='plain')
+    schema_editor = SimpleNamespace(connection=connection)
+    migration.hash_codes(apps, schema_editor)
+    for user in User.objects.all():
+        assert user.check_confirmation_code('plain')
@@ -0,0 +1,240 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """Бюджет SQL-запросов для эндпоинтов /api/v1/.
+
+    Бюджет не должен зависеть от количества объектов на странице.
+    """
+
+    def test_titles_list(self, client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 10
+
+    def test_titles_list_filtered(self, client, catalog,
+                                  django_assert_max_num_queries):
+        with django_assert_max_num_queries(3):
+            response = client.get(
+                '/api/v1/titles/?genre=genre-1&category=category-0'
+            )
+        assert response.status_code == 200
+
+    def test_title_detail(self, client, title,
+                          django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+
+    def test_title_create(self, admin_client, catalog,
+                          django_assert_max_num_queries):
+        data = {
+            'name': 'Новое произведение', 'year': 2000,
+            'genre': ['genre-0', 'genre-1', 'genre-2'],
+            'category': 'category-0',
+        }
+        with django_assert_max_num_queries(9):
+            response = admin_client.post('/api/v1/titles/', data=data,
+                                         format='json')
+        assert response.status_code == 201, response.json()
+        assert len(response.json()['genre']) == 3
+
+    def test_title_update(self, admin_client, title,
+                          django_assert_max_num_queries):
+        data = {'genre': ['genre-0', 'genre-2'], 'category': 'category-1'}
+        # По одному обновлению счётчика на изменённый жанр.
+        with django_assert_max_num_queries(14):
+            response = admin_client.patch(f'/api/v1/titles/{title.id}/',
+                                          data=data, format='json')
+        assert response.status_code == 200, response.json()
+
+    def test_title_delete(self, admin_client, title,
+                          django_assert_max_num_queries):
+        # Рейтинг удаляемого произведения не пересчитывается по отзывам,
+        # счётчики его жанров сдвигаются вместе с остальными одним UPDATE.
+        with django_assert_max_num_queries(8):
+            response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/', '/api/v1/genres/'))
+    def test_catalog_create(self, admin_client, url,
+                            django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = admin_client.post(url, data={'name': 'Н', 'slug': 'n'})
+        assert response.status_code == 201, response.json()
+
+    def test_category_delete(self, admin_client, catalog,
+                             django_assert_max_num_queries):
+        # Связь у произведений сбрасывается одним UPDATE.
+        with django_assert_max_num_queries(5):
+            response = admin_client.delete('/api/v1/categories/category-0/')
+        assert response.status_code == 204
+
+    def test_genre_delete(self, admin_client, catalog,
+                          django_assert_max_num_queries):
+        # Счётчик жанра не уменьшается по связям, а сразу удаляется.
+        with django_assert_max_num_queries(5):
+            response = admin_client.delete('/api/v1/genres/genre-0/')
+        assert response.status_code == 204
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/', '/api/v1/genres/'))
+    def test_catalog_lists(self, client, catalog, url,
+                           django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_reviews_list(self, client, title,
+                          django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 3
+
+    def test_review_detail(self, client, review,
+                           django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            response = client.get(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+            )
+        assert response.status_code == 200
+
+    def test_review_create(self, user_client, title,
+                           django_assert_max_num_queries):
+        with django_assert_max_num_queries(6):
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == 201, response.json()
+
+    def test_review_update(self, admin_client, review,
+                           django_assert_max_num_queries):
+        # Чтение старой оценки под блокировкой в точке сохранения.
+        with django_assert_max_num_queries(6):
+            response = admin_client.patch(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/',
+                data={'score': review.score % 10 + 1}
+            )
+        assert response.status_code == 200, response.json()
+
+    def test_review_delete(self, admin_client, review,
+                           django_assert_max_num_queries):
+        with django_assert_max_num_queries(4):
+            response = admin_client.delete(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+            )
+        assert response.status_code == 204
+
+    def test_comments_list(self, client, review,
+                           django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = client.get(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                'comments/'
+            )
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+
+    def test_comment_create(self, user_client, review,
+                            django_assert_max_num_queries):
+        with django_assert_max_num_queries(3):
+            response = user_client.post(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                'comments/',
+                data={'text': 'Комментарий'}
+            )
+        assert response.status_code == 201, response.json()
+
+    def test_comment_update(self, admin_client, review,
+                            django_assert_max_num_queries):
+        comment = review.comments.first()
+        with django_assert_max_num_queries(2):
+            response = admin_client.patch(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                f'comments/{comment.id}/',
+                data={'text': 'Исправлено'}
+            )
+        assert response.status_code == 200, response.json()
+
+    def test_comment_delete(self, admin_client, review,
+                            django_assert_max_num_queries):
+        comment = review.comments.first()
+        with django_assert_max_num_queries(2):
+            response = admin_client.delete(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                f'comments/{comment.id}/'
+            )
+        assert response.status_code == 204
+
+    def test_users_list(self, admin_client, catalog,
+                        django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_user_detail(self, admin_client, user,
+                         django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            response = admin_client.get(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 200
+
+    def test_profile(self, user_client, django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+
+    def test_signup(self, client, django_assert_num_queries):
+        # Вставка пользователя и письма и точка сохранения вокруг
+        # вставки пользователя внутри транзакции теста.
+        with django_assert_num_queries(4):
+            response = client.post(
+                '/api/v1/auth/signup/',
+                data={'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+            )
+        assert response.status_code == 200, response.json()
+
+    def test_token(self, client, user, django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            response = client.post(
+                '/api/v1/auth/token/',
+                data={'username': user.username,
+                      'confirmation_code': user.raw_confirmation_code}
+            )
+        assert response.status_code == 201, response.json()
+
+    def test_reviews_cursor_pages(self, client, title,
+                                  django_assert_max_num_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=2'
+        with django_assert_max_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == 200
+        first_page = response.json()
+        assert 'count' not in first_page
+        assert len(first_page['results']) == 2
+        with django_assert_max_num_queries(1):
+            response = client.get(first_page['next'])
+        assert response.status_code == 200
+        second_page = response.json()
+        assert len(second_page['results']) == 1
+        assert second_page['next'] is None
+        ids = {review['id'] for review in
+               first_page['results'] + second_page['results']}
+        assert len(ids) == 3
+
+    @pytest.mark.parametrize('count', ('none', 'estimate'))
+    def test_comments_without_exact_count(self, client, review, count,
+                                          django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = client.get(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                f'comments/?count={count}&limit=1'
+            )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page['results']) == 1
+        assert page['next'] is not None
+        if count == 'none':
+            assert page['count'] is None
@@ -0,0 +1,130 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Sum
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review, Title
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.score_sum, title.review_count, title.rating
+
+
+def expected(title):
+    totals = Review.objects.filter(title=title).aggregate(
+        score_sum=Sum('score'), review_count=Count('pk'), rating=Avg('score')
+    )
+    return (totals['score_sum'] or 0, totals['review_count'],
+            totals['rating'])
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    def test_create(self, catalog, user):
+        title = catalog['titles'][0]
+        Review.objects.create(title=title, author=user, text='Отзыв', score=1)
+        assert stored(title) == expected(title)
+
+    def test_score_change(self, review):
+        review.score = review.score % 10 + 1
+        review.save()
+        assert stored(review.title) == expected(review.title)
+
+    def test_title_change(self, catalog, user):
+        first, second = catalog['titles'][:2]
+        review = Review.objects.create(title=first, author=user,
+                                       text='Отзыв', score=3)
+        review.title = second
+        review.save()
+        assert stored(first) == expected(first)
+        assert stored(second) == expected(second)
+
+    def test_delete(self, review):
+        title = review.title
+        review.delete()
+        assert stored(title) == expected(title)
+
+    def test_last_review_delete_clears_rating(self, catalog, user):
+        title = Title.objects.create(name='Пустое', year=2000)
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=7)
+        review.delete()
+        assert stored(title) == (0, 0, None)
+
+    def test_title_delete_does_not_update_its_rating(self, title):
+        with CaptureQueriesContext(connection) as captured:
+            title.delete()
+        assert not [
+            query for query in captured.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert not Review.objects.filter(title_id=title.pk).exists()
+
+    def test_failed_title_delete_keeps_rating_updates(self, title):
+        def fail(**kwargs):
+            raise RuntimeError
+
+        post_delete.connect(fail, sender=Review)
+        try:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                title.delete()
+        finally:
+            post_delete.disconnect(fail, sender=Review)
+        title.reviews.first().delete()
+        assert stored(title) == expected(title)
+
+    def test_stale_instances_do_not_drift(self, review):
+        # Два запроса прочитали отзыв до изменений друг друга.
+        first = Review.objects.get(pk=review.pk)
+        second = Review.objects.get(pk=review.pk)
+        first.score = review.score % 10 + 1
+        first.save()
+        second.score = first.score % 10 + 1
+        second.save()
+        assert stored(review.title) == expected(review.title)
+
+    def test_api_patch(self, catalog, user_client, user):
+        title = catalog['titles'][0]
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=2)
+        response = user_client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/',
+            data={'score': 9}
+        )
+        assert response.status_code == 200
+        assert stored(title) == expected(title)
+
+
+@pytest.mark.django_db
+class TestRecountRatings:
+
+    def drift(self, catalog):
+        title = catalog['titles'][0]
+        Title.objects.filter(pk=title.pk).update(
+            score_sum=1, review_count=1, rating=1
+        )
+        return title
+
+    def test_dry_run_reports_drift(self, catalog):
+        title = self.drift(catalog)
+        stdout = io.StringIO()
+        call_command('recount-ratings', dry_run=True, stdout=stdout)
+        output = stdout.getvalue()
+        assert f'Расхождение у произведения {title.pk}' in output
+        assert 'найдено расхождений: 1' in output
+        assert stored(title) == (1, 1, 1)
+
+    def test_fixes_drift(self, catalog):
+        title = self.drift(catalog)
+        stdout = io.StringIO()
+        call_command('recount-ratings', batch_size=5, stdout=stdout)
+        assert 'исправлено расхождений: 1' in stdout.getvalue()
+        assert stored(title) == expected(title)
+        stdout = io.StringIO()
+        call_command('recount-ratings', stdout=stdout)
+        assert 'исправлено расхождений: 0' in stdout.getvalue()
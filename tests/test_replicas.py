@@ -0,0 +1,125 @@
+import pytest
+from api.cache import get_state_cache
+from api.replicas import (ReplicaRouter, _down_until, choose_replica,
+                          set_replica)
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+def _add_alias(alias, settings_dict):
+    connections.databases[alias] = settings_dict
+    yield alias
+    connections[alias].close()
+    del connections.databases[alias]
+    delattr(connections._connections, alias)
+
+
+@pytest.fixture
+def replica(settings):
+    """Реплика — второе соединение к той же тестовой БД."""
+    settings.DATABASE_REPLICAS = ['replica']
+    yield from _add_alias(
+        'replica', dict(connections[DEFAULT_DB_ALIAS].settings_dict)
+    )
+
+
+@pytest.fixture
+def broken_replica(settings):
+    settings.DATABASE_REPLICAS = ['broken']
+    yield from _add_alias('broken', dict(
+        connections[DEFAULT_DB_ALIAS].settings_dict,
+        ENGINE='django.db.backends.sqlite3',
+        NAME='/nonexistent/replica.sqlite3',
+    ))
+    _down_until.pop('broken', None)
+
+
+@pytest.fixture
+def replica_queries(replica):
+    queries = []
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connections[replica].execute_wrapper(wrapper):
+        yield queries
+
+
+class TestReplicaRouter:
+
+    def teardown_method(self):
+        set_replica(None)
+
+    def test_reads_go_to_chosen_replica(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) == DEFAULT_DB_ALIAS
+        set_replica('replica')
+        assert router.db_for_read(Title) == 'replica'
+        assert router.db_for_write(Title) == DEFAULT_DB_ALIAS
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaReads:
+
+    def test_safe_request_reads_from_replica(self, client, review,
+                                             replica_queries):
+        response = client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['results']
+        assert replica_queries
+
+    def test_search_reads_one_database(self, client, title,
+                                       replica_queries):
+        Title.objects.filter(pk=title.pk).update(name='Шерлок Холмс')
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            response = client.get('/api/v1/search/',
+                                  {'q': 'шерлок', 'type': 'titles'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            title.pk
+        ]
+        assert '_fts' in replica_queries[0]
+        assert not primary.captured_queries
+
+    def test_reads_after_write_go_to_primary(self, user_client, title,
+                                             replica_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        response = user_client.get(url)
+        assert response.status_code == 200
+        assert not replica_queries
+
+    def test_sticky_cookie_works_without_shared_cache(
+            self, user_client, title, replica_queries):
+        # Другой воркер со своим кешем знает о записи только по cookie.
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        assert response.cookies['replica_sticky']['httponly']
+        get_state_cache().clear()
+        assert user_client.get(url).status_code == 200
+        assert not replica_queries
+
+    def test_forged_sticky_cookie_is_ignored(self, client, review,
+                                             replica_queries):
+        client.cookies['replica_sticky'] = '1'
+        response = client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        assert response.status_code == 200
+        assert replica_queries
+
+    def test_fresh_catalog_is_read_from_primary(self, client, settings,
+                                                catalog, replica_queries):
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert not replica_queries
+        settings.DATABASE_REPLICA_STICKY_SECONDS = 0
+        client.get('/api/v1/titles/?name=new')
+        assert replica_queries
+
+    def test_unavailable_replica_falls_back_to_primary(
+            self, client, review, broken_replica):
+        response = client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['results']
+        assert choose_replica() is None
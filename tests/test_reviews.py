@@ -0,0 +1,66 @@
+import pytest
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_duplicate_review_is_rejected(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        first = user_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        assert first.status_code == 201
+        title.refresh_from_db()
+        rating = title.rating
+
+        second = user_client.post(url, data={'text': 'Ещё', 'score': 10})
+        assert second.status_code == 400
+        assert second.json() == {
+            'non_field_errors': ['Может существовать только один отзыв!']
+        }
+        assert Review.objects.filter(title=title, text='Ещё').count() == 0
+        title.refresh_from_db()
+        assert title.rating == rating
+
+    def test_review_for_missing_title(self, user_client):
+        response = user_client.post('/api/v1/titles/0/reviews/',
+                                    data={'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestNestedRoutes:
+
+    def test_comments_list_is_one_joined_query(
+            self, client, review, django_assert_num_queries):
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+               'comments/?count=none')
+        with django_assert_num_queries(1) as captured:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert 'JOIN "reviews_review"' in captured.captured_queries[0]['sql']
+
+    def test_empty_list_of_existing_parent(self, client, title):
+        title.reviews.all().delete()
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+    def test_missing_parent(self, client, review):
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+        response = client.get(
+            f'/api/v1/titles/0/reviews/{review.id}/comments/'
+        )
+        assert response.status_code == 404
+
+    def test_review_from_another_title(self, client, user_client, review,
+                                       catalog):
+        other = next(title for title in catalog['titles']
+                     if title.id != review.title_id)
+        response = client.get(f'/api/v1/titles/{other.id}/reviews/'
+                              f'{review.id}/')
+        assert response.status_code == 404
+        response = user_client.post(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            data={'text': 'Комментарий'}
+        )
+        assert response.status_code == 404
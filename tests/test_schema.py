@@ -0,0 +1,74 @@
+import pytest
+from api_yamdb import schema
+from django.urls import clear_url_caches
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    schema._build_page.cache_clear()
+    calls = []
+
+    def counting_build_schema():
+        # Сама схема DRF здесь не важна, проверяется только кеширование.
+        calls.append(1)
+        return {'title': 'API Yamdb', 'endpoints': [
+            {'path': '/api/v1/titles/', 'method': 'get'},
+        ]}
+
+    monkeypatch.setattr(schema, 'build_schema', counting_build_schema)
+    yield calls
+    schema._build_page.cache_clear()
+
+
+class TestSchemaPage:
+
+    def test_built_once_per_process(self, client, builds):
+        first = client.get('/')
+        second = client.get('/')
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        assert b'/api/v1/titles/' in first.content
+        assert len(builds) == 1
+
+    def test_etag_and_cache_headers(self, client, builds, settings):
+        settings.SCHEMA_CACHE_MAX_AGE = 86400
+        response = client.get('/')
+        assert 'max-age=86400' in response['Cache-Control']
+        etag = response['ETag']
+        response = client.get('/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_rebuilt_after_urlconf_change(self, client, builds):
+        client.get('/')
+        clear_url_caches()
+        client.get('/')
+        assert len(builds) == 2
+
+
+@pytest.mark.django_db
+def test_real_schema_page(client, settings):
+    # Схема OpenAPI в DRF требует uritemplate из requirements.txt.
+    pytest.importorskip('uritemplate')
+    schema._build_page.cache_clear()
+    settings.SCHEMA_CACHE_MAX_AGE = 3600
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'/api/v1/titles/' in response.content
+    assert 'max-age=3600' in response['Cache-Control']
+    response = client.get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+    assert response.content == b''
+    schema._build_page.cache_clear()
+
+
+def test_operation_ids_are_unique(recwarn):
+    pytest.importorskip('uritemplate')
+    from rest_framework.schemas.openapi import SchemaGenerator
+    paths = SchemaGenerator().get_schema()['paths']
+    operation_ids = [
+        operation['operationId']
+        for path in paths.values() for operation in path.values()
+    ]
+    assert len(operation_ids) == len(set(operation_ids))
+    assert not [w for w in recwarn if 'operationId' in str(w.message)]
@@ -0,0 +1,80 @@
+import pytest
+from api.search import BaseSearchBackend
+from django.apps import apps
+from django.db import connection
+from django.db.models.signals import post_migrate
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestSearch:
+    url = '/api/v1/search/'
+
+    def test_search_requires_query(self, client):
+        assert client.get(self.url).status_code == 400
+        response = client.get(self.url, {'q': 'x', 'type': 'users'})
+        assert response.status_code == 400
+
+    def test_titles_are_ranked(self, client, catalog):
+        first, second = catalog['titles'][:2]
+        Title.objects.filter(pk=first.pk).update(
+            description='Сага о Колобке'
+        )
+        Title.objects.filter(pk=second.pk).update(name='Колобок')
+        response = client.get(self.url, {'q': 'колобок', 'type': 'titles'})
+        assert response.status_code == 200
+        ids = [title['id'] for title in response.json()['titles']]
+        assert ids[0] == second.pk
+
+    def test_partial_word_matches(self, client, title):
+        Title.objects.filter(pk=title.pk).update(name='Шерлок Холмс')
+        response = client.get(self.url, {'q': 'Шерл', 'type': 'titles'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            title.pk
+        ]
+
+    def test_index_follows_writes(self, client, review, user):
+        comment = Comment.objects.create(
+            review=review, author=user, text='Неожиданная развязка'
+        )
+        response = client.get(self.url, {'q': 'развязка'})
+        data = response.json()
+        assert [item['id'] for item in data['comments']] == [comment.pk]
+        assert data['comments'][0]['title'] == review.title_id
+        assert data['reviews'] == []
+
+        Review.objects.filter(pk=review.pk).update(text='Развязка слабая')
+        comment.delete()
+        data = client.get(self.url, {'q': 'развязка'}).json()
+        assert data['comments'] == []
+        assert [item['id'] for item in data['reviews']] == [review.pk]
+
+    def test_triggers_are_restored_after_migrate(self, client, title):
+        # Так SQLite теряет триггеры, когда миграция пересоздаёт таблицу.
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER reviews_title_fts_update')
+        Title.objects.filter(pk=title.pk).update(name='Шерлок Холмс')
+        post_migrate.send(apps.get_app_config('reviews'),
+                          app_config=apps.get_app_config('reviews'),
+                          verbosity=0, interactive=False, using='default',
+                          apps=apps, plan=[])
+        response = client.get(self.url, {'q': 'шерлок', 'type': 'titles'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            title.pk
+        ]
+        Title.objects.filter(pk=title.pk).update(name='Ватсон')
+        response = client.get(self.url, {'q': 'ватсон', 'type': 'titles'})
+        assert [item['id'] for item in response.json()['titles']] == [
+            title.pk
+        ]
+
+
+@pytest.mark.django_db
+def test_base_backend_matches_substring(catalog):
+    first, second = catalog['titles'][:2]
+    Title.objects.filter(pk__in=(first.pk, second.pk)).update(
+        description='Сага о Колобке'
+    )
+    assert BaseSearchBackend().search(Title, 'Колоб', 10) == [
+        second.pk, first.pk
+    ]
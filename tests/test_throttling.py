@@ -0,0 +1,103 @@
+import pytest
+from api.throttling import (IPRateThrottle, SQLiteBuckets,
+                            TokenBucketThrottle, get_buckets)
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = dict(
+            settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=rates
+        )
+    return set_rates
+
+
+@pytest.fixture(params=('cache', 'sqlite'))
+def store(request, settings):
+    if request.param == 'cache':
+        settings.THROTTLE_SQLITE_PATH = ''
+    return request.param
+
+
+class View:
+    throttle_scope = 'test'
+
+
+def check(throttle, address='10.0.0.1'):
+    request = Request(RequestFactory().post('/', REMOTE_ADDR=address))
+    return throttle.allow_request(request, View())
+
+
+class TestTokenBucket:
+
+    def test_burst_then_refill(self, rates, store, monkeypatch):
+        rates(test='3/min')
+        now = [1000.0]
+        monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+        throttle = IPRateThrottle()
+        assert [check(throttle) for _ in range(4)] == [True] * 3 + [False]
+        assert throttle.wait() == pytest.approx(20)
+        assert check(throttle, '10.0.0.2')
+        now[0] += 20
+        assert check(throttle)
+        assert not check(throttle)
+
+    def test_sqlite_buckets_are_shared(self, tmp_path):
+        path = str(tmp_path / 'throttle.sqlite3')
+        first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+        assert first.take('key', 2, 60, 1000.0) == 2
+        assert second.take('key', 2, 60, 1000.0) == 1
+        assert first.take('key', 2, 60, 1000.0) == 0
+
+    def test_default_key_is_client_ip(self):
+        request = Request(RequestFactory().post('/', REMOTE_ADDR='10.0.0.9'))
+        assert TokenBucketThrottle().get_ident_key(request) == 'ip:10.0.0.9'
+
+    def test_sqlite_store_is_selected(self, store):
+        expected = 'SQLiteBuckets' if store == 'sqlite' else 'CacheBuckets'
+        assert type(get_buckets()).__name__ == expected
+
+
+@pytest.mark.django_db
+class TestThrottledViews:
+
+    def test_signup_is_limited_per_ip(self, client, rates):
+        rates(signup='2/min')
+        statuses = [
+            client.post('/api/v1/auth/signup/', data={
+                'username': f'user{number}',
+                'email': f'user{number}@yamdb.fake',
+            }).status_code
+            for number in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'other', 'email': 'other@yamdb.fake',
+        }, HTTP_X_FORWARDED_FOR='192.0.2.1')
+        assert response.status_code == 200
+
+    def test_reviews_limit_writes_per_user(self, rates, user_client,
+                                           admin_client, catalog):
+        rates(reviews='1/min')
+        first, second = catalog['titles'][:2]
+        url = '/api/v1/titles/{}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(url.format(first.pk),
+                                data=data).status_code == 201
+        response = user_client.post(url.format(second.pk), data=data)
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+        assert user_client.get(url.format(first.pk)).status_code == 200
+        assert admin_client.post(url.format(second.pk),
+                                 data=data).status_code == 201
+
+    def test_disabled(self, client, rates, settings):
+        rates(token='1/min')
+        settings.THROTTLE_ENABLED = False
+        for _ in range(3):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'nobody', 'confirmation_code': 'code',
+            })
+            assert response.status_code == 404